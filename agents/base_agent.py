@@ -3,11 +3,14 @@
 """
 Defines a base class for LLM agents that represent different social groups.
 Each agent has a role, a group profile (stats), and can react to proposed policy vectors using Ollama.
+LLM calls go through the shared pooled client in llm/client.py.
 """
 
 import random
 import numpy as np
-import subprocess
+from llm.client import get_default_client, join_prefix
+from llm.streaming import ScoreParser, generate_until
+from telemetry import metrics
 
 class Agent:
     def __init__(self, name, role, group_stats):
@@ -15,17 +18,12 @@ class Agent:
         self.role = role
         self.group_stats = group_stats
 
-    def build_prompt(self, policy_vector):
-        return f"""
-You are {self.name}, a {self.role} in society. Your responsibility is to evaluate how a new policy will affect your social group.
-
-Group Statistics:
-- Average Education Level: {self.group_stats['education']:.1f} years
-- Average Income: ${self.group_stats['income']:.1f}
-- Average Hours Worked per Week: {self.group_stats['hours']:.1f}
-- Average Age: {self.group_stats['age']:.1f}
-- Average Capital Loss: ${self.group_stats['loss']:.1f}
-
+    def build_prompt_parts(self, policy_vector):
+        """
+        Split the prompt into the policy description and instructions, which are identical for every
+        agent at a given step, and the agent-specific persona, which comes last.
+        """
+        shared = f"""
 The society is considering a new policy that will determine how resources and opportunities are distributed. This policy is based on the following weights:
 - {policy_vector[0]*100:.1f}% of resources are allocated based on meritocracy (favoring individuals with higher education, effort, and skill)
 - {policy_vector[1]*100:.1f}% are dedicated to promoting fairness (helping historically disadvantaged or underrepresented groups)
@@ -33,26 +31,40 @@ The society is considering a new policy that will determine how resources and op
 - {policy_vector[3]*100:.1f}% focus on age inclusion (ensuring fair treatment of people across age groups)
 - {policy_vector[4]*100:.1f}% prioritize loss recovery (providing compensation for those who have experienced financial losses)
 
-Based on your group's interests and characteristics, please respond with:
+You will evaluate how this policy affects the social group described below. Based on the group's interests and characteristics, please respond with:
 1. A numerical score from 0 (terrible) to 10 (excellent) indicating how much this policy benefits your group.
 2. One concise sentence explaining your reasoning.
 """
+        persona = f"""You are {self.name}, a {self.role} in society. Your responsibility is to evaluate how this policy will affect your social group.
+
+Group Statistics:
+- Average Education Level: {self.group_stats['education']:.1f} years
+- Average Income: ${self.group_stats['income']:.1f}
+- Average Hours Worked per Week: {self.group_stats['hours']:.1f}
+- Average Age: {self.group_stats['age']:.1f}
+- Average Capital Loss: ${self.group_stats['loss']:.1f}
+"""
+        return shared, persona
+
+    def build_prompt(self, policy_vector):
+        return join_prefix(*self.build_prompt_parts(policy_vector))
 
-    def llm_response(self, policy_vector, model="deepseek-r1"):
-        prompt = self.build_prompt(policy_vector)
+    def llm_response(self, policy_vector, model="deepseek-r1", options=None):
+        """(score in [0, 10], text); the score is None if the call failed or no score could be parsed."""
+        shared, persona = self.build_prompt_parts(policy_vector)
         try:
-            result = subprocess.run(
-                ["ollama", "run", model],
-                input=prompt.encode("utf-8"),
-                capture_output=True,
-                timeout=120
-            )
-            content = result.stdout.decode("utf-8").strip()
-            score = self._extract_score(content)
+            # Stream and stop once the score and its one-sentence reason have been parsed
+            parser = ScoreParser(0, 10, justification=True)
+            content = generate_until(get_default_client(), persona, parser, model=model, options=options, prefix=shared)
+            score = parser.score if parser.score is not None else self._extract_score(content)
+            if score is None:
+                metrics.inc("llm_parse_failures_total", site="agent")
+                metrics.inc("llm_fallbacks_total", site="agent")
             return score, content
         except Exception as e:
             print(f"Ollama error for {self.name}: {e}")
-            return 5.0, "Default response due to error."
+            metrics.inc("llm_fallbacks_total", site="agent")
+            return None, f"[ERROR] {str(e)}"
 
     def _extract_score(self, content):
         for token in content.split():
@@ -62,4 +74,4 @@ Based on your group's interests and characteristics, please respond with:
                     return num
             except ValueError:
                 continue
-        return 5.0  # fallback score
+        return None
@@ -0,0 +1,94 @@
+# agents/profiles.py
+
+"""
+Builds Agent profiles for stratified demographic groups of the UCI Adult dataset in bulk.
+
+A grouping spec lists the dimensions to cross, each either a categorical column or a Band of a numeric
+column, e.g. ["sex", "education", "income", "age", "occupation"] for every combination of the presets in
+DIMENSIONS. Every row gets one flat group id, and all group statistics (count, total weight and the
+fnlwgt-weighted means used in the agent prompt) come out of a few np.bincount calls over those ids,
+instead of one boolean-mask scan per group.
+"""
+
+from typing import Dict, Iterable, List, NamedTuple, Optional, Sequence, Union
+
+import numpy as np
+
+from agents.base_agent import Agent
+
+
+class Band(NamedTuple):
+    """Numeric column split at `edges` into right-open bands; values outside the edges join the end bands."""
+    column: str
+    edges: Sequence[float]
+    labels: Optional[Sequence[str]] = None
+
+    def names(self) -> List[str]:
+        if self.labels:
+            return list(self.labels)
+        return [f"{lo:g}-{hi:g}" for lo, hi in zip(self.edges[:-1], self.edges[1:])]
+
+
+DIMENSIONS: Dict[str, Union[str, Band]] = {
+    "sex": "sex",
+    "race": "race",
+    "income": "income",
+    "occupation": "occupation",
+    "workclass": "workclass",
+    "marital_status": "marital_status",
+    "education": Band("education_num", [1, 9, 13, 14, 17],
+                      ["below-high-school", "high-school", "bachelors", "postgraduate"]),
+    "age": Band("age", [17, 30, 45, 60, 91], ["17-29", "30-44", "45-59", "60+"]),
+    "hours": Band("hours_per_week", [1, 35, 41, 100], ["part-time", "full-time", "overtime"]),
+}
+
+# Agent prompt statistics (see Agent.build_prompt_parts); income uses the same capital-gain proxy as feedback_loop
+STATS = {
+    "education": lambda table: table["education_num"],
+    "income": lambda table: table["capital_gain"] + 1,
+    "hours": lambda table: table["hours_per_week"],
+    "age": lambda table: table["age"],
+    "loss": lambda table: table["capital_loss"],
+}
+
+
+def _dimension_codes(table, dimension):
+    if isinstance(dimension, Band):
+        bands = np.searchsorted(dimension.edges, np.asarray(table[dimension.column]), side="right") - 1
+        return np.clip(bands, 0, len(dimension.edges) - 2), dimension.names()
+    return np.asarray(table[dimension]), list(table.categories[dimension])
+
+
+def build_profiles(table, spec: Union[Iterable[str], Dict[str, Union[str, Band]]], weight: Optional[str] = "fnlwgt",
+                   min_count: int = 1, sep: str = " / ") -> List[Agent]:
+    """
+    Return one Agent per non-empty combination of the spec's dimensions (with at least `min_count` rows).
+    `table` is a dataset.adult.AdultTable; `spec` is a list of DIMENSIONS names or a {name: column or Band}
+    dict. The agent's name joins all dimension labels, its role is the label of the first dimension (so
+    coalitions form along it), and its group_stats hold the weighted means plus `count` and `weight`.
+    """
+    if not isinstance(spec, dict):
+        spec = {name: DIMENSIONS[name] for name in spec}
+    codes, labels = zip(*(_dimension_codes(table, dimension) for dimension in spec.values()))
+    sizes = [len(names) for names in labels]
+
+    flat = np.ravel_multi_index([code.astype(np.int64) for code in codes], sizes)
+    groups, inverse = np.unique(flat, return_inverse=True)
+    weights = np.asarray(table[weight], dtype=np.float64) if weight else np.ones(len(flat))
+
+    counts = np.bincount(inverse, minlength=len(groups))
+    totals = np.bincount(inverse, weights=weights, minlength=len(groups))
+    means = {
+        stat: np.bincount(inverse, weights=weights * values(table), minlength=len(groups)) / totals
+        for stat, values in STATS.items()
+    }
+
+    keep = np.flatnonzero(counts >= min_count)
+    combos = np.unravel_index(groups[keep], sizes)
+    agents = []
+    for i, index in enumerate(keep):
+        parts = [labels[d][combos[d][i]] for d in range(len(sizes))]
+        stats = {stat: float(column[index]) for stat, column in means.items()}
+        stats.update(count=int(counts[index]), weight=float(totals[index]))
+        agents.append(Agent(sep.join(parts), parts[0], stats))
+    return agents
@@ -0,0 +1,150 @@
+# dataset/adult.py
+
+"""
+UCI Adult dataset, parsed once and cached as memory-mappable typed arrays.
+
+The raw `adult.data` file is read from ADULT_DATA_PATH (default: data/adult.data in the repository) and
+downloaded there once if it is missing. The cleaned table (rows with missing values dropped, categorical
+columns stored as integer codes with their category labels) is written to a columnar store under
+ADULT_CACHE_DIR, keyed by a SHA-256 of the raw file, so a changed file is re-parsed automatically and
+every later start only memory-maps the arrays.
+
+All consumers should go through load_adult():
+- AdultTable.to_frame()       decoded DataFrame (categoricals as pandas Categorical of the original labels)
+- AdultTable.encoded_frame()  every column as category codes, as `pd.Categorical(col).codes` would give
+"""
+
+import hashlib
+import os
+import shutil
+import sys
+import urllib.request
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from storage.columnar import ColumnarReader, ColumnarWriter
+
+URL = "https://archive.ics.uci.edu/ml/machine-learning-databases/adult/adult.data"
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+DEFAULT_PATH = os.environ.get("ADULT_DATA_PATH", os.path.join(REPO_ROOT, "data", "adult.data"))
+DEFAULT_CACHE_DIR = os.environ.get("ADULT_CACHE_DIR", os.path.expanduser("~/.cache/sim-society/adult"))
+# Bump when the cleaning or storage layout changes, so old caches are not reused
+CACHE_VERSION = 1
+
+COLUMNS = [
+    "age", "workclass", "fnlwgt", "education", "education_num", "marital_status",
+    "occupation", "relationship", "race", "sex", "capital_gain", "capital_loss",
+    "hours_per_week", "native_country", "income"
+]
+CATEGORICAL = ["workclass", "education", "marital_status", "occupation", "relationship", "race", "sex",
+               "native_country", "income"]
+NUMERIC = [column for column in COLUMNS if column not in CATEGORICAL]
+
+
+def file_hash(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def ensure_raw(path: str = DEFAULT_PATH) -> str:
+    """Return the path of the raw file, downloading it there first if it does not exist yet."""
+    if not os.path.exists(path):
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        print(f"Downloading UCI Adult dataset to {path}", file=sys.stderr)
+        tmp = f"{path}.part"
+        try:
+            urllib.request.urlretrieve(URL, tmp)
+        except OSError as e:
+            raise FileNotFoundError(f"{path} does not exist and {URL} could not be downloaded ({e}); "
+                                    f"place adult.data there or set ADULT_DATA_PATH") from e
+        os.replace(tmp, path)
+    return path
+
+
+def parse_raw(path: str) -> pd.DataFrame:
+    """Parse and clean the raw CSV: values are stripped, and rows containing '?' are dropped."""
+    data = pd.read_csv(path, header=None, names=COLUMNS, na_values="?", skipinitialspace=True)
+    data.dropna(inplace=True)
+    data.reset_index(drop=True, inplace=True)
+    return data
+
+
+class AdultTable:
+    """The cleaned dataset as column arrays: numeric columns as int64, categoricals as int16 codes."""
+
+    def __init__(self, arrays: Dict[str, np.ndarray], categories: Dict[str, List[str]], source_hash: str):
+        self.arrays = arrays
+        self.categories = categories
+        self.source_hash = source_hash
+
+    def __len__(self) -> int:
+        return len(self.arrays[COLUMNS[0]])
+
+    def __getitem__(self, column: str) -> np.ndarray:
+        return self.arrays[column]
+
+    def code(self, column: str, value: str) -> int:
+        """Integer code of a category label, e.g. code("sex", "Female") == 0."""
+        return self.categories[column].index(value)
+
+    def to_frame(self) -> pd.DataFrame:
+        frame = {}
+        for column in COLUMNS:
+            if column in self.categories:
+                frame[column] = pd.Categorical.from_codes(self.arrays[column], self.categories[column])
+            else:
+                frame[column] = np.asarray(self.arrays[column])
+        return pd.DataFrame(frame, columns=COLUMNS)
+
+    def encoded_frame(self) -> pd.DataFrame:
+        """Every column (numeric ones included) replaced by its sorted-category code."""
+        frame = {}
+        for column in COLUMNS:
+            if column in self.categories:
+                frame[column] = np.asarray(self.arrays[column])
+            else:
+                frame[column] = np.unique(self.arrays[column], return_inverse=True)[1].astype(np.int16)
+        return pd.DataFrame(frame, columns=COLUMNS)
+
+
+def _build_cache(path: str, store: str, source_hash: str) -> None:
+    data = parse_raw(path)
+    categories = {}
+    arrays = {}
+    for column in COLUMNS:
+        if column in CATEGORICAL:
+            values = pd.Categorical(data[column])
+            categories[column] = [str(label) for label in values.categories]
+            arrays[column] = values.codes.astype(np.int16)
+        else:
+            arrays[column] = data[column].to_numpy(dtype=np.int64)
+
+    # Build next to the final location and rename, so concurrent loaders never see a partial store
+    tmp = f"{store}.tmp-{os.getpid()}"
+    with ColumnarWriter(tmp, overwrite=True, metadata={
+        "source_hash": source_hash, "version": CACHE_VERSION, "categories": categories
+    }) as writer:
+        writer.write_step(**arrays)
+    try:
+        os.rename(tmp, store)
+    except OSError:
+        shutil.rmtree(tmp, ignore_errors=True)  # another process finished first
+
+
+def load_adult(path: Optional[str] = None, cache_dir: Optional[str] = None) -> AdultTable:
+    """Load the cleaned Adult table, parsing the raw file only when no cache exists for its content."""
+    path = ensure_raw(path or DEFAULT_PATH)
+    source_hash = file_hash(path)
+    store = os.path.join(cache_dir or DEFAULT_CACHE_DIR, f"v{CACHE_VERSION}-{source_hash[:16]}")
+    if not os.path.exists(os.path.join(store, "manifest.json")):
+        os.makedirs(os.path.dirname(store), exist_ok=True)
+        _build_cache(path, store, source_hash)
+    reader = ColumnarReader(store)
+    return AdultTable({column: reader.column(column) for column in COLUMNS},
+                      reader.metadata["categories"], source_hash)
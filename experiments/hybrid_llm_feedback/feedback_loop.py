@@ -2,51 +2,69 @@
 
 """
 Simulates a feedback-driven policy optimization loop:
-1. Load UCI Adult dataset and generate agent profiles
+1. Load UCI Adult dataset (cached locally) and generate agent profiles
 2. Initialize a complex policy vector
 3. Feed it to agents and collect approval scores via LLM (Ollama)
 4. Form coalitions among agents based on similar interests
 5. Aggregate feedback by coalition
-6. Optimize the policy using gradient ascent
-7. Track and visualize coalition dynamics over time
-8. Save agent responses to CSV
+6. Optimize the policy with a derivative-free optimizer (optimizer.py) within a fixed LLM-call budget
+7. Track and visualize coalition dynamics and best-so-far score against LLM calls
+8. Save agent responses (with the evaluated policy vector) to a columnar store (flushed every step) and
+   export them to CSV
+
+FEEDBACK_OPTIMIZER selects "cem" (cross-entropy method, default), "spsa", or "adam" (the original gradient
+loop, which cannot move the policy since the LLM score has no gradient; kept for comparison). Each step the
+optimizer proposes a population of policies, all (policy, agent) pairs are scored concurrently
+(SIM_MAX_CONCURRENCY), and the run stops once FEEDBACK_CALL_BUDGET LLM calls have been spent.
+
+A surrogate model (surrogate.py) learns every agent's score from those responses as they arrive and reports
+its out-of-sample accuracy. With SURROGATE_CANDIDATES=N (cem only), the optimizer samples N candidates per
+step, the surrogate ranks them, and only the SURROGATE_TOP_K best (SURROGATE_EXPLORE of them chosen as the
+most uncertain instead) are sent to the LLM agents.
+
+Every completed agent call is journaled (storage/journal.py) with the policy it scored. RUN_ID=<id> resumes a
+crashed run: the optimizer is seeded from the run id, so it proposes the same policies again, and calls
+already in the journal are replayed instead of sent; the response store and CSV are rebuilt from them.
+Failed calls (no score) are not journaled and are left out of the fitness, the surrogate and the optimizer;
+they appear in the CSV with an empty score.
 """
 
 import numpy as np
 import pandas as pd
 import torch
-import torch.nn as nn
 import torch.optim as optim
 from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
 import sys
 import os
-sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+import zlib
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
 from agents.base_agent import Agent
+from agents.profiles import build_profiles
+from dataset.adult import load_adult
+from storage.columnar import ColumnarReader, ColumnarWriter
+from storage.journal import open_run
+from telemetry import metrics
+from optimizer import OPTIMIZERS, softmax
+from surrogate import POLICY_DIM, STATE_PATH, SurrogateModel, agent_features
 import matplotlib.pyplot as plt
-import csv
-import os
 
-# Load UCI Adult Dataset and prepare group stats
-url = "https://archive.ics.uci.edu/ml/machine-learning-databases/adult/adult.data"
-columns = [
-    "age", "workclass", "fnlwgt", "education", "education_num", "marital_status",
-    "occupation", "relationship", "race", "sex", "capital_gain", "capital_loss",
-    "hours_per_week", "native_country", "income"
-]
-data = pd.read_csv(url, header=None, names=columns, na_values=" ?", skipinitialspace=True)
-data.dropna(inplace=True)
+# Load UCI Adult Dataset (local cached copy, see dataset/adult.py) and prepare group stats
+adult = load_adult()
+data = adult.to_frame()
 
-# Encode categorical variables
-data["sex"] = pd.Categorical(data["sex"]).codes  # Male:1, Female:0
+# Optional stratified personas, e.g. FEEDBACK_PROFILES="sex,education,income,age,occupation"
+# (dimension names from agents/profiles.py); coalitions then form along the first dimension
+PROFILE_DIMENSIONS = [d.strip() for d in os.environ.get("FEEDBACK_PROFILES", "").split(",") if d.strip()]
 
 # Create agent groups based on real data
 agents = []
-group_definitions = {
-    "worker_female": data[data["sex"] == 0],
-    "worker_male": data[data["sex"] == 1],
+group_definitions = {} if PROFILE_DIMENSIONS else {
+    "worker_female": data[data["sex"] == "Female"],
+    "worker_male": data[data["sex"] == "Male"],
     "high_education": data[data["education_num"] > 12],
-    "low_income": data[data["income"] == " <=50K"],
-    "high_income": data[data["income"] == " >50K"]
+    "low_income": data[data["income"] == "<=50K"],
+    "high_income": data[data["income"] == ">50K"]
 }
 
 for name, group in group_definitions.items():
@@ -59,67 +77,183 @@ for name, group in group_definitions.items():
     }
     agents.append(Agent(name.capitalize(), name, avg_stats))
 
+if PROFILE_DIMENSIONS:
+    agents = build_profiles(adult, PROFILE_DIMENSIONS)
+    print(f"Built {len(agents)} stratified personas over {', '.join(PROFILE_DIMENSIONS)}")
+
 # Define a more complex policy vector with 5 dimensions:
 # [meritocracy, fairness, efficiency, age inclusion, loss recovery]
 initial_policy = [0.2, 0.2, 0.2, 0.2, 0.2]
-policy_vector = torch.tensor(initial_policy, dtype=torch.float32, requires_grad=True)
-optimizer = optim.Adam([policy_vector], lr=0.05)
 
-# Track coalition scores over time
+OPTIMIZER = os.environ.get("FEEDBACK_OPTIMIZER", "cem")
+POPULATION = int(os.environ.get("FEEDBACK_POPULATION", "8"))
+CALL_BUDGET = int(os.environ.get("FEEDBACK_CALL_BUDGET", 10 * POPULATION * len(agents)))
+MAX_CONCURRENCY = int(os.environ.get("SIM_MAX_CONCURRENCY", 8))
+journal = open_run("feedback_loop")
+SEED = int(os.environ.get("FEEDBACK_SEED", zlib.crc32(journal.run_id.encode("utf-8"))))
+rng = np.random.default_rng(SEED)
+if OPTIMIZER == "adam":
+    # Legacy mode: one policy per step for 10 steps (Fewer steps due to LLM latency)
+    policy_vector = torch.tensor(initial_policy, dtype=torch.float32, requires_grad=True)
+    optimizer = optim.Adam([policy_vector], lr=0.05)
+    CALL_BUDGET = min(CALL_BUDGET, 10 * len(agents))
+elif OPTIMIZER == "cem":
+    optimizer = OPTIMIZERS[OPTIMIZER](population=POPULATION, init_policy=np.array(initial_policy), seed=SEED)
+else:
+    optimizer = OPTIMIZERS[OPTIMIZER](init_policy=np.array(initial_policy), seed=SEED)
+
+# Surrogate pre-screening (off by default: every proposed policy is sent to the agents)
+SURROGATE_CANDIDATES = int(os.environ.get("SURROGATE_CANDIDATES", "0")) if OPTIMIZER == "cem" else 0
+SURROGATE_TOP_K = int(os.environ.get("SURROGATE_TOP_K", POPULATION))
+SURROGATE_EXPLORE = int(os.environ.get("SURROGATE_EXPLORE", "0"))
+SURROGATE_STATE = os.environ.get("SURROGATE_STATE", STATE_PATH)
+surrogate = SurrogateModel.load(SURROGATE_STATE)
+agent_stats = np.stack([agent_features(agent.group_stats) for agent in agents])
+
+
+def score_agent(step, index, agent, policy):
+    """
+    One agent's (score, text) for a policy, replayed from the journal when this exact call completed before.
+    The score is None if the call failed; failures are not journaled, so a resume retries them.
+    """
+    entry = journal.call(
+        "score", (step, index), agent.name,
+        lambda: dict(zip(("score", "explanation"), agent.llm_response(policy)), policy=[float(p) for p in policy]),
+        record_if=lambda entry: entry["score"] is not None,
+        valid=lambda entry: np.allclose(entry["policy"], policy, atol=1e-9),
+    )
+    return entry["score"], entry["explanation"]
+
+
+def score_population(step, policies):
+    """Score every (policy, agent) pair on a bounded thread pool; returns per-policy lists of (score, text)."""
+    pairs = [(i, agent) for i in range(len(policies)) for agent in agents]
+    with metrics.span("evaluation", mode="feedback"), \
+            ThreadPoolExecutor(max_workers=max(1, min(MAX_CONCURRENCY, len(pairs)))) as pool:
+        results = list(pool.map(lambda pair: score_agent(step, pair[0], pair[1], policies[pair[0]]), pairs))
+    return [results[i * len(agents):(i + 1) * len(agents)] for i in range(len(policies))]
+
+
+# Track coalition scores over time, and best-so-far coalition score against LLM calls spent
 score_history = defaultdict(list)
+convergence = []
+calls, best_score = 0, -np.inf
 
-# Prepare CSV file for logging responses
+# Prepare columnar store for logging responses; each step is flushed so a crash keeps completed steps
+store_path = "agent_responses"
 csv_path = "agent_responses.csv"
-with open(csv_path, mode="w", newline="") as csvfile:
-    writer = csv.writer(csvfile)
-    writer.writerow(["Step", "Agent", "Role", "Score", "Explanation"])
-
-    # Optimization loop
-    for step in range(10):  # Fewer steps due to LLM latency
-        optimizer.zero_grad()
+policy_types = {f"policy_{j}": "float64" for j in range(POLICY_DIM)}
+with ColumnarWriter(store_path, types={"Step": "int64", "Candidate": "int64", "Agent": "str", "Role": "str",
+                                       "Score": "float64", "Explanation": "str", **policy_types},
+                    overwrite=True) as writer:
 
-        # Normalize policy vector using softmax
-        normalized_policy = torch.softmax(policy_vector, dim=0)
-        np_policy = normalized_policy.detach().numpy()
+    # Optimization loop, until the next policy would exceed the LLM-call budget
+    step = 0
+    while calls + len(agents) <= CALL_BUDGET:
+        affordable = (CALL_BUDGET - calls) // len(agents)
+        if OPTIMIZER == "adam":
+            optimizer.zero_grad()
+            # Normalize policy vector using softmax
+            normalized_policy = torch.softmax(policy_vector, dim=0)
+            logits = policy_vector.detach().numpy()[None].astype(np.float64)
+        elif SURROGATE_CANDIDATES:
+            # Sample a large candidate set and let the surrogate pick which ones the agents see
+            logits = optimizer.ask(SURROGATE_CANDIDATES)
+            k = min(SURROGATE_TOP_K, affordable)
+            with metrics.span("surrogate_screen"):
+                chosen, _, _ = surrogate.screen(softmax(logits), agent_stats, k, min(SURROGATE_EXPLORE, k), rng=rng)
+            logits = logits[np.sort(chosen)]
+        else:
+            logits = optimizer.ask()
+        logits = logits[:affordable]
+        policies = softmax(logits)
+        print(f"\nStep {step+1}: evaluating {len(policies)} policies ({calls} LLM calls so far)")
 
         # Collect scores and justifications from agents
-        coalition_feedback = defaultdict(list)
-        print(f"\nStep {step+1}: Policy = {np_policy}")
-        for agent in agents:
-            score, explanation = agent.llm_response(np_policy)
-            print(f"{agent.name} ({agent.role}): {score:.2f} — {explanation}")
-            coalition_feedback[agent.role].append(score)
-
-            # Write to CSV
-            # Write to CSV with cleaned explanation (single line, no newlines)
-            cleaned_explanation = " ".join(explanation.strip().splitlines()).replace("\t", " ")
-            writer.writerow([step + 1, agent.name, agent.role, f"{score:.2f}", cleaned_explanation])
-
-
-        # Coalition average scores
-        coalition_scores = {role: np.mean(scores) for role, scores in coalition_feedback.items()}
-        for role, avg in coalition_scores.items():
+        fitness, best = [], None
+        for i, (policy, responses) in enumerate(zip(policies, score_population(step, policies))):
+            coalition_feedback = defaultdict(list)
+            step_scores, step_explanations = [], []
+            print(f"Policy {i} = {np.round(policy, 3)}")
+            for agent, (score, explanation) in zip(agents, responses):
+                print(f"{agent.name} ({agent.role}): {'failed' if score is None else f'{score:.2f}'} — {explanation}")
+                if score is not None:
+                    coalition_feedback[agent.role].append(score)
+
+                # Cleaned explanation (single line, no newlines)
+                step_scores.append(np.nan if score is None else score)
+                step_explanations.append(" ".join(explanation.strip().splitlines()).replace("\t", " "))
+
+            step_scores = np.array(step_scores)
+            writer.write_step(Step=step + 1, Candidate=i, Agent=[a.name for a in agents], Role=[a.role for a in agents],
+                              Score=np.round(step_scores, 2), Explanation=step_explanations,
+                              **{f"policy_{j}": float(policy[j]) for j in range(POLICY_DIM)})
+            scored = ~np.isnan(step_scores)
+            if scored.any():
+                surrogate.update(surrogate.features(policy, agent_stats)[0][scored], step_scores[scored])
+
+            # Reward: average of coalition scores (NaN if no agent produced a score)
+            coalition_scores = {role: np.mean(scores) for role, scores in coalition_feedback.items()}
+            fitness.append(np.mean(list(coalition_scores.values())) if coalition_scores else np.nan)
+            calls += len(agents)
+            if np.isnan(fitness[-1]):
+                continue
+            best_score = max(best_score, fitness[-1])
+            convergence.append((calls, best_score))
+            if best is None or fitness[-1] > fitness[best[0]]:
+                best = (i, coalition_scores)
+        writer.flush()
+
+        step += 1
+        fitness = np.array(fitness)
+        scored = ~np.isnan(fitness)
+        if best is None:
+            print(f"Step {step}: no policy received a score, nothing to learn from")
+            continue
+
+        # Coalition average scores (of the step's best policy)
+        for role, avg in best[1].items():
             print(f"Coalition '{role}' average score: {avg:.2f}")
             score_history[role].append(avg)
 
-        # Reward: weighted average of coalition scores
-        avg_score = np.mean(list(coalition_scores.values()))
-        loss = -torch.tensor(avg_score, requires_grad=True)
-        loss.backward()
-        optimizer.step()
+        if OPTIMIZER == "adam":
+            loss = -torch.tensor(fitness[0], requires_grad=True)
+            loss.backward()
+            optimizer.step()
+        else:
+            optimizer.tell(logits[scored], fitness[scored])
+
+        print(f"Step best coalition score: {fitness[scored].max():.2f}, best so far: {best_score:.2f} after {calls} LLM calls")
+
+journal.close()
+print(f"Journal: {journal.stats()}")
+
+# Export for existing CSV consumers
+ColumnarReader(store_path).to_csv(csv_path, float_format="%.2f")
+pd.DataFrame(convergence, columns=["llm_calls", "best_score"]).to_csv("convergence.csv", index=False)
+if OPTIMIZER != "adam":
+    print(f"\nBest policy ({OPTIMIZER}): {np.round(optimizer.best_policy, 3)}, coalition score {optimizer.best_score:.2f}")
 
-        print(f"Overall Average Coalition Score: {avg_score:.2f}")
+# Keep the surrogate's statistics for the next run and report how much it saved
+surrogate.save(SURROGATE_STATE)
+print(f"Surrogate: {surrogate.report()}")
 
-# Plot coalition score trends
-plt.figure(figsize=(10, 6))
+# Plot coalition score trends and best-so-far score against LLM calls
+fig, (ax_coalitions, ax_convergence) = plt.subplots(1, 2, figsize=(14, 6))
 for role, scores in score_history.items():
-    plt.plot(scores, label=role)
-plt.xlabel("Simulation Step")
-plt.ylabel("Average Coalition Score")
-plt.title("Coalition Dynamics Over Time")
-plt.legend()
-plt.grid(True)
+    ax_coalitions.plot(scores, label=role)
+ax_coalitions.set_xlabel("Simulation Step")
+ax_coalitions.set_ylabel("Average Coalition Score")
+ax_coalitions.set_title("Coalition Dynamics Over Time")
+ax_coalitions.legend()
+ax_coalitions.grid(True)
+if convergence:
+    ax_convergence.step(*zip(*convergence), where="post")
+ax_convergence.set_xlabel("LLM Calls")
+ax_convergence.set_ylabel("Best Coalition Score So Far")
+ax_convergence.set_title(f"Convergence ({OPTIMIZER})")
+ax_convergence.grid(True)
 plt.tight_layout()
 plt.show()
 
-print(f"\nAgent responses saved to: {csv_path}")
\ No newline at end of file
+print(f"\nAgent responses saved to: {store_path}/ and {csv_path}; convergence to convergence.csv")
\ No newline at end of file
@@ -0,0 +1,100 @@
+# hybrid_llm_feedback/optimizer.py
+
+"""
+Derivative-free policy optimizers for the LLM feedback loop.
+
+The coalition score is a black box (LLM agents reading a prompt), so there is no gradient to follow. Both
+optimizers search over unconstrained logits and map them onto the probability simplex with a softmax, and
+share an ask/tell interface: ask() proposes a population of logit vectors, the caller scores their softmax
+policies with the agents, and tell() updates the search distribution from those scores.
+
+- CrossEntropyOptimizer: samples a Gaussian population, refits mean/std to the top `elite_frac` of it.
+- SPSAOptimizer: evaluates one +/- random perturbation pair per step and moves along the estimated gradient.
+
+Both keep the best policy seen so far.
+"""
+
+import math
+from typing import Optional
+
+import numpy as np
+
+POLICY_DIM = 5
+
+
+def softmax(logits: np.ndarray) -> np.ndarray:
+    z = np.exp(logits - logits.max(axis=-1, keepdims=True))
+    return z / z.sum(axis=-1, keepdims=True)
+
+
+class _Optimizer:
+    def __init__(self, dim: int, init_policy: Optional[np.ndarray], seed: Optional[int]):
+        self.dim = dim
+        self.rng = np.random.default_rng(seed)
+        policy = np.full(dim, 1.0 / dim) if init_policy is None else np.asarray(init_policy, dtype=np.float64)
+        self.mean = np.log(np.clip(policy, 1e-6, None))
+        self.best_score = -math.inf
+        self.best_policy = softmax(self.mean)
+
+    def _track_best(self, logits: np.ndarray, scores: np.ndarray) -> None:
+        i = int(np.argmax(scores))
+        if scores[i] > self.best_score:
+            self.best_score, self.best_policy = float(scores[i]), softmax(logits[i])
+
+
+class CrossEntropyOptimizer(_Optimizer):
+    def __init__(self, dim: int = POLICY_DIM, population: int = 8, elite_frac: float = 0.25,
+                 init_policy: Optional[np.ndarray] = None, init_std: float = 1.0, min_std: float = 0.05,
+                 smoothing: float = 0.7, seed: Optional[int] = None):
+        super().__init__(dim, init_policy, seed)
+        self.population = population
+        self.elite_frac = elite_frac
+        self.std = np.full(dim, init_std)
+        self.min_std = min_std
+        self.smoothing = smoothing
+
+    def ask(self, n: Optional[int] = None) -> np.ndarray:
+        """Sample `n` (default: population) logit vectors; the first is always the current mean."""
+        logits = self.mean + self.std * self.rng.standard_normal((n or self.population, self.dim))
+        logits[0] = self.mean
+        return logits
+
+    def tell(self, logits: np.ndarray, scores: np.ndarray) -> None:
+        scores = np.asarray(scores, dtype=np.float64)
+        self._track_best(logits, scores)
+        n_elite = max(1, int(round(len(scores) * self.elite_frac)))
+        elite = logits[np.argsort(-scores, kind="stable")[:n_elite]]
+        # Smoothed refit keeps the distribution from collapsing on a few noisy LLM scores
+        self.mean = self.smoothing * elite.mean(axis=0) + (1 - self.smoothing) * self.mean
+        std = elite.std(axis=0) if n_elite > 1 else self.std / 2
+        self.std = np.maximum(self.smoothing * std + (1 - self.smoothing) * self.std, self.min_std)
+
+
+class SPSAOptimizer(_Optimizer):
+    population = 2
+
+    def __init__(self, dim: int = POLICY_DIM, init_policy: Optional[np.ndarray] = None, a: float = 0.1,
+                 c: float = 0.5, alpha: float = 0.602, gamma: float = 0.101, seed: Optional[int] = None):
+        """Standard SPSA gain sequences a_k = a / (k + 1)^alpha, c_k = c / (k + 1)^gamma."""
+        super().__init__(dim, init_policy, seed)
+        self.a, self.c, self.alpha, self.gamma = a, c, alpha, gamma
+        self.k = 0
+        self._delta = None
+
+    def ask(self, n: Optional[int] = None) -> np.ndarray:
+        c_k = self.c / (self.k + 1) ** self.gamma
+        self._delta = self.rng.choice([-1.0, 1.0], size=self.dim)
+        return np.stack([self.mean + c_k * self._delta, self.mean - c_k * self._delta])
+
+    def tell(self, logits: np.ndarray, scores: np.ndarray) -> None:
+        scores = np.asarray(scores, dtype=np.float64)
+        self._track_best(logits, scores)
+        if len(scores) == 2:
+            a_k = self.a / (self.k + 1) ** self.alpha
+            c_k = self.c / (self.k + 1) ** self.gamma
+            gradient = (scores[0] - scores[1]) / (2 * c_k) * self._delta
+            self.mean = self.mean + a_k * gradient
+        self.k += 1
+
+
+OPTIMIZERS = {"cem": CrossEntropyOptimizer, "spsa": SPSAOptimizer}
@@ -0,0 +1,205 @@
+# hybrid_llm_feedback/surrogate.py
+
+"""
+Surrogate satisfaction model used to pre-screen policies before asking the LLM agents.
+
+Each (agent, policy) pair is described by a feature vector: a bias, the 5-d policy vector, the agent's
+normalized group stats, their pairwise products (how much each group characteristic interacts with each
+policy weight), and optionally a text embedding of the policy statement. A Bayesian ridge regression on
+those features predicts the agent's 0-10 score with an uncertainty estimate.
+
+The model is kept as sufficient statistics (X'X, X'y, y'y, n), so every batch of new LLM scores is folded
+in with a rank-k update and no training data has to be kept. Predictions are logged before each update,
+which gives a running out-of-sample accuracy. screen() ranks a large candidate set by predicted coalition
+score and picks the top-k (plus the most uncertain) candidates to send to the real agents, counting the
+LLM calls it saved.
+"""
+
+import math
+import os
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+POLICY_DIM = 5
+STAT_KEYS = ("education", "income", "hours", "age", "loss")
+STATE_PATH = "surrogate_state.npz"
+
+
+def agent_features(stats: Dict) -> np.ndarray:
+    """Group stats scaled to roughly unit range (log scale for the heavy-tailed money columns)."""
+    return np.array([
+        stats["education"] / 16.0,
+        math.log1p(max(stats["income"], 0.0)) / math.log1p(1e5),
+        stats["hours"] / 100.0,
+        stats["age"] / 100.0,
+        math.log1p(max(stats["loss"], 0.0)) / math.log1p(1e4),
+    ])
+
+
+class SurrogateModel:
+    def __init__(self, embedding_dim: int = 0, alpha: float = 1.0, min_observations: int = 20):
+        """`alpha` is the ridge penalty; screening falls back to random order until `min_observations`."""
+        self.embedding_dim = embedding_dim
+        self.alpha = alpha
+        self.min_observations = min_observations
+        self.dim = 1 + POLICY_DIM + len(STAT_KEYS) + POLICY_DIM * len(STAT_KEYS) + embedding_dim
+        self.xtx = np.zeros((self.dim, self.dim))
+        self.xty = np.zeros(self.dim)
+        self.yty = 0.0
+        self.n = 0
+        self._weights = None
+        self._covariance = None
+        # Out-of-sample (predicted before update) errors and screening savings
+        self.errors: List[float] = []
+        self.pairs: List[Tuple[float, float]] = []
+        self.calls_saved = 0
+        self.calls_made = 0
+
+    # -- features -----------------------------------------------------------------------------------
+
+    def features(self, policies: np.ndarray, agent_stats: np.ndarray, embeddings: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Feature rows for every (policy, agent) pair: policies (m, 5) x agent_stats (a, 5) -> (m, a, dim).
+        `embeddings` (m, embedding_dim) describes each policy's text, if the model uses one.
+        """
+        policies = np.atleast_2d(policies)
+        agent_stats = np.atleast_2d(agent_stats)
+        m, a = len(policies), len(agent_stats)
+        parts = [
+            np.ones((m, a, 1)),
+            np.broadcast_to(policies[:, None, :], (m, a, POLICY_DIM)),
+            np.broadcast_to(agent_stats[None, :, :], (m, a, len(STAT_KEYS))),
+            np.einsum("mp,as->masp", policies, agent_stats).reshape(m, a, -1),
+        ]
+        if self.embedding_dim:
+            parts.append(np.broadcast_to(np.atleast_2d(embeddings)[:, None, :], (m, a, self.embedding_dim)))
+        return np.concatenate(parts, axis=2)
+
+    def paired_features(self, policies: np.ndarray, agent_stats: np.ndarray,
+                        embeddings: Optional[np.ndarray] = None) -> np.ndarray:
+        """Feature rows for aligned pairs: row i pairs policies[i] with agent_stats[i] -> (n, dim)."""
+        policies = np.atleast_2d(policies)
+        agent_stats = np.atleast_2d(agent_stats)
+        n = len(policies)
+        parts = [np.ones((n, 1)), policies, agent_stats, np.einsum("np,ns->nsp", policies, agent_stats).reshape(n, -1)]
+        if self.embedding_dim:
+            parts.append(np.atleast_2d(embeddings))
+        return np.concatenate(parts, axis=1)
+
+    # -- fitting ------------------------------------------------------------------------------------
+
+    def _solve(self) -> None:
+        precision = self.xtx + self.alpha * np.eye(self.dim)
+        self._covariance = np.linalg.inv(precision)
+        self._weights = self._covariance @ self.xty
+
+    @property
+    def noise_variance(self) -> float:
+        """Residual variance from the sufficient statistics (sum of squared errors / residual dof)."""
+        if self._weights is None or self.n == 0:
+            return 1.0
+        w = self._weights
+        sse = self.yty - 2 * w @ self.xty + w @ self.xtx @ w
+        return max(sse / max(1, self.n - self.dim), 1e-6)
+
+    def update(self, X: np.ndarray, y: np.ndarray) -> None:
+        """Fold new (features, score) rows into the model, recording how well they were predicted first."""
+        X = np.asarray(X, dtype=np.float64).reshape(-1, self.dim)
+        y = np.asarray(y, dtype=np.float64).ravel()
+        if self.n >= self.min_observations:
+            predicted, _ = self.predict(X)
+            self.errors.extend((predicted - y).tolist())
+            self.pairs.extend(zip(predicted.tolist(), y.tolist()))
+        self.xtx += X.T @ X
+        self.xty += X.T @ y
+        self.yty += float(y @ y)
+        self.n += len(y)
+        self._solve()
+
+    def predict(self, X: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Predictive mean and standard deviation for feature rows of shape (..., dim)."""
+        if self._weights is None:
+            self._solve()
+        shape = X.shape[:-1]
+        X = X.reshape(-1, self.dim)
+        mean = X @ self._weights
+        variance = self.noise_variance * (1 + np.einsum("nd,de,ne->n", X, self._covariance, X))
+        return mean.reshape(shape), np.sqrt(variance).reshape(shape)
+
+    # -- screening ----------------------------------------------------------------------------------
+
+    def screen(self, policies: np.ndarray, agent_stats: np.ndarray, k: int, explore: int = 0,
+               embeddings: Optional[np.ndarray] = None, rng: Optional[np.random.Generator] = None):
+        """
+        Pick which of `policies` (m, 5) to evaluate with the real agents: the `k - explore` best by predicted
+        coalition (mean over agents) score, plus the `explore` most uncertain of the rest. Returns
+        (chosen indices, predicted coalition means, their standard deviations).
+        """
+        policies = np.atleast_2d(policies)
+        m, a = len(policies), len(np.atleast_2d(agent_stats))
+        k = min(k, m)
+        # The coalition mean is linear in the features, so predict it from the agent-averaged features
+        averaged = self.features(policies, agent_stats, embeddings).mean(axis=1)
+        if self.n < self.min_observations:
+            rng = rng or np.random.default_rng()
+            chosen = rng.choice(m, size=k, replace=False)
+            mean, std = np.zeros(m), np.full(m, np.inf)
+        else:
+            mean, std = self.predict(averaged)
+            order = np.argsort(-mean, kind="stable")
+            best = order[:k - explore]
+            rest = np.setdiff1d(np.arange(m), best)
+            uncertain = rest[np.argsort(-std[rest], kind="stable")[:explore]]
+            chosen = np.concatenate([best, uncertain])
+        self.calls_made += k * a
+        self.calls_saved += (m - k) * a
+        return chosen, mean, std
+
+    # -- reporting and persistence ------------------------------------------------------------------
+
+    def report(self) -> Dict:
+        errors = np.asarray(self.errors)
+        report = {"observations": self.n, "llm_calls_made": self.calls_made, "llm_calls_saved": self.calls_saved}
+        if len(errors):
+            predicted, actual = np.asarray(self.pairs).T
+            report.update({
+                "mae": float(np.abs(errors).mean()),
+                "rmse": float(np.sqrt((errors ** 2).mean())),
+                "correlation": float(np.corrcoef(predicted, actual)[0, 1]) if len(errors) > 1 and actual.std() > 0 else None,
+                "evaluated_out_of_sample": len(errors),
+            })
+        return report
+
+    def save(self, path: str = STATE_PATH) -> None:
+        np.savez(path, xtx=self.xtx, xty=self.xty, yty=self.yty, n=self.n,
+                 alpha=self.alpha, embedding_dim=self.embedding_dim)
+
+    @classmethod
+    def load(cls, path: str = STATE_PATH, **kwargs) -> "SurrogateModel":
+        """Restore a saved model, or start a fresh one when `path` does not exist."""
+        if not os.path.exists(path):
+            return cls(**kwargs)
+        state = np.load(path)
+        model = cls(int(state["embedding_dim"]), float(state["alpha"]), **kwargs)
+        model.xtx, model.xty, model.yty, model.n = state["xtx"], state["xty"], float(state["yty"]), int(state["n"])
+        model._solve()
+        return model
+
+
+def fit_log(model: SurrogateModel, log: Dict[str, np.ndarray], stats_by_agent: Dict[str, Dict]) -> SurrogateModel:
+    """
+    Train on logged responses: `log` holds "Agent", "Score" and "policy_0".."policy_4" columns (e.g.
+    ColumnarReader("agent_responses").to_pandas() or the exported CSV). Rows for agents missing from
+    `stats_by_agent` (name -> group_stats) and rows without a finite score (failed LLM calls are logged
+    as NaN) are skipped.
+    """
+    names = np.asarray(log["Agent"])
+    scores = np.asarray(log["Score"], dtype=np.float64)
+    keep = np.array([name in stats_by_agent for name in names], dtype=bool) & np.isfinite(scores)
+    if not keep.any():
+        return model
+    policies = np.stack([np.asarray(log[f"policy_{j}"], dtype=np.float64) for j in range(POLICY_DIM)], axis=1)[keep]
+    stats = np.stack([agent_features(stats_by_agent[name]) for name in names[keep]])
+    model.update(model.paired_features(policies, stats), scores[keep])
+    return model
@@ -0,0 +1,63 @@
+# experiments/marl_voting/benchmark_society.py
+"""
+Benchmarks one simulation round (vote, tally, evaluate, learn) of the per-agent LearningAgent loop
+against the tensorized Society.
+
+The per-agent loop is timed on at most LOOP_MAX_AGENTS agents and extrapolated linearly beyond that,
+since building a million per-agent optimizers alone takes minutes and several GB of memory.
+
+Usage: python benchmark_society.py [N ...]    (default: 5 10000 1000000)
+"""
+
+import sys
+import time
+import torch
+
+from agent_groups import get_agent_groups
+from marl_voting import LearningAgent, generate_policy_candidates, tally_votes
+from society import Society, tally
+
+SIZES = [5, 10_000, 1_000_000]
+CANDIDATES_PER_ROUND = 5
+ROUNDS = 3
+LOOP_MAX_AGENTS = 10_000
+
+
+def loop_round(agents, proposals):
+    votes = [agent.vote(proposals) for agent in agents]
+    winning_policy = proposals[tally_votes(votes)]
+    for agent in agents:
+        agent.learn_from_reward(agent.evaluate(winning_policy), winning_policy)
+
+
+def society_round(society, proposals):
+    votes = society.vote(proposals)
+    winning_policy = proposals[tally(votes, len(proposals))]
+    society.learn_from_reward(society.evaluate(winning_policy), winning_policy)
+
+
+def time_rounds(run_round, state):
+    proposals = [generate_policy_candidates(CANDIDATES_PER_ROUND) for _ in range(ROUNDS + 1)]
+    run_round(state, proposals[0])  # warm-up
+    start = time.perf_counter()
+    for candidates in proposals[1:]:
+        run_round(state, candidates)
+    return (time.perf_counter() - start) / ROUNDS
+
+
+if __name__ == "__main__":
+    sizes = [int(n) for n in sys.argv[1:]] or SIZES
+    templates = [agent.group_stats for agent in get_agent_groups()]
+    print(f"{'agents':>10} {'loop s/round':>14} {'society s/round':>16} {'speedup':>9}")
+    for n in sizes:
+        loop_n = min(n, LOOP_MAX_AGENTS)
+        agents = [LearningAgent(f"agent_{i}", templates[i % len(templates)]) for i in range(loop_n)]
+        loop_time = time_rounds(loop_round, agents) * n / loop_n
+        del agents
+
+        society = Society.sample(n, templates)
+        society_time = time_rounds(lambda s, p: society_round(s, torch.stack(p)), society)
+        del society
+
+        note = " (loop extrapolated)" if loop_n < n else ""
+        print(f"{n:>10} {loop_time:>14.4f} {society_time:>16.4f} {loop_time / society_time:>8.0f}x{note}")
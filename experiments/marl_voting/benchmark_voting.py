@@ -0,0 +1,60 @@
+# experiments/marl_voting/benchmark_voting.py
+"""
+Benchmarks every rule in voting.RULES on a large voter x candidate score matrix (default 1M x 1k float32,
+about 4 GB) held in a disk-backed np.memmap, so only one chunk of voters is in memory at a time.
+
+Copeland builds the K x K pairwise-majority matrix, which costs O(N*K^2); it is timed on the first
+COPELAND_VOTERS voters and extrapolated linearly to N (the cost is exactly linear in N).
+
+Usage: python benchmark_voting.py [N K]
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from voting import RULES, rank_ballots
+
+NUM_VOTERS = 1_000_000
+NUM_CANDIDATES = 1_000
+COPELAND_VOTERS = 2_000
+
+
+def build_scores(path, num_voters, num_candidates, chunk_size=65536, seed=0):
+    rng = np.random.default_rng(seed)
+    scores = np.lib.format.open_memmap(path, mode="w+", dtype=np.float32, shape=(num_voters, num_candidates))
+    for start in range(0, num_voters, chunk_size):
+        rows = min(chunk_size, num_voters - start)
+        scores[start:start + rows] = rng.random((rows, num_candidates), dtype=np.float32)
+    scores.flush()
+    return scores
+
+
+if __name__ == "__main__":
+    num_voters, num_candidates = (int(x) for x in sys.argv[1:3]) if len(sys.argv) > 2 else (NUM_VOTERS, NUM_CANDIDATES)
+    with tempfile.TemporaryDirectory() as workdir:
+        start = time.perf_counter()
+        scores = build_scores(os.path.join(workdir, "scores.npy"), num_voters, num_candidates)
+        print(f"Built {num_voters} x {num_candidates} score memmap in {time.perf_counter() - start:.1f}s")
+
+        print(f"{'rule':>15} {'winner':>7} {'seconds':>9}")
+        for name, rule in RULES.items():
+            start = time.perf_counter()
+            if name == "copeland" and num_voters > COPELAND_VOTERS:
+                winner = rule(scores[:COPELAND_VOTERS])
+                elapsed = (time.perf_counter() - start) * num_voters / COPELAND_VOTERS
+                note = f" (extrapolated from {COPELAND_VOTERS} voters; winner is for that subset)"
+            elif name == "instant_runoff":
+                ballots = np.lib.format.open_memmap(os.path.join(workdir, "ballots.npy"), mode="w+",
+                                                    dtype=np.int16, shape=scores.shape)
+                winner = rule(scores, ballots=rank_ballots(scores, out=ballots))
+                elapsed, note = time.perf_counter() - start, " (including ballot ranking)"
+                del ballots
+            else:
+                winner = rule(scores)
+                elapsed, note = time.perf_counter() - start, ""
+            print(f"{name:>15} {winner:>7} {elapsed:>9.2f}{note}")
+        del scores
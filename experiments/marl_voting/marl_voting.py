@@ -62,7 +62,8 @@ def generate_policy_candidates(n=5):
     return [torch.softmax(torch.rand(POLICY_DIM), dim=0) for _ in range(n)]
 
 def tally_votes(votes):
-    return max(set(votes), key=votes.count)
+    # Plurality winner; ties go to the lowest candidate index (see voting.py for other rules)
+    return int(np.bincount(votes).argmax())
 
 # Next steps:
 # - Create real agents using UCI stats
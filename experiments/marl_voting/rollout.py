@@ -0,0 +1,108 @@
+# experiments/marl_voting/rollout.py
+"""
+Parallel rollout runner for the MARL voting simulation.
+
+Runs simulate.run_simulation for every combination of seed x rounds x candidates per round x learning rate
+x voting rule on a process pool. Each worker pins torch to a fixed number of intra-op threads (1 by default)
+so that independent runs scale across cores instead of oversubscribing them. Runs are seeded from their seed value
+alone, so a configuration reproduces regardless of worker count or completion order, and different
+configurations with the same seed share their random proposal stream.
+
+Results are streamed to disk as runs complete:
+- results/rollouts/            columnar store with every step/agent row, prefixed with the run's configuration
+                               (exported to results/rollouts.csv once all runs are done)
+- results/rollout_summary.csv  one row per run (mean reward, final-round reward, reward std across agents)
+
+Usage: python rollout.py --seeds 100 --rounds 20 50 --candidates 5 10 --lr 0.01 0.05 --rules plurality borda --workers 8
+"""
+
+import argparse
+import itertools
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+import pandas as pd
+import torch
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+from simulate import CANDIDATES_PER_ROUND, LEARNING_RATE, NUM_ROUNDS, VOTING_RULE, simulate_steps
+from storage.columnar import ColumnarReader, ColumnarWriter
+from voting import RULES
+
+RESULTS_DIR = "results"
+CONFIG_COLUMNS = ["run", "seed", "num_rounds", "candidates_per_round", "lr", "rule"]
+
+
+def config_grid(seeds, rounds, candidates, lrs, rules=(VOTING_RULE,)):
+    """Expand the parameter lists into run configurations, numbered in a stable order."""
+    return [
+        {"run": run, "seed": seed, "num_rounds": r, "candidates_per_round": c, "lr": lr, "rule": rule}
+        for run, (r, c, lr, rule, seed) in enumerate(itertools.product(rounds, candidates, lrs, rules, seeds))
+    ]
+
+
+def _init_worker(num_threads):
+    torch.set_num_threads(num_threads)
+
+
+def run_config(config):
+    """Run one configuration and return its steps, each prefixed with the configuration columns."""
+    steps = simulate_steps(config["num_rounds"], config["candidates_per_round"], config["lr"],
+                           seed=config["seed"], rule=config["rule"])
+    return [{**{column: config[column] for column in CONFIG_COLUMNS}, **step} for step in steps]
+
+
+def summarize(steps):
+    rewards = np.stack([step["reward"] for step in steps])  # (rounds, agents)
+    row = {column: steps[0][column] for column in CONFIG_COLUMNS}
+    row.update({
+        "mean_reward": rewards.mean(),
+        "final_reward": rewards[-1].mean(),
+        "reward_std": rewards.std(axis=1, ddof=1).mean() if rewards.shape[1] > 1 else 0.0,
+    })
+    return row
+
+
+def run_rollouts(configs, workers=None, threads_per_worker=1, results_dir=RESULTS_DIR):
+    """Run every configuration on a process pool, appending results to disk as each run finishes."""
+    os.makedirs(results_dir, exist_ok=True)
+    store_path = os.path.join(results_dir, "rollouts")
+    summary_path = os.path.join(results_dir, "rollout_summary.csv")
+    if os.path.exists(summary_path):
+        os.remove(summary_path)
+
+    workers = workers or os.cpu_count()
+    start = time.perf_counter()
+    with ColumnarWriter(store_path, overwrite=True) as writer, \
+            ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(threads_per_worker,)) as pool:
+        futures = [pool.submit(run_config, config) for config in configs]
+        for done, future in enumerate(as_completed(futures), 1):
+            steps = future.result()
+            for step in steps:
+                writer.write_step(**step)
+            pd.DataFrame([summarize(steps)]).to_csv(summary_path, mode="a", header=done == 1, index=False)
+    elapsed = time.perf_counter() - start
+    rows_path = ColumnarReader(store_path).to_csv(os.path.join(results_dir, "rollouts.csv"))
+
+    print(f"✅ {len(configs)} runs on {workers} workers in {elapsed:.1f}s ({len(configs) / elapsed:.1f} runs/s)")
+    print(f"   Rows saved to {store_path}/ and {rows_path}, per-run summary to {summary_path}")
+    return summary_path
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run MARL voting simulations across seeds and configurations.")
+    parser.add_argument("--seeds", type=int, default=10, help="number of seeds per configuration")
+    parser.add_argument("--seed-offset", type=int, default=0)
+    parser.add_argument("--rounds", type=int, nargs="+", default=[NUM_ROUNDS])
+    parser.add_argument("--candidates", type=int, nargs="+", default=[CANDIDATES_PER_ROUND])
+    parser.add_argument("--lr", type=float, nargs="+", default=[LEARNING_RATE])
+    parser.add_argument("--rules", nargs="+", default=[VOTING_RULE], choices=sorted(RULES))
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: all cores)")
+    parser.add_argument("--threads-per-worker", type=int, default=1)
+    args = parser.parse_args()
+
+    seeds = range(args.seed_offset, args.seed_offset + args.seeds)
+    run_rollouts(config_grid(seeds, args.rounds, args.candidates, args.lr, args.rules), args.workers, args.threads_per_worker)
@@ -1,45 +1,70 @@
 # experiments/marl_voting/simulate.py
 
 from agent_groups import get_agent_groups
-from marl_voting import generate_policy_candidates, tally_votes
+from marl_voting import generate_policy_candidates
+from society import Society
+from voting import RULES
 import torch
 import pandas as pd
 import os
+import sys
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+from storage.columnar import ColumnarReader, ColumnarWriter
+from telemetry import metrics
 
 NUM_ROUNDS = 20
 CANDIDATES_PER_ROUND = 5
 POLICY_DIM = 5
+LEARNING_RATE = 0.01
+VOTING_RULE = "plurality"
+
 
-# Create results directory if needed
-os.makedirs("results", exist_ok=True)
+def simulate_steps(num_rounds=NUM_ROUNDS, candidates_per_round=CANDIDATES_PER_ROUND, lr=LEARNING_RATE, seed=None,
+                   rule=VOTING_RULE):
+    """
+    Run one society for `num_rounds`, yielding each step's log as whole-step column arrays.
+    `rule` names the voting rule in voting.RULES used to pick each round's winner; `vote_index` is
+    always the agent's first choice.
+    """
+    if seed is not None:
+        torch.manual_seed(seed)
 
-agents = get_agent_groups()
-log = []
+    # All agents vote, evaluate and learn as one batched Society
+    society = Society.from_agents(get_agent_groups(), lr=lr)
 
-for step in range(NUM_ROUNDS):
-    proposals = generate_policy_candidates(CANDIDATES_PER_ROUND)
-    votes = [agent.vote(proposals) for agent in agents]
-    winning_index = tally_votes(votes)
-    winning_policy = proposals[winning_index]
+    for step in range(num_rounds):
+        with metrics.span("marl_round", rule=rule):
+            proposals = torch.stack(generate_policy_candidates(candidates_per_round))
+            preferences = society.preferences(proposals)
+            votes = preferences.argmax(dim=1)
+            winning_index = RULES[rule](preferences.numpy())
+            winning_policy = proposals[winning_index]
 
-    for i, agent in enumerate(agents):
-        reward = agent.evaluate(winning_policy)
-        agent.learn_from_reward(reward, winning_policy)
+            rewards = society.evaluate(winning_policy)
+            society.learn_from_reward(rewards, winning_policy)
 
-        log_entry = {
+            # Log normalized policy vector values
+            normalized = society.normalized_policies().numpy()
+        yield {
             "step": step,
-            "agent": agent.name,
-            "reward": reward,
-            "vote_index": votes[i],
-            "winning_index": winning_index
+            "agent": society.names,
+            "reward": rewards.numpy(),
+            "vote_index": votes.numpy(),
+            "winning_index": winning_index,
+            **{f"policy_{j}": normalized[:, j] for j in range(POLICY_DIM)},
         }
-        # Log normalized policy vector values
-        normalized_vector = torch.softmax(agent.policy_vector.detach(), dim=0).numpy()
-        for j in range(POLICY_DIM):
-            log_entry[f"policy_{j}"] = normalized_vector[j]
 
-        log.append(log_entry)
 
-# Save log
-pd.DataFrame(log).to_csv("results/scores.csv", index=False)
-print("✅ Simulation complete. Results saved to results/scores.csv")
+def run_simulation(*args, **kwargs):
+    """Same as simulate_steps, collected into a single per-step, per-agent DataFrame."""
+    return pd.concat([pd.DataFrame(step) for step in simulate_steps(*args, **kwargs)], ignore_index=True)
+
+
+if __name__ == "__main__":
+    # Stream steps into a columnar store (results/scores/) and keep the CSV export for existing analysis
+    with ColumnarWriter("results/scores", overwrite=True) as writer:
+        for step in simulate_steps():
+            writer.write_step(**step)
+    ColumnarReader("results/scores").to_csv("results/scores.csv")
+    print("✅ Simulation complete. Results saved to results/scores/ and results/scores.csv")
@@ -0,0 +1,94 @@
+# experiments/marl_voting/society.py
+"""
+Tensorized society for the MARL voting simulation.
+
+Holds every agent's preference vector as one (N, 5) parameter matrix and the group stats as an (N, k)
+feature tensor, so a round is a handful of batched kernels instead of a Python loop over agents:
+- vote:     cosine similarity of all agents to all candidates as one normalized matmul, then argmax
+- evaluate: the heuristic satisfaction score of LearningAgent.evaluate as one matrix-vector product
+- learn:    the REINFORCE-like update of LearningAgent.learn_from_reward as a single Adam step
+
+Adam is elementwise and each agent's loss only touches its own row, so one optimizer over the matrix
+takes exactly the same steps as N per-agent optimizers.
+"""
+
+import torch
+import torch.nn as nn
+import torch.nn.functional as F
+import torch.optim as optim
+
+from marl_voting import POLICY_DIM
+
+# Order of the per-agent features; must match the policy dimensions they are weighted by
+GROUP_FEATURES = ("education", "low_income", "hours", "age_inclusion", "loss")
+
+
+def group_features(group_stats_list):
+    """Map raw group stats dicts to the (N, 5) feature matrix used by LearningAgent.evaluate."""
+    return torch.tensor([
+        [
+            stats["education"],
+            1.0 if stats["income"] < 50000 else 0.0,
+            stats["hours"],
+            1 - abs(stats["age"] - 40) / 40,
+            stats["loss"],
+        ]
+        for stats in group_stats_list
+    ], dtype=torch.float32)
+
+
+class Society:
+    def __init__(self, features, names=None, lr=0.01, policy_vectors=None, generator=None):
+        self.features = features
+        self.names = list(names) if names is not None else [f"agent_{i}" for i in range(len(features))]
+        if policy_vectors is None:
+            policy_vectors = torch.rand(len(features), POLICY_DIM, generator=generator)
+        self.policy_vectors = nn.Parameter(policy_vectors.clone())
+        self.optimizer = optim.Adam([self.policy_vectors], lr=lr)
+
+    @classmethod
+    def from_agents(cls, agents, lr=0.01):
+        """Build a society with the same stats and initial preferences as a list of LearningAgents."""
+        vectors = torch.stack([agent.policy_vector.detach() for agent in agents])
+        features = group_features([agent.group_stats for agent in agents])
+        return cls(features, [agent.name for agent in agents], lr=lr, policy_vectors=vectors)
+
+    @classmethod
+    def sample(cls, n, templates, lr=0.01, noise=0.1, generator=None):
+        """Build n agents by drawing from template group stats with multiplicative noise (for large societies)."""
+        base = group_features(templates)
+        idx = torch.randint(len(templates), (n,), generator=generator)
+        jitter = 1 + noise * torch.randn(n, base.shape[1], generator=generator)
+        return cls(base[idx] * jitter, lr=lr, generator=generator)
+
+    def __len__(self):
+        return self.features.shape[0]
+
+    def preferences(self, candidates):
+        """Cosine similarity of every agent to every candidate, shape (N, K); input for voting.RULES."""
+        with torch.no_grad():
+            return F.normalize(self.policy_vectors, dim=1) @ F.normalize(candidates, dim=1).T
+
+    def vote(self, candidates):
+        """Return each agent's chosen candidate index, shape (N,)."""
+        return self.preferences(candidates).argmax(dim=1)
+
+    def evaluate(self, global_policy):
+        """Heuristic satisfaction of every agent with the policy, shape (N,)."""
+        with torch.no_grad():
+            return self.features @ global_policy.detach() / 100.0
+
+    def learn_from_reward(self, rewards, selected_policy):
+        self.optimizer.zero_grad()
+        similarity = F.cosine_similarity(self.policy_vectors, selected_policy.unsqueeze(0), dim=1)
+        loss = -(rewards * similarity).sum()  # Encourage alignment with rewarding policy
+        loss.backward()
+        self.optimizer.step()
+
+    def normalized_policies(self):
+        return torch.softmax(self.policy_vectors.detach(), dim=1)
+
+
+def tally(votes, num_candidates):
+    """Plurality winner of a vote tensor; ties go to the lowest candidate index."""
+    return int(torch.bincount(votes, minlength=num_candidates).argmax())
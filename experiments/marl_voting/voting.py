@@ -0,0 +1,180 @@
+# experiments/marl_voting/voting.py
+"""
+Vectorized voting rules over N x K voter-by-candidate score matrices (higher = more preferred),
+e.g. the cosine similarities between agent preferences and policy proposals.
+
+Every rule streams over the voters in chunks of CHUNK_SIZE rows, so `scores` can be an np.memmap larger
+than memory. Ties are broken deterministically in favour of the lowest candidate index, both for the
+winner and (inversely) when choosing whom to eliminate in instant-runoff.
+
+Costs for N voters and K candidates:
+- plurality, approval:  O(N*K)
+- borda:                O(N*K log K)  one argsort per voter
+- instant_runoff:       O(N*K log K)  to rank ballots, then O(N) per elimination round
+- copeland:             O(N*K^2)      pairwise majority matrix; dominates for large K
+"""
+
+import numpy as np
+
+CHUNK_SIZE = 65536
+
+
+def _chunks(scores, chunk_size, max_elements=None):
+    """Yield consecutive row blocks of `scores`, optionally capped so rows * K <= max_elements."""
+    if max_elements:
+        chunk_size = max(1, min(chunk_size, max_elements // max(1, scores.shape[1])))
+    for start in range(0, scores.shape[0], chunk_size):
+        yield start, np.asarray(scores[start:start + chunk_size])
+
+
+def _ranked(chunk):
+    """
+    Row-wise candidate order from most to least preferred, ties in index order. Uses the fast unstable
+    sort and re-sorts with a stable sort only the rows that actually contain tied scores.
+    """
+    keys = -chunk
+    order = np.argsort(keys, axis=1)
+    ordered = np.take_along_axis(keys, order, axis=1)
+    tied = np.flatnonzero((ordered[:, 1:] == ordered[:, :-1]).any(axis=1))
+    if len(tied):
+        order[tied] = np.argsort(keys[tied], axis=1, kind="stable")
+    return order
+
+
+def _winner(totals):
+    # np.argmax returns the first maximum, i.e. the lowest candidate index among ties
+    return int(np.argmax(totals))
+
+
+def plurality_counts(scores, chunk_size=CHUNK_SIZE):
+    """First-choice counts per candidate."""
+    counts = np.zeros(scores.shape[1], dtype=np.int64)
+    for _, chunk in _chunks(scores, chunk_size):
+        counts += np.bincount(chunk.argmax(axis=1), minlength=scores.shape[1])
+    return counts
+
+
+def plurality(scores, chunk_size=CHUNK_SIZE):
+    return _winner(plurality_counts(scores, chunk_size))
+
+
+def borda_scores(scores, chunk_size=CHUNK_SIZE):
+    """Borda points per candidate: K-1 for a voter's first choice down to 0 for the last."""
+    num_candidates = scores.shape[1]
+    points = np.zeros(num_candidates, dtype=np.int64)
+    positions = np.arange(num_candidates - 1, -1, -1)
+    for _, chunk in _chunks(scores, chunk_size, max_elements=1 << 24):
+        order = _ranked(chunk)
+        ranks = np.empty_like(order)
+        np.put_along_axis(ranks, order, positions[None, :], axis=1)
+        points += ranks.sum(axis=0)
+    return points
+
+
+def borda(scores, chunk_size=CHUNK_SIZE):
+    return _winner(borda_scores(scores, chunk_size))
+
+
+def approval_counts(scores, threshold=None, chunk_size=CHUNK_SIZE):
+    """
+    Approvals per candidate. A voter approves every candidate scoring at least `threshold`,
+    or, when no threshold is given, at least the voter's own mean score.
+    """
+    counts = np.zeros(scores.shape[1], dtype=np.int64)
+    for _, chunk in _chunks(scores, chunk_size):
+        cutoff = chunk.mean(axis=1, keepdims=True) if threshold is None else threshold
+        counts += (chunk >= cutoff).sum(axis=0)
+    return counts
+
+
+def approval(scores, threshold=None, chunk_size=CHUNK_SIZE):
+    return _winner(approval_counts(scores, threshold, chunk_size))
+
+
+def rank_ballots(scores, out=None, chunk_size=CHUNK_SIZE):
+    """
+    Ranked ballots: row v lists candidate indices from most to least preferred (ties by lowest index).
+    Pass `out` (e.g. an np.memmap) to keep large ballot sets off the heap.
+    """
+    num_voters, num_candidates = scores.shape
+    dtype = np.int16 if num_candidates <= np.iinfo(np.int16).max else np.int32
+    if out is None:
+        out = np.empty((num_voters, num_candidates), dtype=dtype)
+    for start, chunk in _chunks(scores, chunk_size, max_elements=1 << 24):
+        out[start:start + len(chunk)] = _ranked(chunk)
+    return out
+
+
+def instant_runoff(scores, ballots=None, chunk_size=CHUNK_SIZE):
+    """
+    Instant-runoff voting. Each round every voter counts for their highest-ranked remaining candidate;
+    a strict majority wins, otherwise the candidate with the fewest votes is eliminated (among ties, the
+    highest index goes first). Only voters whose current choice was just eliminated are re-read.
+    """
+    if ballots is None:
+        ballots = rank_ballots(scores, chunk_size=chunk_size)
+    num_voters, num_candidates = ballots.shape
+    pointer = np.zeros(num_voters, dtype=np.int32)
+    current = np.empty(num_voters, dtype=np.int64)
+    for start, chunk in _chunks(ballots, chunk_size):
+        current[start:start + len(chunk)] = chunk[:, 0]
+    counts = np.bincount(current, minlength=num_candidates)
+    eliminated = np.zeros(num_candidates, dtype=bool)
+
+    for _ in range(num_candidates - 1):
+        leader = _winner(np.where(eliminated, -1, counts))
+        if 2 * counts[leader] > num_voters:
+            return leader
+        remaining = np.where(eliminated, np.iinfo(np.int64).max, counts)
+        loser = num_candidates - 1 - int(np.argmin(remaining[::-1]))
+        eliminated[loser] = True
+        counts[loser] = 0
+        moved = np.flatnonzero(current == loser)
+        pending = moved
+        while len(pending):
+            pointer[pending] += 1
+            current[pending] = ballots[pending, pointer[pending]]
+            pending = pending[eliminated[current[pending]]]
+        counts += np.bincount(current[moved], minlength=num_candidates)
+    return _winner(np.where(eliminated, -1, counts))
+
+
+def pairwise_matrix(scores, chunk_size=CHUNK_SIZE):
+    """M[a, b] = number of voters scoring candidate a strictly above candidate b."""
+    num_candidates = scores.shape[1]
+    wins = np.zeros((num_candidates, num_candidates), dtype=np.int32)
+    # Chunks are capped so the (rows, K, K) comparison stays around 1M elements; for large K that is one
+    # voter at a time, which avoids the reduction over a 3-D temporary
+    rows = max(1, (1 << 20) // (num_candidates * num_candidates))
+    for _, chunk in _chunks(scores, min(chunk_size, rows)):
+        if len(chunk) == 1:
+            wins += chunk[0][:, None] > chunk[0][None, :]
+        else:
+            wins += (chunk[:, :, None] > chunk[:, None, :]).sum(axis=0, dtype=np.int32)
+    return wins.astype(np.int64)
+
+
+def copeland_scores(scores, chunk_size=CHUNK_SIZE):
+    """Pairwise victories minus defeats per candidate (a Condorcet winner has the maximum, K-1)."""
+    wins = pairwise_matrix(scores, chunk_size)
+    return (wins > wins.T).sum(axis=1) - (wins < wins.T).sum(axis=1)
+
+
+def copeland(scores, chunk_size=CHUNK_SIZE):
+    return _winner(copeland_scores(scores, chunk_size))
+
+
+def condorcet_winner(scores, chunk_size=CHUNK_SIZE):
+    """Candidate beating every other candidate head-to-head, or None if there is none."""
+    totals = copeland_scores(scores, chunk_size)
+    winner = _winner(totals)
+    return winner if totals[winner] == scores.shape[1] - 1 else None
+
+
+RULES = {
+    "plurality": plurality,
+    "borda": borda,
+    "approval": approval,
+    "instant_runoff": instant_runoff,
+    "copeland": copeland,
+}
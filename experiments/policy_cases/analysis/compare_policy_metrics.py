@@ -1,54 +1,104 @@
-# analysis/compare_policy_texts.py
+# analysis/compare_policy_metrics.py
 """
-Compare two policy proposals using:
+Compare policy proposals using:
 - Token Entropy
-- Semantic Diversity (1 - cosine similarity)
-Input: Two JSON files with "response" or "revised_statement"
+- Semantic Diversity (1 - mean pairwise cosine similarity between sentences)
+Input: any number of JSON files (or directories of them) with "response" or "revised_statement";
+defaults to the multi-agent and single-LLM UBI policies.
+
+Sentences from all files are embedded in one batched, disk-cached call (see embeddings.py), so metrics over
+thousands of logged transcripts only encode sentences not seen before:
+
+    python compare_policy_metrics.py ../output/*.json --csv metrics.csv
 """
 
+import argparse
 import json
+import os
+import sys
 import numpy as np
 from collections import Counter
-from scipy.spatial.distance import cosine
 from scipy.stats import entropy
-from sentence_transformers import SentenceTransformer
 
-model = SentenceTransformer("all-MiniLM-L6-v2")
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from embeddings import BLOCK_SIZE, Embedder, semantic_diversity, split_sentences
 
-# Load JSON responses
-with open("../output/ubi_deliberation_log.json") as f:
-    data_a = json.load(f)["revised_statement"]
+OUTPUT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "output")
+DEFAULT_POLICIES = {
+    "Multi-Agent": os.path.join(OUTPUT_DIR, "ubi_deliberation_log.json"),
+    "Single-LLM": os.path.join(OUTPUT_DIR, "single_llm_policy.json"),
+}
+TEXT_KEYS = ("revised_statement", "response")
 
-with open("../output/single_llm_policy.json") as f:
-    data_b = json.load(f)["response"]
 
-POLICIES = {
-    "Multi-Agent": data_a,
-    "Single-LLM": data_b
-}
+def load_policy_text(path):
+    """Policy text of a logged run, or None if the file has neither field."""
+    with open(path) as f:
+        data = json.load(f)
+    if isinstance(data, dict):
+        for key in TEXT_KEYS:
+            if isinstance(data.get(key), str):
+                return data[key]
+    return None
 
-def compute_metrics(text):
+
+def collect(paths):
+    """name -> path for every JSON file given directly or inside a given directory."""
+    found = {}
+    for path in paths:
+        if os.path.isdir(path):
+            for entry in sorted(os.listdir(path)):
+                if entry.endswith(".json"):
+                    found[os.path.join(path, entry)] = os.path.join(path, entry)
+        else:
+            found[path] = path
+    return found
+
+
+def token_entropy(text):
     tokens = text.lower().split()
     freqs = Counter(tokens)
     probs = np.array(list(freqs.values())) / sum(freqs.values())
-    token_entropy = entropy(probs, base=2)
-
-    sentences = [s for s in text.split(".") if s.strip()]
-    embeddings = model.encode(sentences)
-    pairwise_sim = []
-    for i in range(len(embeddings)):
-        for j in range(i+1, len(embeddings)):
-            sim = 1 - cosine(embeddings[i], embeddings[j])
-            pairwise_sim.append(sim)
-
-    avg_sim = np.mean(pairwise_sim) if pairwise_sim else 0.0
-    semantic_diversity = 1 - avg_sim
-
-    return token_entropy, semantic_diversity
-
-# Compare
-for name, text in POLICIES.items():
-    token_H, semantic_D = compute_metrics(text)
-    print(f"\n📊 {name} Policy:")
-    print(f"  Token Entropy: {token_H:.3f}")
-    print(f"  Semantic Diversity: {semantic_D:.3f}")
+    return entropy(probs, base=2)
+
+
+def compute_metrics(texts, embedder, block_size=BLOCK_SIZE):
+    """[(token entropy, semantic diversity)] per text, with one embedding pass over all of them."""
+    sentences = [split_sentences(text) for text in texts]
+    embeddings = embedder.encode_documents(sentences)
+    return [(token_entropy(text), semantic_diversity(vectors, block_size)) for text, vectors in zip(texts, embeddings)]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Token entropy and semantic diversity of policy texts.")
+    parser.add_argument("paths", nargs="*", help="JSON files or directories (default: the two UBI policies)")
+    parser.add_argument("--csv", help="also write the metrics table to this CSV file")
+    parser.add_argument("--block-size", type=int, default=BLOCK_SIZE)
+    args = parser.parse_args()
+
+    policies = collect(args.paths) if args.paths else DEFAULT_POLICIES
+    texts = {}
+    for name, path in policies.items():
+        text = load_policy_text(path)
+        if text is None:
+            print(f"Skipping {path}: no {' or '.join(TEXT_KEYS)} field")
+        else:
+            texts[name] = text
+
+    embedder = Embedder()
+    metrics = dict(zip(texts, compute_metrics(list(texts.values()), embedder, args.block_size)))
+
+    # Compare
+    for name, (token_H, semantic_D) in metrics.items():
+        print(f"\n📊 {name} Policy:")
+        print(f"  Token Entropy: {token_H:.3f}")
+        print(f"  Semantic Diversity: {semantic_D:.3f}")
+    print(f"\nEmbedding cache: {embedder.stats()}")
+
+    if args.csv:
+        import pandas as pd
+        pd.DataFrame(
+            [(name, h, d) for name, (h, d) in metrics.items()],
+            columns=["policy", "token_entropy", "semantic_diversity"],
+        ).to_csv(args.csv, index=False)
+        print(f"Metrics saved to {args.csv}")
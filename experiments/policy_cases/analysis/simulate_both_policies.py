@@ -2,6 +2,11 @@
 """
 Simulates both policies (multi-agent and single-agent) across a society of agents.
 Tracks satisfaction and justifications over multiple steps.
+Each agent's STEPS responses are seeded samples of one prompt (see ../simulation.py); per-agent mean and
+variance go to output/policy_simulation_summary.json.
+Every completed call is journaled (storage/journal.py); RUN_ID=<id> resumes a crashed run, issuing only
+the missing calls and rebuilding the JSON from the journal.
+Set EVAL_MODE=panel to score all agents with one LLM call per step (see AIPanel).
 """
 
 import json
@@ -10,7 +15,9 @@ import sys
 # import os
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
-from mediator_pipeline import AIAgent, call_ollama
+from mediator_pipeline import AIAgent
+from simulation import simulate_policy
+from storage.journal import open_run
 import matplotlib.pyplot as plt
 
 # Load policies
@@ -35,48 +42,41 @@ AGENTS = [
 ]
 
 STEPS = 5
+EVAL_MODE = os.environ.get("EVAL_MODE", "agent")  # "agent": one call per agent, "panel": one call per step
 os.makedirs("output", exist_ok=True)
 results = {}
-
-# Build prompts
-def build_prompt(agent, policy):
-    value_labels = ["Meritocracy", "Fairness", "Efficiency", "Age Inclusion", "Loss Recovery"]
-    values = "\n".join([f"- {name}: {weight}" for name, weight in zip(value_labels, agent.policy_vector)])
-    return (
-        f"You are an agent representing the '{agent.name}' group.\n"
-        f"Your group values are:\n{values}\n\n"
-        f"Here is the policy proposal:\n{policy}\n\n"
-        f"Rate your satisfaction with this policy from 0 to 1 and explain your reasoning."
-    )
+summary = {}
+journal = open_run("both_policies")
 
 # Run simulations
 for label, policy in POLICIES.items():
     print(f"\n🧪 Running simulation for {label} policy")
     results[label] = []
-    for step in range(STEPS):
-        step_result = {}
+    steps, policy_summary = simulate_policy(journal, AGENTS, label, policy, STEPS, EVAL_MODE)
+    if policy_summary is not None:
+        summary[label] = policy_summary
+
+    for step, step_result in enumerate(steps):
         print(f"  Step {step+1}:")
-        for agent in AGENTS:
-            prompt = build_prompt(agent, policy)
-            response = call_ollama(prompt)
-            try:
-                score = float(next(w for w in response.split() if w.replace('.', '', 1).isdigit()))
-                score = round(min(max(score, 0.0), 1.0), 2)
-            except:
-                score = 0.0
-            step_result[agent.name] = {"score": score, "justification": response.strip()}
-            print(f"    {agent.name}: {score} — {response.strip()[:60]}...")
+        for name, entry in step_result.items():
+            print(f"    {name}: {entry['score']} — {entry['justification'][:60]}...")
         results[label].append(step_result)
 
+journal.close()
+print(f"Journal: {journal.stats()}")
+
 # Save results
 with open("output/policy_simulation_results.json", "w") as f:
     json.dump(results, f, indent=2)
+if summary:
+    with open("output/policy_simulation_summary.json", "w") as f:
+        json.dump(summary, f, indent=2)
 
 # Plot results
 for label, series in results.items():
     plt.figure(figsize=(8, 5))
     for agent in AGENTS:
-        scores = [step[agent.name]["score"] for step in series]
+        scores = [float("nan") if step[agent.name]["score"] is None else step[agent.name]["score"] for step in series]
         plt.plot(range(1, STEPS+1), scores, label=agent.name)
     plt.title(f"Satisfaction Over Time — {label}")
     plt.xlabel("Step")
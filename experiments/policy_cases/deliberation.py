@@ -0,0 +1,149 @@
+# experiments/policy_cases/deliberation.py
+"""
+Multi-round deliberation on top of the AIMediator pipeline.
+
+After the opinions and the initial synthesis, every round is critique -> revise -> evaluate. Between rounds
+the driver tracks the statement's embedding (mean of its normalized sentence embeddings, see embeddings.py)
+and the agents' satisfaction scores, and stops as soon as both have settled: the cosine drift between
+consecutive statements is below `drift_threshold` and no agent's score moved by more than `score_threshold`.
+Agents already at or above `satisfied` are not asked for a critique, and the run ends early when all are.
+Failed evaluations (score None) count as unsatisfied, are left out of the mean, and block convergence.
+
+The log reports rounds run and LLM calls made against a fixed `max_rounds` run of the same driver, i.e.
+without early exit and with every agent critiquing every round.
+"""
+
+import json
+import os
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from embeddings import Embedder, split_sentences
+from mediator_pipeline import (AIAgent, AIMediator, MAX_CONCURRENCY, gather_critiques, gather_opinions,
+                               gather_scores)
+
+MAX_ROUNDS = int(os.environ.get("DELIBERATION_MAX_ROUNDS", 5))
+# 1 - cosine similarity between consecutive revisions
+DRIFT_THRESHOLD = float(os.environ.get("DELIBERATION_DRIFT", 0.02))
+# Largest per-agent change in satisfaction (0-1 scale) between rounds
+SCORE_THRESHOLD = float(os.environ.get("DELIBERATION_SCORE_DELTA", 0.05))
+# Agents at or above this satisfaction are not asked to critique
+SATISFIED = float(os.environ.get("DELIBERATION_SATISFIED", 0.8))
+LOG_FILE = "output/multi_round_deliberation_log.json"
+
+
+def statement_embedding(embedder: Embedder, statement: str) -> np.ndarray:
+    """Normalized mean of the statement's sentence embeddings (robust to the encoder's length limit)."""
+    vectors = embedder.encode(split_sentences(statement) or [statement])
+    mean = vectors.mean(axis=0)
+    return mean / max(np.linalg.norm(mean), 1e-12)
+
+
+def max_score_change(old: Dict[str, Optional[float]], new: Dict[str, Optional[float]]) -> float:
+    """Largest per-agent score change; infinite if any score is missing, so failures never look converged."""
+    if any(old[name] is None or new[name] is None for name in new):
+        return float("inf")
+    return max(abs(new[name] - old[name]) for name in new)
+
+
+def is_satisfied(score: Optional[float], satisfied: float) -> bool:
+    return score is not None and score >= satisfied
+
+
+def fixed_round_calls(num_agents: int, rounds: int, mediator: Optional[AIMediator] = None) -> int:
+    """
+    LLM calls of a full run: opinions, synthesis, evaluation, then critiques + revision + evaluation per round.
+    The mediator's synthesis and revision calls include its tree-reduction nodes, if it uses them.
+    """
+    mediator = mediator or AIMediator()
+    synthesis, revision = mediator.calls_for(num_agents), mediator.calls_for(num_agents, revision=True)
+    return 2 * num_agents + synthesis + rounds * (2 * num_agents + revision)
+
+
+def deliberate(agents: List[AIAgent], mediator: Optional[AIMediator] = None, max_rounds: int = MAX_ROUNDS,
+               drift_threshold: float = DRIFT_THRESHOLD, score_threshold: float = SCORE_THRESHOLD,
+               satisfied: float = SATISFIED, embedder: Optional[Embedder] = None,
+               max_workers: int = MAX_CONCURRENCY) -> Dict:
+    """Run up to `max_rounds` critique/revision rounds with early exit; returns a JSON-serializable log."""
+    mediator = mediator or AIMediator()
+    embedder = embedder or Embedder()
+    names = [a.name for a in agents]
+    log = {}
+    # Agent calls are counted here; mediator calls (including tree-reduction nodes) are the new `nodes`
+    agent_calls = 0
+    first_node = len(mediator.nodes)
+
+    opinions = gather_opinions(agents, max_workers)
+    log["opinions"] = dict(zip(names, opinions))
+    statement = mediator.synthesize_group_statement(opinions)
+    log["initial_statement"] = statement
+    scores = gather_scores(agents, statement, max_workers)
+    log["initial_scores"] = scores
+    agent_calls += 2 * len(agents)
+    embedding = statement_embedding(embedder, statement)
+
+    log["rounds"] = []
+    stop_reason = "max_rounds"
+    for round_number in range(1, max_rounds + 1):
+        critics = [a for a in agents if not is_satisfied(scores[a.name], satisfied)]
+        if not critics:
+            stop_reason = "all_satisfied"
+            break
+        critiques = gather_critiques(critics, statement, max_workers)
+        revised = mediator.revise_statement(statement, critiques)
+        new_scores = gather_scores(agents, revised, max_workers)
+        agent_calls += len(critics) + len(agents)
+
+        new_embedding = statement_embedding(embedder, revised)
+        drift = float(1.0 - new_embedding @ embedding)
+        score_delta = max_score_change(scores, new_scores)
+        valid = [score for score in new_scores.values() if score is not None]
+        log["rounds"].append({
+            "round": round_number,
+            "critiques": dict(zip([a.name for a in critics], critiques)),
+            "skipped_critiques": [name for name in names if is_satisfied(scores[name], satisfied)],
+            "statement": revised,
+            "scores": new_scores,
+            "mean_score": float(np.mean(valid)) if valid else None,
+            "drift": drift,
+            "score_delta": score_delta if np.isfinite(score_delta) else None,
+        })
+        print(f"Round {round_number}: drift {drift:.4f}, max score change {score_delta:.3f}, "
+              f"{len(critics)}/{len(agents)} critiques")
+        statement, scores, embedding = revised, new_scores, new_embedding
+        if drift < drift_threshold and score_delta < score_threshold:
+            stop_reason = "converged"
+            break
+
+    rounds = len(log["rounds"])
+    calls = agent_calls + len(mediator.nodes) - first_node
+    baseline = fixed_round_calls(len(agents), max_rounds, mediator)
+    log["revised_statement"] = statement
+    log["final_scores"] = scores
+    log["summary"] = {
+        "rounds": rounds,
+        "max_rounds": max_rounds,
+        "rounds_saved": max_rounds - rounds,
+        "stop_reason": stop_reason,
+        "llm_calls": calls,
+        "fixed_round_llm_calls": baseline,
+        "llm_calls_saved": baseline - calls,
+        "embedding_cache": embedder.stats(),
+    }
+    return log
+
+
+# Example run
+if __name__ == "__main__":
+    agents = [
+        AIAgent("low_income", [0.1, 0.5, 0.1, 0.1, 0.2]),
+        AIAgent("high_education", [0.4, 0.1, 0.3, 0.1, 0.1]),
+        AIAgent("worker_female", [0.2, 0.4, 0.1, 0.2, 0.1]),
+    ]
+
+    log = deliberate(agents)
+    print(json.dumps(log["summary"], indent=2))
+    with open(LOG_FILE, "w") as f:
+        json.dump(log, f, indent=2)
+    print(f"\n✅ Logged multi-round deliberation to {LOG_FILE}")
@@ -0,0 +1,150 @@
+# experiments/policy_cases/embeddings.py
+"""
+Sentence embeddings for the policy analysis scripts.
+
+Embedder loads the SentenceTransformer model on first use only, encodes the sentences of many documents in
+one batched call, and keeps every embedding in an SQLite cache keyed by a hash of (model, sentence), so
+re-running metrics over the same transcripts encodes nothing new. Embeddings are L2-normalized, which makes
+cosine similarity a plain dot product: pairwise similarities are one matrix product, and
+`iter_similarity_blocks` walks very large sentence sets a row block at a time in bounded memory.
+"""
+
+import hashlib
+import os
+import sqlite3
+import threading
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+MODEL_NAME = os.environ.get("EMBEDDING_MODEL", "all-MiniLM-L6-v2")
+CACHE_PATH = os.environ.get("EMBEDDING_CACHE_PATH", os.path.expanduser("~/.cache/sim-society/embeddings.sqlite"))
+BATCH_SIZE = int(os.environ.get("EMBEDDING_BATCH_SIZE", 256))
+# Rows per block when the full n x n similarity matrix would not fit in memory
+BLOCK_SIZE = 4096
+# SQLite limits the number of bound parameters per statement
+_LOOKUP_CHUNK = 900
+
+
+def split_sentences(text: str) -> List[str]:
+    return [s.strip() for s in text.split(".") if s.strip()]
+
+
+def sentence_key(model_name: str, sentence: str) -> str:
+    return hashlib.sha256(f"{model_name}\0{sentence}".encode("utf-8")).hexdigest()
+
+
+class Embedder:
+    def __init__(self, model_name: str = MODEL_NAME, cache_path: Optional[str] = CACHE_PATH,
+                 batch_size: int = BATCH_SIZE, model=None):
+        """`cache_path=None` disables the disk cache; `model` injects an already-loaded encoder."""
+        self.model_name = model_name
+        self.batch_size = batch_size
+        self.hits = 0
+        self.misses = 0
+        self._model = model
+        self._lock = threading.Lock()
+        self._db = None
+        if cache_path:
+            if os.path.dirname(cache_path):
+                os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+            self._db = sqlite3.connect(cache_path, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, vector BLOB)")
+            self._db.commit()
+
+    @property
+    def model(self):
+        with self._lock:
+            if self._model is None:
+                from sentence_transformers import SentenceTransformer
+                self._model = SentenceTransformer(self.model_name)
+            return self._model
+
+    def _lookup(self, keys: Sequence[str]) -> Dict[str, np.ndarray]:
+        found = {}
+        if self._db is None:
+            return found
+        with self._lock:
+            for start in range(0, len(keys), _LOOKUP_CHUNK):
+                chunk = keys[start:start + _LOOKUP_CHUNK]
+                rows = self._db.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({','.join('?' * len(chunk))})", chunk
+                )
+                found.update((key, np.frombuffer(vector, dtype=np.float32)) for key, vector in rows)
+        return found
+
+    def _store(self, keys: Sequence[str], vectors: np.ndarray) -> None:
+        if self._db is None:
+            return
+        with self._lock:
+            self._db.executemany("INSERT OR REPLACE INTO embeddings VALUES (?, ?)",
+                                 [(key, vector.tobytes()) for key, vector in zip(keys, vectors)])
+            self._db.commit()
+
+    def encode(self, sentences: Sequence[str]) -> np.ndarray:
+        """Normalized float32 embeddings (n, d); each distinct uncached sentence is encoded exactly once."""
+        if not len(sentences):
+            return np.zeros((0, 0), dtype=np.float32)
+        unique = list(dict.fromkeys(sentences))
+        keys = [sentence_key(self.model_name, s) for s in unique]
+        cached = self._lookup(keys)
+        missing = [i for i, key in enumerate(keys) if key not in cached]
+        self.hits += len(unique) - len(missing)
+        self.misses += len(missing)
+        if missing:
+            vectors = np.asarray(self.model.encode([unique[i] for i in missing], batch_size=self.batch_size,
+                                                   convert_to_numpy=True), dtype=np.float32)
+            vectors /= np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+            self._store([keys[i] for i in missing], vectors)
+            cached.update(zip((keys[i] for i in missing), vectors))
+        index = {s: cached[key] for s, key in zip(unique, keys)}
+        return np.stack([index[s] for s in sentences])
+
+    def encode_documents(self, documents: Sequence[Sequence[str]]) -> List[np.ndarray]:
+        """Embed the sentence lists of many documents in one encode call; returns one array per document."""
+        flat = [s for sentences in documents for s in sentences]
+        vectors = self.encode(flat)
+        bounds = np.cumsum([0] + [len(sentences) for sentences in documents])
+        return [vectors[bounds[i]:bounds[i + 1]] for i in range(len(documents))]
+
+    def stats(self) -> Dict:
+        lookups = self.hits + self.misses
+        return {"hits": self.hits, "misses": self.misses, "hit_rate": self.hits / lookups if lookups else 0.0}
+
+    def close(self):
+        if self._db is not None:
+            with self._lock:
+                self._db.close()
+
+
+def pairwise_similarity(embeddings: np.ndarray) -> np.ndarray:
+    """Full cosine-similarity matrix of normalized embeddings."""
+    return embeddings @ embeddings.T
+
+
+def iter_similarity_blocks(embeddings: np.ndarray, block_size: int = BLOCK_SIZE) -> Iterator[Tuple[int, np.ndarray]]:
+    """Yield (first row, similarity rows) blocks of the n x n matrix, `block_size` rows at a time."""
+    for start in range(0, len(embeddings), block_size):
+        yield start, embeddings[start:start + block_size] @ embeddings.T
+
+
+def mean_pairwise_similarity(embeddings: np.ndarray, block_size: int = BLOCK_SIZE) -> float:
+    """Mean cosine similarity over all pairs i < j (0.0 for fewer than two sentences)."""
+    n = len(embeddings)
+    if n < 2:
+        return 0.0
+    if n <= block_size:
+        sims = pairwise_similarity(embeddings)
+        total = sims.sum(dtype=np.float64) - np.trace(sims, dtype=np.float64)
+    else:
+        total = 0.0
+        for start, block in iter_similarity_blocks(embeddings, block_size):
+            total += block.sum(dtype=np.float64)
+            total -= np.einsum("ii->", block[:, start:start + len(block)], dtype=np.float64)
+    return float(total / (n * (n - 1)))
+
+
+def semantic_diversity(embeddings: np.ndarray, block_size: int = BLOCK_SIZE) -> float:
+    """1 - mean pairwise cosine similarity between sentences."""
+    return 1.0 - mean_pairwise_similarity(embeddings, block_size)
@@ -3,9 +3,13 @@
 Deliberation experiment on Universal Basic Income (UBI).
 Each agent represents a stakeholder group with distinct values.
 The AI Mediator facilitates consensus-building through LLM-based synthesis and critique.
+Every completed call is journaled (storage/journal.py); RUN_ID=<id> resumes a crashed run, issuing only
+the missing calls and rebuilding the log from the journal.
 """
 
-from mediator_pipeline import AIAgent, AIMediator, call_ollama
+from mediator_pipeline import AIAgent, AIMediator, DEFAULT_PROMPTS, fan_out, is_error
+from storage.journal import open_run
+from telemetry import metrics
 import json
 import os
 import matplotlib.pyplot as plt
@@ -20,65 +24,63 @@ POLICY_QUESTION = (
     "to address economic inequality and automation-driven job loss?\""
 )
 
-# Extended agent class with topic prompt injection
-def inject_topic(prompt: str, agent_name: str) -> str:
-    return f"{POLICY_QUESTION}\n\nAgent: {agent_name}\n\n{prompt}"
-
-class AIAgentWithTopic(AIAgent):
-    def generate_opinion(self) -> str:
-        opinion = call_ollama(inject_topic(super().generate_opinion(), self.name))
-        print(f"\n[{self.name}] Opinion:\n{opinion}\n")
-        return opinion
-
-    def critique_statement(self, statement: str) -> str:
-        critique = call_ollama(inject_topic(super().critique_statement(statement), self.name))
-        print(f"\n[{self.name}] Critique:\n{critique}\n")
-        return critique
-
-    def evaluate_statement(self, statement: str) -> float:
-        raw_prompt = inject_topic(statement, self.name)
-        response = call_ollama(
-            f"{raw_prompt}\n\nRate your satisfaction on a scale from 0 (very dissatisfied) to 1 (very satisfied). Only return a number."
-        )
-        print(f"\n[{self.name}] Satisfaction Response:\n{response}\n")
-        try:
-            return round(float(response), 2)
-        except:
-            return 0.0
+# Topic overlay: the policy question leads each agent prompt as part of the shared prefix,
+# so every opinion, critique and evaluation is still a single LLM call
+UBI_PROMPTS = DEFAULT_PROMPTS.overlay(
+    {"topic": POLICY_QUESTION + "\n"},
+    only=("opinion", "critique", "evaluation"),
+)
 
 # Define agents with diverse group value vectors
 agents = [
-    AIAgentWithTopic("low_income",       [0.1, 0.6, 0.1, 0.1, 0.1]),
-    AIAgentWithTopic("tech_worker",      [0.5, 0.1, 0.3, 0.05, 0.05]),
-    AIAgentWithTopic("retired",          [0.2, 0.2, 0.1, 0.4, 0.1]),
-    AIAgentWithTopic("entrepreneur",     [0.6, 0.05, 0.3, 0.01, 0.04]),
-    AIAgentWithTopic("displaced_worker", [0.15, 0.25, 0.05, 0.15, 0.4])
+    AIAgent("low_income",       [0.1, 0.6, 0.1, 0.1, 0.1], prompts=UBI_PROMPTS),
+    AIAgent("tech_worker",      [0.5, 0.1, 0.3, 0.05, 0.05], prompts=UBI_PROMPTS),
+    AIAgent("retired",          [0.2, 0.2, 0.1, 0.4, 0.1], prompts=UBI_PROMPTS),
+    AIAgent("entrepreneur",     [0.6, 0.05, 0.3, 0.01, 0.04], prompts=UBI_PROMPTS),
+    AIAgent("displaced_worker", [0.15, 0.25, 0.05, 0.15, 0.4], prompts=UBI_PROMPTS)
 ]
 
 mediator = AIMediator()
 log = {}
+journal = open_run("ubi")
+succeeded = lambda text: not is_error(text)
 
 # Step 1: Opinions
-opinions = [agent.generate_opinion() for agent in agents]
+with metrics.span("opinions"):
+    opinions = fan_out(lambda agent: journal.call("opinion", 0, agent.name, agent.generate_opinion, succeeded), agents)
+for agent, opinion in zip(agents, opinions):
+    print(f"\n[{agent.name}] Opinion:\n{opinion}\n")
 log["opinions"] = dict(zip([a.name for a in agents], opinions))
 
 # Step 2: Initial Statement
-initial_statement = mediator.synthesize_group_statement(opinions)
+initial_statement = journal.call("synthesis", 0, None, lambda: mediator.synthesize_group_statement(opinions), succeeded)
 print("\n[Mediator] Initial Statement:\n", initial_statement, "\n")
 log["initial_statement"] = initial_statement
 
 # Step 3: Critiques
-critiques = [agent.critique_statement(initial_statement) for agent in agents]
+with metrics.span("critiques"):
+    critiques = fan_out(lambda agent: journal.call(
+        "critique", 0, agent.name, lambda: agent.critique_statement(initial_statement), succeeded), agents)
+for agent, critique in zip(agents, critiques):
+    print(f"\n[{agent.name}] Critique:\n{critique}\n")
 log["critiques"] = dict(zip([a.name for a in agents], critiques))
 
 # Step 4: Revised Statement
-revised_statement = mediator.revise_statement(initial_statement, critiques)
+revised_statement = journal.call(
+    "revision", 0, None, lambda: mediator.revise_statement(initial_statement, critiques), succeeded)
 print("\n[Mediator] Revised Statement:\n", revised_statement, "\n")
 log["revised_statement"] = revised_statement
 
 # Step 5: Evaluation
-scores = {agent.name: agent.evaluate_statement(revised_statement) for agent in agents}
+with metrics.span("evaluation"):
+    scores = dict(zip([a.name for a in agents], fan_out(lambda agent: journal.call(
+        "evaluation", 0, agent.name, lambda: agent.evaluate_statement(revised_statement),
+        lambda score: score is not None), agents)))
+for name, score in scores.items():
+    print(f"[{name}] Satisfaction: {score}")
 log["final_scores"] = scores
+journal.close()
+print(f"Journal: {journal.stats()}")
 
 # Output
 with open(LOG_FILE, "w") as f:
@@ -86,9 +88,8 @@ with open(LOG_FILE, "w") as f:
 
 # Plot
 plt.figure(figsize=(8, 5))
-names = list(scores.keys())
-values = list(scores.values())
-plt.bar(names, values, color="lightgreen")
+scored = {name: score for name, score in scores.items() if score is not None}
+plt.bar(list(scored.keys()), list(scored.values()), color="lightgreen")
 plt.ylim(0, 1)
 plt.ylabel("Satisfaction Score")
 plt.title("Agent Satisfaction on UBI Policy")
@@ -2,95 +2,317 @@
 """
 This module implements the AI-mediated deliberation process inspired by the Habermas Machine.
 Agents express their opinions, critique synthesized group proposals, and converge on a final statement.
-Integrated with Ollama (DeepSeek-R1) for LLM-based generation.
+Integrated with Ollama (DeepSeek-R1) for LLM-based generation through the shared pooled HTTP client in llm/client.py.
 Logs results to output/deliberation_log.json and visualizes satisfaction scores.
 """
 
-from typing import List
-import subprocess
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, List, Optional
 import json
 import os
+import re
+import sys
+import time
 import matplotlib.pyplot as plt
 
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+from llm.client import get_default_client
+from llm.streaming import ScoreParser, generate_until
+from llm.templates import PromptSet, PromptTemplate
+from telemetry import metrics
+
 OLLAMA_MODEL = "deepseek-r1"
+# Upper bound on concurrent LLM calls per deliberation phase (1 = serial)
+MAX_CONCURRENCY = int(os.environ.get("SIM_MAX_CONCURRENCY", 8))
+# Per-phase caps on generated tokens, e.g. SIM_NUM_PREDICT="evaluation=256,critique=512"
+PHASE_OPTIONS = {
+    phase.strip(): {"num_predict": int(limit)}
+    for phase, _, limit in (item.partition("=") for item in os.environ.get("SIM_NUM_PREDICT", "").split(",") if item)
+}
+
+# Tree-reduction synthesis: merge opinions/critiques in batches of this many per LLM call (0 = one prompt)
+SYNTHESIS_FAN_IN = int(os.environ.get("SIM_SYNTHESIS_FAN_IN", 0))
+# Rough characters per token, for per-node token accounting without a tokenizer
+CHARS_PER_TOKEN = 4
 
 os.makedirs("output", exist_ok=True)
 LOG_FILE = "output/deliberation_log.json"
 PLOT_FILE = "output/satisfaction_plot.png"
 
-def call_ollama(prompt: str) -> str:
+def call_ollama(prompt: str, options: Optional[Dict] = None, timeout: Optional[float] = None, **params) -> str:
     try:
-        result = subprocess.run(
-            ["ollama", "run", OLLAMA_MODEL],
-            input=prompt.encode("utf-8"),
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            timeout=120
-        )
-        output = result.stdout.decode("utf-8")
-        return output.strip()
+        return get_default_client().generate(prompt, model=OLLAMA_MODEL, options=options, timeout=timeout, **params)
     except Exception as e:
+        metrics.inc("llm_fallbacks_total", site="call_ollama")
         return f"[ERROR] {str(e)}"
 
+def is_error(text) -> bool:
+    """True for the "[ERROR] ..." placeholders returned by failed calls (never journaled, always retried)."""
+    return isinstance(text, str) and text.startswith("[ERROR]")
+
+def stream_score(prompt: str, low: float = 0.0, high: float = 1.0, justification: bool = False,
+                 phase: str = "evaluation", **params):
+    """
+    Stream a scoring prompt and stop generating as soon as a score in [low, high] (plus one sentence of
+    justification if requested) has been parsed. Returns (score or None, text read so far).
+    """
+    parser = ScoreParser(low, high, justification=justification)
+    try:
+        text = generate_until(get_default_client(), prompt, parser, model=OLLAMA_MODEL,
+                              options=PHASE_OPTIONS.get(phase), **params)
+    except Exception as e:
+        metrics.inc("llm_fallbacks_total", site=phase)
+        return None, f"[ERROR] {str(e)}"
+    if parser.score is None:
+        metrics.inc("llm_parse_failures_total", site=phase)
+    return parser.score, text
+
+# Prompt templates per deliberation phase. Variants (e.g. a policy topic) are overlays on these blocks.
+# Blocks shared by all agents come first so the inference server can reuse the common prefix;
+# the per-agent persona comes last, followed only by short output-format instructions.
+PROMPT_LAYOUT = ("topic", "statement", "task", "persona", "format")
+# Template fields that differ between agents; everything before the first block using them is shared
+AGENT_FIELDS = ("name", "values")
+PERSONA = (
+    "You are an AI agent representing the group '{name}'.\n"
+    "Your group values the following societal principles as follows:\n"
+    "Meritocracy: {values[0]}\n"
+    "Fairness: {values[1]}\n"
+    "Efficiency: {values[2]}\n"
+    "Age Inclusion: {values[3]}\n"
+    "Loss Recovery: {values[4]}"
+)
+
+DEFAULT_PROMPTS = PromptSet({
+    "opinion": PromptTemplate([
+        ("task", "Please write a short paragraph explaining the policy priorities of the group described below."),
+        ("persona", PERSONA),
+    ]),
+    "critique": PromptTemplate([
+        ("statement", "The group policy statement under discussion is:\n'{statement}'"),
+        ("task", "Based on the values of the group described below, write a short critique or concern with this statement."),
+        ("persona", PERSONA),
+    ]),
+    "evaluation": PromptTemplate([
+        ("statement", "The group policy statement under discussion is:\n'{statement}'"),
+        ("task", "Rate the satisfaction of the group described below on a scale from 0 (very dissatisfied) to 1 (very satisfied)."),
+        ("persona", PERSONA),
+        ("format", "Only return a number."),
+    ]),
+    "synthesis": PromptTemplate([
+        ("task",
+         "The following are policy opinions from several social groups:\n{opinions}\n"
+         "Please synthesize these into one coherent group policy statement."),
+    ]),
+    "revision": PromptTemplate([
+        ("task",
+         "Original group policy statement:\n{original}\n\n"
+         "Here are critiques from several agents:\n{critiques}\n"
+         "Revise the statement to address their concerns."),
+    ]),
+    "merge": PromptTemplate([
+        ("task",
+         "The following are partial group policy statements, each synthesized from a subset of social groups:\n{statements}\n"
+         "Please merge these into one coherent group policy statement that keeps every group's key concerns."),
+    ]),
+    "critique_summary": PromptTemplate([
+        ("task",
+         "Here are critiques of a group policy statement from several agents:\n{critiques}\n"
+         "Summarize them into one concise list of concerns, keeping every distinct point."),
+    ]),
+}, layout=PROMPT_LAYOUT)
+
 class AIAgent:
-    def __init__(self, name: str, policy_vector: List[float]):
+    def __init__(self, name: str, policy_vector: List[float], prompts: PromptSet = DEFAULT_PROMPTS):
         self.name = name
         self.policy_vector = policy_vector
+        self.prompts = prompts
+
+    def _render(self, phase: str, **values):
+        return self.prompts.render_split(phase, AGENT_FIELDS, name=self.name, values=self.policy_vector, **values)
 
     def generate_opinion(self) -> str:
-        prompt = (
-            f"You are an AI agent representing the group '{self.name}'.\n"
-            f"Your group values the following societal principles as follows:\n"
-            f"Meritocracy: {self.policy_vector[0]}\n"
-            f"Fairness: {self.policy_vector[1]}\n"
-            f"Efficiency: {self.policy_vector[2]}\n"
-            f"Age Inclusion: {self.policy_vector[3]}\n"
-            f"Loss Recovery: {self.policy_vector[4]}\n"
-            f"Please write a short paragraph explaining your policy priorities."
-        )
-        return call_ollama(prompt)
+        prefix, prompt = self._render("opinion")
+        return call_ollama(prompt, options=PHASE_OPTIONS.get("opinion"), prefix=prefix)
 
     def critique_statement(self, statement: str) -> str:
-        prompt = (
-            f"You are an AI agent representing the group '{self.name}'.\n"
-            f"You are responding to the group policy statement:\n'{statement}'\n"
-            f"Based on your values, write a short critique or concern with this statement."
-        )
-        return call_ollama(prompt)
-
-    def evaluate_statement(self, statement: str) -> float:
-        prompt = (
-            f"You are an AI agent representing the group '{self.name}'.\n"
-            f"Given the group policy statement:\n'{statement}'\n"
-            f"Rate your satisfaction on a scale from 0 (very dissatisfied) to 1 (very satisfied).\n"
-            f"Only return a number."
-        )
-        response = call_ollama(prompt)
-        try:
-            return round(float(response), 2)
-        except:
-            return 0.0
+        prefix, prompt = self._render("critique", statement=statement)
+        return call_ollama(prompt, options=PHASE_OPTIONS.get("critique"), prefix=prefix)
+
+    def evaluate_statement(self, statement: str) -> Optional[float]:
+        """Satisfaction in [0, 1], or None if the call failed or no score could be parsed."""
+        prefix, prompt = self._render("evaluation", statement=statement)
+        score, _ = stream_score(prompt, prefix=prefix)
+        return round(score, 2) if score is not None else None
 
 class AIMediator:
-    def __init__(self):
-        pass
+    """
+    Synthesizes opinions into a group statement and revises it from critiques.
+
+    With `fan_in` set and more inputs than that, inputs are reduced as a tree: batches of `fan_in` are
+    synthesized (or, for critiques, summarized) in parallel, and the intermediate texts are merged batch by
+    batch up to a single root, so prompt size stays bounded and latency grows with log(inputs). Every LLM call
+    is recorded in `nodes` with its tree position and estimated prompt/output tokens.
+    """
+
+    def __init__(self, prompts: PromptSet = DEFAULT_PROMPTS, fan_in: int = SYNTHESIS_FAN_IN,
+                 max_workers: int = MAX_CONCURRENCY):
+        if fan_in == 1:
+            raise ValueError("fan_in must be 0 (no tree) or at least 2")
+        self.prompts = prompts
+        self.fan_in = fan_in
+        self.max_workers = max_workers
+        self.nodes: List[Dict] = []
+
+    def _node(self, phase: str, level: int, index: int, inputs: int, **values) -> str:
+        prompt = self.prompts.render(phase, **values)
+        options = PHASE_OPTIONS.get(phase)
+        start = time.perf_counter()
+        text = call_ollama(prompt, options=options)
+        self.nodes.append({
+            "phase": phase, "level": level, "index": index, "inputs": inputs,
+            "prompt_tokens": len(prompt) // CHARS_PER_TOKEN, "output_tokens": len(text) // CHARS_PER_TOKEN,
+            "token_budget": (options or {}).get("num_predict"), "seconds": time.perf_counter() - start,
+        })
+        return text
+
+    def _reduce(self, texts: List[str], leaf_phase: str, leaf_field: str, merge_phase: str, merge_field: str) -> str:
+        """Reduce `texts` to one through levels of `fan_in`-sized batches, each level's batches in parallel."""
+        level = 0
+        while level == 0 or len(texts) > 1:
+            phase, field = (leaf_phase, leaf_field) if level == 0 else (merge_phase, merge_field)
+            batches = [texts[i:i + self.fan_in] for i in range(0, len(texts), self.fan_in)]
+            texts = fan_out(
+                lambda item: self._node(phase, level, item[0], len(item[1]), **{field: "\n\n".join(item[1])}),
+                list(enumerate(batches)), self.max_workers,
+            )
+            level += 1
+        return texts[0]
+
+    def _use_tree(self, inputs: List[str]) -> bool:
+        return bool(self.fan_in) and len(inputs) > self.fan_in
+
+    def calls_for(self, inputs: int, revision: bool = False) -> int:
+        """LLM calls a synthesis (or, with `revision`, a revision) of `inputs` texts makes."""
+        if not self.fan_in or inputs <= self.fan_in:
+            return 1
+        calls = 0
+        while calls == 0 or inputs > 1:
+            inputs = -(-inputs // self.fan_in)
+            calls += inputs
+        return calls + revision
 
     def synthesize_group_statement(self, opinions: List[str]) -> str:
-        combined = "\n\n".join(opinions)
-        prompt = (
-            f"The following are policy opinions from several social groups:\n{combined}\n"
-            f"Please synthesize these into one coherent group policy statement."
-        )
-        return call_ollama(prompt)
+        with metrics.span("synthesis"):
+            if self._use_tree(opinions):
+                return self._reduce(opinions, "synthesis", "opinions", "merge", "statements")
+            return self._node("synthesis", 0, 0, len(opinions), opinions="\n\n".join(opinions))
 
     def revise_statement(self, original: str, critiques: List[str]) -> str:
-        joined_critiques = "\n\n".join(critiques)
-        prompt = (
-            f"Original group policy statement:\n{original}\n\n"
-            f"Here are critiques from several agents:\n{joined_critiques}\n"
-            f"Revise the statement to address their concerns."
+        with metrics.span("revision"):
+            if self._use_tree(critiques):
+                # Condense the critiques as a tree, then revise once against the summary
+                summary = self._reduce(critiques, "critique_summary", "critiques", "critique_summary", "critiques")
+                return self._node("revision", 0, 0, 1, original=original, critiques=summary)
+            return self._node("revision", 0, 0, len(critiques), original=original, critiques="\n\n".join(critiques))
+
+    def token_usage(self) -> Dict[str, Dict]:
+        """Calls, tree depth and estimated tokens per phase over all recorded nodes."""
+        usage = {}
+        for node in self.nodes:
+            phase = usage.setdefault(node["phase"], {"calls": 0, "levels": 0, "prompt_tokens": 0, "output_tokens": 0,
+                                                     "max_prompt_tokens": 0})
+            phase["calls"] += 1
+            phase["levels"] = max(phase["levels"], node["level"] + 1)
+            phase["prompt_tokens"] += node["prompt_tokens"]
+            phase["output_tokens"] += node["output_tokens"]
+            phase["max_prompt_tokens"] = max(phase["max_prompt_tokens"], node["prompt_tokens"])
+        return usage
+
+def fan_out(fn: Callable, items: Iterable, max_workers: int = MAX_CONCURRENCY) -> list:
+    """Apply `fn` to every item on a bounded thread pool and return results in input order."""
+    items = list(items)
+    if max_workers <= 1 or len(items) <= 1:
+        return [fn(item) for item in items]
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(items))) as pool:
+        return list(pool.map(fn, items))
+
+def gather_opinions(agents: List[AIAgent], max_workers: int = MAX_CONCURRENCY) -> List[str]:
+    with metrics.span("opinions"):
+        return fan_out(lambda agent: agent.generate_opinion(), agents, max_workers)
+
+def gather_critiques(agents: List[AIAgent], statement: str, max_workers: int = MAX_CONCURRENCY) -> List[str]:
+    with metrics.span("critiques"):
+        return fan_out(lambda agent: agent.critique_statement(statement), agents, max_workers)
+
+def gather_scores(agents: List[AIAgent], statement: str, max_workers: int = MAX_CONCURRENCY) -> Dict[str, Optional[float]]:
+    """{agent name: score}; failed evaluations are None (null in the logs) and left out of plots and averages."""
+    with metrics.span("evaluation"):
+        scores = fan_out(lambda agent: agent.evaluate_statement(statement), agents, max_workers)
+    return dict(zip([a.name for a in agents], scores))
+
+VALUE_LABELS = ["Meritocracy", "Fairness", "Efficiency", "Age Inclusion", "Loss Recovery"]
+
+class AIPanel:
+    """
+    Scores one policy for a whole set of agents with a single LLM call.
+    The policy text is sent once, followed by every agent's value vector, and the model returns a
+    JSON score array. Agents missing from (or unparseable in) the reply are scored one by one with `fallback`.
+    """
+
+    def __init__(self, agents: List[AIAgent], max_workers: int = MAX_CONCURRENCY):
+        self.agents = agents
+        self.max_workers = max_workers
+        self.fallback_calls = 0
+
+    def build_prompt(self, statement: str) -> str:
+        personas = "\n".join(
+            f"- {agent.name}: " + ", ".join(f"{label} {value}" for label, value in zip(VALUE_LABELS, agent.policy_vector))
+            for agent in self.agents
+        )
+        return (
+            f"Here is the policy proposal:\n{statement}\n\n"
+            f"The following groups weigh societal values differently:\n{personas}\n\n"
+            f"For every group, rate its satisfaction with this policy on a scale from 0 to 1 and give one sentence of reasoning.\n"
+            f"Respond only with JSON of the form "
+            f'{{"scores": [{{"agent": "<group>", "score": <number>, "justification": "<sentence>"}}]}}, one entry per group.'
         )
-        return call_ollama(prompt)
+
+    def parse(self, response: str) -> Dict[str, Dict]:
+        text = re.sub(r"<think>.*?</think>", "", response, flags=re.DOTALL)
+        decoder = json.JSONDecoder()
+        payload = None
+        for match in re.finditer(r"[\[{]", text):
+            try:
+                payload, _ = decoder.raw_decode(text, match.start())
+                break
+            except ValueError:
+                continue
+        if isinstance(payload, dict):
+            payload = payload.get("scores", payload.get("agents", []))
+        names = {agent.name for agent in self.agents}
+        parsed = {}
+        for entry in payload if isinstance(payload, list) else []:
+            try:
+                name = entry["agent"]
+                score = round(min(max(float(entry["score"]), 0.0), 1.0), 2)
+            except (KeyError, TypeError, ValueError):
+                continue
+            if name in names:
+                parsed[name] = {"score": score, "justification": str(entry.get("justification", "")).strip()}
+        return parsed
+
+    def evaluate(self, statement: str, fallback: Callable[[AIAgent], Dict], options: Optional[Dict] = None) -> Dict[str, Dict]:
+        """Return {agent name: {"score", "justification"}} in agent order; `options` are the sampling options."""
+        with metrics.span("evaluation", mode="panel"):
+            parsed = self.parse(call_ollama(self.build_prompt(statement), options=options, format="json"))
+            missing = [agent for agent in self.agents if agent.name not in parsed]
+            self.fallback_calls += len(missing)
+            if missing:
+                metrics.inc("llm_parse_failures_total", len(missing), site="panel")
+            for agent, result in zip(missing, fan_out(fallback, missing, self.max_workers)):
+                parsed[agent.name] = result
+        return {agent.name: parsed[agent.name] for agent in self.agents}
 
 # Example run
 if __name__ == "__main__":
@@ -104,7 +326,7 @@ if __name__ == "__main__":
     log = {}
 
     # Step 1: Agents generate opinions
-    opinions = [agent.generate_opinion() for agent in agents]
+    opinions = gather_opinions(agents)
     log["opinions"] = dict(zip([a.name for a in agents], opinions))
 
     # Step 2: Mediator synthesizes initial group statement
@@ -112,7 +334,7 @@ if __name__ == "__main__":
     log["initial_statement"] = initial_statement
 
     # Step 3: Agents critique the statement
-    critiques = [agent.critique_statement(initial_statement) for agent in agents]
+    critiques = gather_critiques(agents, initial_statement)
     log["critiques"] = dict(zip([a.name for a in agents], critiques))
 
     # Step 4: Mediator revises the statement
@@ -120,7 +342,7 @@ if __name__ == "__main__":
     log["revised_statement"] = revised_statement
 
     # Step 5: Agents evaluate the final version
-    scores = {agent.name: agent.evaluate_statement(revised_statement) for agent in agents}
+    scores = gather_scores(agents, revised_statement)
     log["final_scores"] = scores
 
     # Print to console
@@ -132,9 +354,8 @@ if __name__ == "__main__":
 
     # Visualize satisfaction scores
     plt.figure(figsize=(8, 5))
-    names = list(scores.keys())
-    values = list(scores.values())
-    plt.bar(names, values, color="skyblue")
+    scored = {name: score for name, score in scores.items() if score is not None}
+    plt.bar(list(scored.keys()), list(scored.values()), color="skyblue")
     plt.ylim(0, 1)
     plt.ylabel("Satisfaction Score")
     plt.title("Agent Satisfaction with Revised Policy Statement")
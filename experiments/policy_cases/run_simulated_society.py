@@ -2,12 +2,19 @@
 """
 Simulates how agents respond to two different policy proposals (multi-agent vs. single-agent).
 Tracks agent satisfaction and justifications over multiple time steps.
+Each agent's STEPS responses are seeded samples of one prompt (see simulation.py); per-agent mean and
+variance go to output/simulation_summary.json.
+Every completed call is journaled (storage/journal.py); RUN_ID=<id> resumes a crashed run, issuing only
+the missing calls and rebuilding the JSON from the journal.
+Set EVAL_MODE=panel to score all agents with one LLM call per step (see AIPanel).
 """
 
 import json
 import os
 import matplotlib.pyplot as plt
-from mediator_pipeline import AIAgent, call_ollama
+from mediator_pipeline import AIAgent
+from simulation import simulate_policy
+from storage.journal import open_run
 
 # Load both policies
 with open("output/ubi_deliberation_log.json") as f:
@@ -31,55 +38,41 @@ AGENTS = [
 ]
 
 STEPS = 5
+EVAL_MODE = os.environ.get("EVAL_MODE", "agent")  # "agent": one call per agent, "panel": one call per step
 os.makedirs("output", exist_ok=True)
 results = {}
-
-# Prompt builder
-def build_prompt(agent, policy_text):
-    names = ["Meritocracy", "Fairness", "Efficiency", "Age Inclusion", "Loss Recovery"]
-    prefs = "\n".join([f"- {name}: {val}" for name, val in zip(names, agent.policy_vector)])
-    return (
-        f"You are an agent representing the '{agent.name}' group.\n"
-        f"Your values are:\n{prefs}\n\n"
-        f"Here is the current policy proposal:\n{policy_text}\n\n"
-        f"Rate your satisfaction with this policy on a scale from 0 to 1, and briefly explain your reasoning."
-    )
+summary = {}
+journal = open_run("simulated_society")
 
 # Run simulation for each policy
 for policy_name, policy_text in POLICIES.items():
     results[policy_name] = []
     print(f"\n▶ Running simulation for {policy_name} Policy")
+    steps, policy_summary = simulate_policy(journal, AGENTS, policy_name, policy_text, STEPS, EVAL_MODE)
+    if policy_summary is not None:
+        summary[policy_name] = policy_summary
 
-    for step in range(STEPS):
-        step_data = {}
+    for step, step_data in enumerate(steps):
         print(f"\n  Step {step+1}:")
-        for agent in AGENTS:
-            prompt = build_prompt(agent, policy_text)
-            response = call_ollama(prompt)
-            print(f"    [{agent.name}] → {response}")
-
-            # Extract score
-            try:
-                number = next(float(w) for w in response.split() if w.replace('.', '', 1).isdigit())
-                score = round(min(max(number, 0.0), 1.0), 2)
-            except:
-                score = 0.0
-
-            step_data[agent.name] = {
-                "score": score,
-                "justification": response
-            }
+        for name, entry in step_data.items():
+            print(f"    [{name}] → {entry['justification']}")
         results[policy_name].append(step_data)
 
+journal.close()
+print(f"Journal: {journal.stats()}")
+
 # Save
 with open("output/simulation_results.json", "w") as f:
     json.dump(results, f, indent=2)
+if summary:
+    with open("output/simulation_summary.json", "w") as f:
+        json.dump(summary, f, indent=2)
 
 # Plot
 for policy_name, series in results.items():
     plt.figure(figsize=(8, 5))
     for agent in AGENTS:
-        scores = [round(step[agent.name]["score"], 2) for step in series]
+        scores = [float("nan") if step[agent.name]["score"] is None else round(step[agent.name]["score"], 2) for step in series]
         plt.plot(range(1, STEPS+1), scores, label=agent.name)
 
     plt.title(f"Agent Satisfaction Over Time ({policy_name})")
@@ -0,0 +1,91 @@
+# experiments/policy_cases/simulation.py
+"""
+Repeated-sampling simulation of a society's satisfaction with a policy, shared by run_simulated_society.py
+and analysis/simulate_both_policies.py.
+
+Each of the `steps` responses of an agent is one sample of the same prompt with sampling seed SEED + step
+(llm/sampling.py), so steps are distinct draws even behind the read-through response cache. In "agent"
+mode every agent's samples are drawn one after another and agents run concurrently; in "panel" mode every
+step is one AIPanel call for all agents. Every scored result is journaled (storage/journal.py) as soon as
+it returns, so a resumed run only issues the calls that are missing and produces the same results.
+"""
+
+from typing import Dict, List, Optional, Tuple
+
+from mediator_pipeline import AIAgent, AIPanel, OLLAMA_MODEL, VALUE_LABELS, call_ollama, fan_out, is_error
+from llm.client import get_default_client
+from llm.sampling import sample, sample_options, summarize
+from storage.journal import RunJournal
+from telemetry import metrics
+
+SEED = 0
+
+
+# Prompt builder: the policy and instructions form a prefix shared by every agent, the persona comes last
+def build_prompt_parts(agent: AIAgent, policy_text: str) -> Tuple[str, str]:
+    prefs = "\n".join([f"- {name}: {val}" for name, val in zip(VALUE_LABELS, agent.policy_vector)])
+    shared = (
+        f"Here is the current policy proposal:\n{policy_text}\n\n"
+        f"Rate the satisfaction of the group described below with this policy on a scale from 0 to 1, "
+        f"and briefly explain your reasoning.\n"
+    )
+    persona = (
+        f"You are an agent representing the '{agent.name}' group.\n"
+        f"Your values are:\n{prefs}"
+    )
+    return shared, persona
+
+def parse_response(response: str) -> Dict:
+    # Extract score (None for error placeholders and answers without a number)
+    try:
+        if is_error(response):
+            raise ValueError(response)
+        number = next(float(w) for w in response.split() if w.replace('.', '', 1).isdigit())
+        score = round(min(max(number, 0.0), 1.0), 2)
+    except (ValueError, StopIteration):
+        metrics.inc("llm_parse_failures_total", site="simulation")
+        score = None
+    return {"score": score, "justification": response.strip()}
+
+def score_agent(agent: AIAgent, policy_text: str, options: Optional[Dict] = None) -> Dict:
+    shared, persona = build_prompt_parts(agent, policy_text)
+    return parse_response(call_ollama(persona, options=options, prefix=shared))
+
+def scored(entry: Dict) -> bool:
+    """False for error placeholders and unparseable answers, which are retried on resume instead of journaled."""
+    return entry["score"] is not None and not is_error(entry["justification"])
+
+def sample_agent(journal: RunJournal, agent: AIAgent, policy_name: str, policy_text: str, n: int) -> Dict:
+    """n scored samples of the agent's prompt (journaled ones replayed), with mean and variance."""
+    shared, persona = build_prompt_parts(agent, policy_text)
+    client = get_default_client()
+
+    def draw(i: int) -> Dict:
+        return parse_response(sample(client, persona, n, indices=[i], seed=SEED, model=OLLAMA_MODEL, prefix=shared)[0])
+
+    samples = [journal.call(f"score:{policy_name}", i, agent.name, lambda: draw(i), record_if=scored) for i in range(n)]
+    return {"samples": samples, **summarize([s["score"] for s in samples])}
+
+def panel_step(journal: RunJournal, panel: AIPanel, policy_name: str, policy_text: str, step: int) -> Dict[str, Dict]:
+    """One panel evaluation of the policy, seeded per step, journaled once every agent has a score."""
+    options = sample_options(None, SEED, step)
+    return journal.call(f"panel:{policy_name}", step, None,
+                        lambda: panel.evaluate(policy_text, fallback=lambda agent: score_agent(agent, policy_text, options),
+                                               options=options),
+                        record_if=lambda result: all(scored(entry) for entry in result.values()))
+
+def simulate_policy(journal: RunJournal, agents: List[AIAgent], policy_name: str, policy_text: str, steps: int,
+                    mode: str = "agent") -> Tuple[List[Dict[str, Dict]], Optional[Dict]]:
+    """
+    Per-step results [{agent name: {"score", "justification"}}] for `steps` steps, and in "agent" mode the
+    per-agent {"mean", "variance"} summary (None in "panel" mode).
+    """
+    if mode == "panel":
+        panel = AIPanel(agents)
+        return [panel_step(journal, panel, policy_name, policy_text, step) for step in range(steps)], None
+    # All samples of an agent form one batch; agents run concurrently
+    with metrics.span("evaluation", mode="sampled"):
+        sampled = dict(zip([a.name for a in agents],
+                           fan_out(lambda agent: sample_agent(journal, agent, policy_name, policy_text, steps), agents)))
+    results = [{name: entry["samples"][step] for name, entry in sampled.items()} for step in range(steps)]
+    return results, {name: {"mean": entry["mean"], "variance": entry["variance"]} for name, entry in sampled.items()}
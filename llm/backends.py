@@ -0,0 +1,258 @@
+# llm/backends.py
+
+"""
+Pluggable offline backends for the LLM client layer, so pipelines can run and be profiled without Ollama.
+
+- RecordingClient: wraps a live client and appends every request/response (with latency) to a JSONL log
+- ReplayClient:    serves recorded responses back by request key, optionally sleeping a simulated latency
+- SyntheticClient: fabricates plausible scores and text from the prompt, deterministically and fast
+
+All three expose the same `generate(prompt, model=None, options=None, timeout=None, **params)` contract
+as llm.client.OllamaClient. Logs ending in .gz are gzip-compressed. Record to plain JSONL (the default) and
+compress offline: every line is flushed as it is written, so a killed run keeps all completed calls. A .gz
+log written by a run that crashed has no gzip trailer; replay keeps every entry before the cut, but entries
+appended to it by later runs are unreadable.
+
+Latency specs (for replay and synthetic modes):
+- "none"              no delay (default)
+- "recorded"          sleep the latency captured at record time
+- "fixed:S"           constant S seconds
+- "uniform:A,B"       uniform between A and B seconds
+- "lognormal:MU,SIGMA" lognormal with the given log-space parameters
+"""
+
+import gzip
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+import warnings
+import zlib
+from collections import defaultdict
+from typing import Callable, Dict, Iterator, Optional
+
+from llm.cache import request_key
+from llm.client import LLMError, join_prefix
+
+
+def _open_log(path: str, mode: str):
+    if path.endswith(".gz"):
+        return gzip.open(path, mode + "t", encoding="utf-8")
+    return open(path, mode, encoding="utf-8")
+
+
+def read_log(path: str) -> Iterator[Dict]:
+    """
+    Yield the entries of a recording log, stopping cleanly at a truncated gzip stream and skipping a
+    partial last line, so a log cut short by a crash still replays everything completed before it.
+    """
+    with _open_log(path, "r") as f:
+        try:
+            for line in f:
+                if not line.strip():
+                    continue
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    warnings.warn(f"{path}: skipping truncated entry")
+        except (EOFError, zlib.error, gzip.BadGzipFile) as e:
+            warnings.warn(f"{path}: log is truncated ({e}); replaying the entries read so far")
+
+
+def latency_sampler(spec: Optional[str], seed: int = 0) -> Callable[[float], float]:
+    """Build a function mapping a recorded latency to the delay to simulate."""
+    rng = random.Random(seed)
+    kind, _, args = (spec or "none").partition(":")
+    values = [float(v) for v in args.split(",") if v]
+    if kind == "none":
+        return lambda recorded: 0.0
+    if kind == "recorded":
+        return lambda recorded: recorded
+    if kind == "fixed":
+        return lambda recorded: values[0]
+    if kind == "uniform":
+        return lambda recorded: rng.uniform(values[0], values[1])
+    if kind == "lognormal":
+        return lambda recorded: rng.lognormvariate(values[0], values[1])
+    raise ValueError(f"unknown latency spec {spec!r}")
+
+
+class RecordingClient:
+    """Wraps a client and appends one compact JSON line per call: key, model, response, latency."""
+
+    def __init__(self, client, path: str):
+        self.client = client
+        self.path = path
+        self._lock = threading.Lock()
+        self._log = _open_log(path, "a")
+
+    @property
+    def model(self):
+        return self.client.model
+
+    def _write(self, key: str, model: str, response: str, start: float) -> None:
+        entry = {"k": key, "m": model, "r": response, "t": round(time.perf_counter() - start, 4)}
+        with self._lock:
+            self._log.write(json.dumps(entry, separators=(",", ":")) + "\n")
+            self._log.flush()
+
+    def generate(self, prompt: str, model: Optional[str] = None, options: Optional[Dict] = None,
+                 timeout: Optional[float] = None, **params) -> str:
+        model = model or self.client.model
+        merged = {**getattr(self.client, "options", {}), **(options or {})}
+        start = time.perf_counter()
+        response = self.client.generate(prompt, model=model, options=options, timeout=timeout, **params)
+        self._write(request_key(model, prompt, merged, params), model, response, start)
+        return response
+
+    def stream(self, prompt: str, model: Optional[str] = None, options: Optional[Dict] = None,
+               timeout: Optional[float] = None, **params):
+        """Streaming variant; records the text the consumer read, even if it stopped early."""
+        model = model or self.client.model
+        merged = {**getattr(self.client, "options", {}), **(options or {})}
+        key = request_key(model, prompt, merged, {**params, "stream": True})
+        start = time.perf_counter()
+        if hasattr(self.client, "stream"):
+            chunks = self.client.stream(prompt, model=model, options=options, timeout=timeout, **params)
+        else:
+            chunks = iter([self.client.generate(prompt, model=model, options=options, timeout=timeout, **params)])
+        consumed = []
+        try:
+            for chunk in chunks:
+                consumed.append(chunk)
+                yield chunk
+        except GeneratorExit:
+            self._write(key, model, "".join(consumed), start)
+            raise
+        finally:
+            if hasattr(chunks, "close"):
+                chunks.close()
+        self._write(key, model, "".join(consumed), start)
+
+    def close(self):
+        with self._lock:
+            self._log.close()
+        self.client.close()
+
+
+class ReplayClient:
+    """
+    Serves responses from a RecordingClient log. Repeated identical requests get their recorded responses
+    in order, cycling when exhausted. Unknown requests go to `fallback` if given, else raise LLMError.
+    """
+
+    def __init__(self, path: str, latency: Optional[str] = None, fallback=None,
+                 model: str = "replay", options: Optional[Dict] = None, seed: int = 0):
+        self.path = path
+        self.model = model
+        self.options = dict(options or {})
+        self.fallback = fallback
+        self._delay = latency_sampler(latency, seed)
+        self._entries = defaultdict(list)
+        self._cursor = defaultdict(int)
+        self._lock = threading.Lock()
+        for entry in read_log(path):
+            self._entries[entry["k"]].append((entry["r"], entry.get("t", 0.0)))
+
+    def __len__(self):
+        return sum(len(v) for v in self._entries.values())
+
+    def generate(self, prompt: str, model: Optional[str] = None, options: Optional[Dict] = None,
+                 timeout: Optional[float] = None, **params) -> str:
+        return self._serve(prompt, model, options, timeout, params, stream=False)
+
+    def stream(self, prompt: str, model: Optional[str] = None, options: Optional[Dict] = None,
+               timeout: Optional[float] = None, **params):
+        yield self._serve(prompt, model, options, timeout, params, stream=True)
+
+    def _serve(self, prompt, model, options, timeout, params, stream):
+        model = model or self.model
+        key_params = {**params, "stream": True} if stream else params
+        key = request_key(model, prompt, {**self.options, **(options or {})}, key_params)
+        with self._lock:
+            recorded = self._entries.get(key)
+            if recorded:
+                response, latency = recorded[self._cursor[key] % len(recorded)]
+                self._cursor[key] += 1
+        if not recorded:
+            if self.fallback is None:
+                raise LLMError(f"no recorded response for request {key[:12]} (model {model})", retryable=False)
+            return self.fallback.generate(prompt, model=model, options=options, timeout=timeout, **params)
+        delay = self._delay(latency)
+        if delay > 0:
+            time.sleep(delay)
+        return response
+
+    def close(self):
+        pass
+
+
+_SCALE = re.compile(r"\b0\s*(?:\([^)]*\))?\s*(?:to|-|–)\s*(10|1)\b")
+_PHRASES = [
+    "balances support for vulnerable households with incentives to work",
+    "raises concerns about long-term fiscal sustainability",
+    "should phase in gradually and be reviewed against clear outcomes",
+    "needs stronger protection for displaced and older workers",
+    "rewards skill and effort without abandoning those left behind",
+    "could be funded through progressive taxation and automation levies",
+    "must remain simple enough to administer transparently",
+]
+
+
+class SyntheticClient:
+    """
+    Generates fast, deterministic stand-in responses. Prompts asking for a 0-1 or 0-10 rating get a
+    score in range followed by a one-sentence justification; JSON-format requests listing groups as
+    "- name: ..." lines get a {"scores": [...]} panel reply; everything else gets a short paragraph.
+    Identical prompts vary across calls (like sampling) but the whole sequence is reproducible per seed.
+    """
+
+    def __init__(self, seed: int = 0, latency: Optional[str] = None, model: str = "synthetic",
+                 options: Optional[Dict] = None):
+        self.seed = seed
+        self.model = model
+        self.options = dict(options or {})
+        self._delay = latency_sampler(latency, seed)
+        self._calls = defaultdict(int)
+        self._lock = threading.Lock()
+
+    def _rng(self, prompt: str) -> random.Random:
+        digest = hashlib.sha256(prompt.encode("utf-8")).hexdigest()
+        with self._lock:
+            n = self._calls[digest]
+            self._calls[digest] += 1
+        return random.Random(f"{self.seed}:{digest}:{n}")
+
+    def _sentence(self, rng: random.Random) -> str:
+        return f"This policy {rng.choice(_PHRASES)}."
+
+    def generate(self, prompt: str, model: Optional[str] = None, options: Optional[Dict] = None,
+                 timeout: Optional[float] = None, **params) -> str:
+        prompt = join_prefix(params.pop("prefix", None), prompt)
+        rng = self._rng(prompt)
+        delay = self._delay(0.0)
+        if delay > 0:
+            time.sleep(delay)
+        if params.get("format") == "json":
+            groups = re.findall(r"^- ([^:\n]+):", prompt, flags=re.MULTILINE)
+            return json.dumps({"scores": [
+                {"agent": name, "score": round(rng.uniform(0.0, 1.0), 2), "justification": self._sentence(rng)}
+                for name in groups
+            ]})
+        scale = _SCALE.search(prompt)
+        if scale:
+            top = int(scale.group(1))
+            score = round(rng.uniform(0.0, 1.0), 2) if top == 1 else rng.randint(0, 10)
+            if "only return a number" in prompt.lower():
+                return str(score)
+            return f"Score: {score}\n{self._sentence(rng)}"
+        return " ".join(f"This policy {phrase}." for phrase in rng.sample(_PHRASES, rng.randint(3, 5)))
+
+    def stream(self, prompt: str, model: Optional[str] = None, options: Optional[Dict] = None,
+               timeout: Optional[float] = None, **params):
+        yield from re.findall(r"\S+\s*", self.generate(prompt, model=model, options=options, timeout=timeout, **params))
+
+    def close(self):
+        pass
@@ -0,0 +1,213 @@
+# llm/cache.py
+
+"""
+Persistent, content-addressed cache for LLM responses.
+Entries live in a single SQLite file keyed by a hash of (model, prompt, sampling options, request params),
+with size- and age-based eviction and hit/miss counters.
+
+CachedClient wraps any client exposing `generate(prompt, model=None, options=None, timeout=None, **params)`
+and supports three modes:
+- read-through: serve hits from the cache, generate and store misses
+- refresh:      always generate and overwrite the cached entry
+- bypass:       never read or write the cache
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Optional
+
+from llm.client import join_prefix
+from telemetry import metrics
+
+DEFAULT_PATH = os.environ.get("LLM_CACHE_PATH", os.path.expanduser("~/.cache/sim-society/llm_cache.sqlite"))
+DEFAULT_MAX_BYTES = int(float(os.environ.get("LLM_CACHE_MAX_MB", 512)) * 1024 * 1024)
+DEFAULT_MAX_AGE = float(os.environ.get("LLM_CACHE_MAX_AGE_DAYS", 30)) * 86400
+MODES = ("read-through", "refresh", "bypass")
+
+# Run eviction every N writes rather than on every insert
+EVICT_EVERY = 64
+
+
+def request_key(model: str, prompt: str, options: Optional[Dict] = None, params: Optional[Dict] = None) -> str:
+    """
+    Stable hex digest identifying one generation request. A shared `prefix` param is folded into the
+    prompt, so split and unsplit calls for the same text share one key.
+    """
+    params = dict(params or {})
+    prompt = join_prefix(params.pop("prefix", None), prompt)
+    prompt_hash = hashlib.sha256(prompt.encode("utf-8")).hexdigest()
+    blob = json.dumps(
+        {"model": model, "prompt": prompt_hash, "options": options or {}, "params": params},
+        sort_keys=True, separators=(",", ":")
+    )
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    def __init__(self, path: str = DEFAULT_PATH, max_bytes: int = DEFAULT_MAX_BYTES, max_age: float = DEFAULT_MAX_AGE):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.evictions = 0
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            " key TEXT PRIMARY KEY, model TEXT, response TEXT,"
+            " size INTEGER, created REAL, accessed REAL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS responses_accessed ON responses(accessed)")
+        self._db.commit()
+        self.evict()
+
+    def get(self, key: str) -> Optional[str]:
+        now = time.time()
+        with self._lock:
+            row = self._db.execute("SELECT response, created FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None or now - row[1] > self.max_age:
+                self.misses += 1
+                return None
+            self._db.execute("UPDATE responses SET accessed = ? WHERE key = ?", (now, key))
+            self._db.commit()
+            self.hits += 1
+            return row[0]
+
+    def put(self, key: str, model: str, response: str) -> None:
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?)",
+                (key, model, response, len(response.encode("utf-8")), now, now)
+            )
+            self._db.commit()
+            self.writes += 1
+            due = self.writes % EVICT_EVERY == 0
+        if due:
+            self.evict()
+
+    def evict(self) -> int:
+        """Drop expired entries, then least-recently-used entries until under max_bytes. Returns rows removed."""
+        with self._lock:
+            removed = self._db.execute("DELETE FROM responses WHERE created < ?", (time.time() - self.max_age,)).rowcount
+            total = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+            if total > self.max_bytes:
+                excess = total - self.max_bytes
+                freed = 0
+                stale = []
+                for key, size in self._db.execute("SELECT key, size FROM responses ORDER BY accessed"):
+                    stale.append((key,))
+                    freed += size
+                    if freed >= excess:
+                        break
+                self._db.executemany("DELETE FROM responses WHERE key = ?", stale)
+                removed += len(stale)
+            self._db.commit()
+            self.evictions += removed
+            return removed
+
+    def stats(self) -> Dict:
+        with self._lock:
+            entries, size = self._db.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses").fetchone()
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "writes": self.writes,
+            "evictions": self.evictions,
+            "entries": entries,
+            "bytes": size,
+        }
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+class CachedClient:
+    """Wraps an LLM client with a ResponseCache; exposes the same generate() contract."""
+
+    def __init__(self, client, cache: ResponseCache, mode: str = "read-through"):
+        if mode not in MODES:
+            raise ValueError(f"unknown cache mode {mode!r}, expected one of {MODES}")
+        self.client = client
+        self.cache = cache
+        self.mode = mode
+
+    @property
+    def model(self):
+        return self.client.model
+
+    def generate(self, prompt: str, model: Optional[str] = None, options: Optional[Dict] = None,
+                 timeout: Optional[float] = None, **params) -> str:
+        if self.mode == "bypass":
+            return self.client.generate(prompt, model=model, options=options, timeout=timeout, **params)
+        model = model or self.client.model
+        merged = {**getattr(self.client, "options", {}), **(options or {})}
+        key = request_key(model, prompt, merged, params)
+        if self.mode == "read-through":
+            cached = self.cache.get(key)
+            if cached is not None:
+                metrics.note_cache("hit")
+                return cached
+        metrics.note_cache("miss" if self.mode == "read-through" else "refresh")
+        response = self.client.generate(prompt, model=model, options=options, timeout=timeout, **params)
+        self.cache.put(key, model, response)
+        return response
+
+    def stream(self, prompt: str, model: Optional[str] = None, options: Optional[Dict] = None,
+               timeout: Optional[float] = None, **params):
+        """
+        Streaming variant of generate(). Streamed entries are stored under their own key and hold the text
+        the consumer actually read, so an early-terminated scoring stream replays the same prefix.
+        """
+        if self.mode == "bypass":
+            yield from self._inner_stream(prompt, model, options, timeout, params)
+            return
+        if not hasattr(self.client, "stream"):
+            yield self.generate(prompt, model=model, options=options, timeout=timeout, **params)
+            return
+        model = model or self.client.model
+        merged = {**getattr(self.client, "options", {}), **(options or {})}
+        key = request_key(model, prompt, merged, {**params, "stream": True})
+        if self.mode == "read-through":
+            cached = self.cache.get(key)
+            if cached is not None:
+                metrics.note_cache("hit")
+                yield cached
+                return
+        metrics.note_cache("miss" if self.mode == "read-through" else "refresh")
+        consumed = []
+        chunks = self.client.stream(prompt, model=model, options=options, timeout=timeout, **params)
+        try:
+            for chunk in chunks:
+                consumed.append(chunk)
+                yield chunk
+        except GeneratorExit:
+            if consumed:
+                self.cache.put(key, model, "".join(consumed))
+            raise
+        finally:
+            chunks.close()
+        self.cache.put(key, model, "".join(consumed))
+
+    def _inner_stream(self, prompt, model, options, timeout, params):
+        stream = getattr(self.client, "stream", None)
+        if stream is None:
+            yield self.client.generate(prompt, model=model, options=options, timeout=timeout, **params)
+        else:
+            yield from stream(prompt, model=model, options=options, timeout=timeout, **params)
+
+    def close(self):
+        self.client.close()
+        self.cache.close()
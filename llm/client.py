@@ -0,0 +1,359 @@
+# llm/client.py
+
+"""
+Shared client for Ollama-compatible HTTP servers.
+Every agent and experiment script sends its prompts through one process-wide client that keeps
+pooled keep-alive connections to one or more servers, instead of forking `ollama run` per call.
+Servers are picked round-robin and failed calls are retried on the next server with backoff.
+
+Configuration (environment):
+- OLLAMA_HOSTS: comma-separated server URLs (falls back to OLLAMA_HOST, then http://localhost:11434)
+- OLLAMA_MODEL: default model name
+- OLLAMA_TIMEOUT / OLLAMA_RETRIES / OLLAMA_POOL_SIZE: per-call timeout (s), retries, connections per server
+- OLLAMA_KEEP_ALIVE: how long the server keeps the model loaded between calls (default 30m)
+- OLLAMA_REUSE_CONTEXT: 1 to evaluate shared prompt prefixes once and reuse their server-side context
+- LLM_CACHE_MODE: read-through | refresh | bypass (default) for the on-disk response cache in llm/cache.py
+- LLM_BACKEND: ollama (default) | record | replay | synthetic, see llm/backends.py
+- LLM_RECORD_PATH / LLM_LATENCY / LLM_SEED: record/replay log, simulated latency spec, synthetic seed
+"""
+
+import atexit
+import http.client
+import json
+import os
+import queue
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterator, List, Optional, Union
+from urllib.parse import urlsplit
+
+DEFAULT_HOSTS = os.environ.get("OLLAMA_HOSTS", os.environ.get("OLLAMA_HOST", "http://localhost:11434"))
+DEFAULT_MODEL = os.environ.get("OLLAMA_MODEL", "deepseek-r1")
+DEFAULT_TIMEOUT = float(os.environ.get("OLLAMA_TIMEOUT", 120))
+DEFAULT_RETRIES = int(os.environ.get("OLLAMA_RETRIES", 2))
+DEFAULT_POOL_SIZE = int(os.environ.get("OLLAMA_POOL_SIZE", 8))
+DEFAULT_KEEP_ALIVE = os.environ.get("OLLAMA_KEEP_ALIVE", "30m")
+DEFAULT_REUSE_CONTEXT = os.environ.get("OLLAMA_REUSE_CONTEXT", "0") == "1"
+# Upper bound on remembered prefix contexts per client
+MAX_PREFIX_CONTEXTS = 64
+
+# Errors that mean "this keep-alive connection went stale", worth one immediate retry on a fresh socket
+_STALE_ERRORS = (http.client.RemoteDisconnected, http.client.CannotSendRequest, ConnectionResetError, BrokenPipeError)
+
+
+def join_prefix(prefix: Optional[str], prompt: str) -> str:
+    """Full prompt text for a call made with a shared `prefix`; matches PromptTemplate's block separator."""
+    return f"{prefix}\n{prompt}" if prefix else prompt
+
+
+class LLMError(RuntimeError):
+    """Raised when a generation request could not be completed."""
+
+    def __init__(self, message, retryable=True):
+        super().__init__(message)
+        self.retryable = retryable
+
+
+class ConnectionPool:
+    """A bounded LIFO pool of keep-alive HTTP connections to a single server."""
+
+    def __init__(self, url: str, size: int = DEFAULT_POOL_SIZE):
+        parts = urlsplit(url if "://" in url else f"http://{url}")
+        self.url = url
+        self.https = parts.scheme == "https"
+        self.host = parts.hostname or "localhost"
+        self.port = parts.port or (443 if self.https else 80)
+        self.base_path = parts.path.rstrip("/")
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(size)
+
+    def _connect(self, timeout):
+        cls = http.client.HTTPSConnection if self.https else http.client.HTTPConnection
+        return cls(self.host, self.port, timeout=timeout)
+
+    def _checkout(self, timeout):
+        try:
+            conn = self._idle.get_nowait()
+        except queue.Empty:
+            return self._connect(timeout), False
+        conn.timeout = timeout
+        if conn.sock is not None:
+            conn.sock.settimeout(timeout)
+        return conn, True
+
+    def _send(self, method: str, path: str, body: Optional[bytes], timeout: float):
+        conn, reused = self._checkout(timeout)
+        headers = {"Content-Type": "application/json", "Connection": "keep-alive"}
+        while True:
+            try:
+                conn.request(method, self.base_path + path, body=body, headers=headers)
+                return conn, conn.getresponse()
+            except _STALE_ERRORS:
+                conn.close()
+                if not reused:
+                    raise
+                conn, reused = self._connect(timeout), False
+            except BaseException:
+                conn.close()
+                raise
+
+    def _release(self, conn, response, reusable: bool):
+        if reusable and not response.will_close:
+            self._idle.put(conn)
+        else:
+            conn.close()
+
+    def request(self, method: str, path: str, body: Optional[bytes], timeout: float):
+        """Send one request and return (status, body bytes), reusing an idle connection if possible."""
+        self._slots.acquire()
+        try:
+            conn, response = self._send(method, path, body, timeout)
+            try:
+                data = response.read()
+            except BaseException:
+                conn.close()
+                raise
+            self._release(conn, response, True)
+            return response.status, data
+        finally:
+            self._slots.release()
+
+    def stream(self, method: str, path: str, body: Optional[bytes], timeout: float):
+        """
+        Send one request and yield (status, line) pairs as response lines arrive.
+        Closing the generator before the body is exhausted drops the connection, which makes the
+        server abort the generation; a fully read response returns its connection to the pool.
+        """
+        self._slots.acquire()
+        try:
+            conn, response = self._send(method, path, body, timeout)
+            finished = False
+            try:
+                for line in response:
+                    yield response.status, line
+                finished = True
+            finally:
+                self._release(conn, response, finished)
+        finally:
+            self._slots.release()
+
+    def close(self):
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                return
+
+
+class OllamaClient:
+    """
+    Thread-safe `prompt -> text` client for the Ollama /api/generate endpoint.
+    `options` are default sampling options (temperature, num_predict, ...) merged with per-call options.
+
+    Calls may pass `prefix=` with text shared by many prompts (policy, topic, instructions) and put only the
+    per-agent part in `prompt`. By default the two are simply joined, which keeps the shared text as a stable
+    prefix for the server's prompt cache. With `reuse_context` the prefix is evaluated once per model and its
+    returned context is sent with every later call instead of the prefix text. The prefix is primed in raw
+    mode (no chat template) and the token generated while priming is cut off, so the context holds exactly
+    the prefix tokens; the later prompt is then templated as the user turn after it. That differs from the
+    joined path, where the prefix sits inside the user turn, so outputs are close but not identical, which
+    is why reuse is opt-in.
+    """
+
+    def __init__(self, hosts: Union[str, List[str], None] = None, model: str = DEFAULT_MODEL,
+                 timeout: float = DEFAULT_TIMEOUT, retries: int = DEFAULT_RETRIES, backoff: float = 0.5,
+                 pool_size: int = DEFAULT_POOL_SIZE, options: Optional[Dict] = None,
+                 keep_alive: Optional[str] = DEFAULT_KEEP_ALIVE, reuse_context: bool = DEFAULT_REUSE_CONTEXT):
+        hosts = hosts or DEFAULT_HOSTS
+        if isinstance(hosts, str):
+            hosts = [h.strip() for h in hosts.split(",") if h.strip()]
+        self.pools = [ConnectionPool(h, pool_size) for h in hosts]
+        self.model = model
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.options = dict(options or {})
+        self.keep_alive = keep_alive
+        self.reuse_context = reuse_context
+        self._contexts = OrderedDict()
+        self._next = 0
+        self._lock = threading.Lock()
+
+    def _pick_pool(self) -> ConnectionPool:
+        with self._lock:
+            pool = self.pools[self._next % len(self.pools)]
+            self._next += 1
+        return pool
+
+    def build_payload(self, prompt: str, model: Optional[str] = None, options: Optional[Dict] = None, **params) -> Dict:
+        prefix = params.pop("prefix", None)
+        if prefix and self.reuse_context and "context" not in params:
+            params["context"] = self.prefix_context(prefix, model)
+        elif prefix:
+            prompt = join_prefix(prefix, prompt)
+        payload = {"model": model or self.model, "prompt": prompt, "stream": False}
+        if self.keep_alive is not None:
+            payload["keep_alive"] = self.keep_alive
+        merged = {**self.options, **(options or {})}
+        if merged:
+            payload["options"] = merged
+        payload.update(params)
+        return payload
+
+    def prefix_context(self, prefix: str, model: Optional[str] = None) -> List[int]:
+        """
+        Evaluate `prefix` once and return the server context for reuse: the prefix tokens only. Ollama has no
+        prompt-only mode (num_predict 0 means unlimited), so one token is generated and dropped again.
+        """
+        key = (model or self.model, prefix)
+        with self._lock:
+            if key in self._contexts:
+                self._contexts.move_to_end(key)
+                return self._contexts[key]
+        payload = self.build_payload(prefix, model, {"num_predict": 1}, raw=True)
+
+        def prefix_tokens(reply: Dict) -> List[int]:
+            context = reply["context"]
+            return context[:len(context) - reply.get("eval_count", 0)]
+
+        context = self._post(json.dumps(payload).encode("utf-8"), self.timeout, prefix_tokens)
+        with self._lock:
+            self._contexts[key] = context
+            while len(self._contexts) > MAX_PREFIX_CONTEXTS:
+                self._contexts.popitem(last=False)
+        return context
+
+    def generate(self, prompt: str, model: Optional[str] = None, options: Optional[Dict] = None,
+                 timeout: Optional[float] = None, **params) -> str:
+        """
+        Generate a completion for `prompt` and return the stripped response text.
+        Extra keyword arguments (prefix, format, keep_alive, system, ...) are passed through to the request body.
+        Raises LLMError once all retries are exhausted.
+        """
+        payload = self.build_payload(prompt, model, options, **params)
+        return self._post(json.dumps(payload).encode("utf-8"), timeout or self.timeout,
+                          lambda reply: reply["response"].strip())
+
+    def _post(self, body: bytes, timeout: float, parse: Callable[[Dict], Any]) -> Any:
+        """POST to /api/generate and return parse(reply JSON), retrying on the next server with backoff."""
+        last_error = None
+        for attempt in range(self.retries + 1):
+            pool = self._pick_pool()
+            try:
+                status, data = pool.request("POST", "/api/generate", body, timeout)
+                if status >= 400:
+                    detail = data.decode("utf-8", errors="replace")[:200]
+                    raise LLMError(f"{pool.url} returned HTTP {status}: {detail}", retryable=status >= 500 or status == 429)
+                return parse(json.loads(data))
+            except LLMError as e:
+                if not e.retryable:
+                    raise
+                last_error = e
+            except (OSError, http.client.HTTPException, ValueError, KeyError) as e:
+                last_error = e
+            if attempt < self.retries:
+                time.sleep(self.backoff * (2 ** attempt))
+        raise LLMError(f"generation failed after {self.retries + 1} attempts: {last_error}")
+
+    def stream(self, prompt: str, model: Optional[str] = None, options: Optional[Dict] = None,
+               timeout: Optional[float] = None, **params) -> Iterator[str]:
+        """
+        Yield response text chunks as the server generates them. Closing the iterator early (e.g. once a
+        score has been parsed) cancels the generation. Retries only happen before the first chunk arrives.
+        """
+        payload = self.build_payload(prompt, model, options, **params)
+        payload["stream"] = True
+        body = json.dumps(payload).encode("utf-8")
+        timeout = timeout or self.timeout
+        last_error = None
+        for attempt in range(self.retries + 1):
+            pool = self._pick_pool()
+            started = False
+            lines = pool.stream("POST", "/api/generate", body, timeout)
+            try:
+                for status, line in lines:
+                    if status >= 400:
+                        detail = line.decode("utf-8", errors="replace")[:200]
+                        raise LLMError(f"{pool.url} returned HTTP {status}: {detail}", retryable=status >= 500 or status == 429)
+                    if not line.strip():
+                        continue
+                    chunk = json.loads(line)
+                    if "error" in chunk:
+                        raise LLMError(f"{pool.url} error: {chunk['error']}", retryable=False)
+                    started = True
+                    if chunk.get("response"):
+                        yield chunk["response"]
+                return
+            except LLMError as e:
+                if started or not e.retryable:
+                    raise
+                last_error = e
+            except (OSError, http.client.HTTPException, ValueError) as e:
+                if started:
+                    raise LLMError(f"stream interrupted: {e}")
+                last_error = e
+            finally:
+                lines.close()
+            if attempt < self.retries:
+                time.sleep(self.backoff * (2 ** attempt))
+        raise LLMError(f"generation failed after {self.retries + 1} attempts: {last_error}")
+
+    def close(self):
+        for pool in self.pools:
+            pool.close()
+
+
+_default_client = None
+_default_lock = threading.Lock()
+
+
+def _client_from_env():
+    client = _backend_from_env()
+    from telemetry import metrics
+    if metrics.enabled():
+        from llm.instrumented import InstrumentedClient
+        client = InstrumentedClient(client, backend=os.environ.get("LLM_BACKEND", "ollama"))
+    return client
+
+
+def _backend_from_env():
+    backend = os.environ.get("LLM_BACKEND", "ollama")
+    record_path = os.environ.get("LLM_RECORD_PATH", "llm_record.jsonl")
+    latency = os.environ.get("LLM_LATENCY")
+    seed = int(os.environ.get("LLM_SEED", 0))
+    if backend not in ("ollama", "record", "replay", "synthetic"):
+        raise ValueError(f"unknown LLM_BACKEND {backend!r}")
+    if backend in ("replay", "synthetic"):
+        from llm.backends import ReplayClient, SyntheticClient
+        if backend == "synthetic":
+            return SyntheticClient(seed=seed, latency=latency, model=DEFAULT_MODEL)
+        return ReplayClient(record_path, latency=latency, model=DEFAULT_MODEL, seed=seed)
+
+    client = OllamaClient()
+    mode = os.environ.get("LLM_CACHE_MODE", "bypass")
+    if mode != "bypass":
+        from llm.cache import CachedClient, ResponseCache
+        client = CachedClient(client, ResponseCache(), mode)
+        atexit.register(lambda: print(f"LLM cache ({mode}): {client.cache.stats()}"))
+    if backend == "record":
+        from llm.backends import RecordingClient
+        client = RecordingClient(client, record_path)
+        atexit.register(client.close)
+    return client
+
+
+def get_default_client():
+    """Return the process-wide client, creating it from the environment on first use."""
+    global _default_client
+    with _default_lock:
+        if _default_client is None:
+            _default_client = _client_from_env()
+        return _default_client
+
+
+def set_default_client(client) -> None:
+    """Replace the process-wide client, e.g. to point every agent at a stub server."""
+    global _default_client
+    with _default_lock:
+        _default_client = client
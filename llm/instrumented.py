@@ -0,0 +1,83 @@
+# llm/instrumented.py
+
+"""
+Client wrapper that feeds every LLM call into telemetry/metrics.py.
+
+Per call it records latency, prompt size (prefix + prompt) and response size in characters, the outcome
+("ok", "timeout", "error", or "stopped" for a stream the consumer closed early) and, when a CachedClient
+sits underneath, whether the response was a cache hit or miss. Only installed by get_default_client() when
+SIM_TELEMETRY=1, so disabled runs pay nothing per call.
+"""
+
+import socket
+import time
+from typing import Dict, Optional
+
+from telemetry import metrics
+
+
+def _outcome(error: BaseException) -> str:
+    if isinstance(error, (socket.timeout, TimeoutError)) or "timed out" in str(error):
+        return "timeout"
+    return "error"
+
+
+class InstrumentedClient:
+    """Wraps an LLM client; exposes the same generate()/stream() contract."""
+
+    def __init__(self, client, backend: str = "ollama"):
+        self.client = client
+        self.backend = backend
+
+    @property
+    def model(self):
+        return self.client.model
+
+    def _record(self, kind: str, outcome: str, start: float, prompt: str, params: Dict, response: str) -> None:
+        cache = metrics.take_cache_status() or "none"
+        metrics.inc("llm_calls_total", backend=self.backend, kind=kind, outcome=outcome, cache=cache)
+        metrics.observe("llm_call_duration_seconds", time.perf_counter() - start, kind=kind, cache=cache)
+        metrics.observe("llm_prompt_chars", len(prompt) + len(params.get("prefix") or ""), kind=kind)
+        metrics.observe("llm_response_chars", len(response), kind=kind)
+
+    def generate(self, prompt: str, model: Optional[str] = None, options: Optional[Dict] = None,
+                 timeout: Optional[float] = None, **params) -> str:
+        metrics.take_cache_status()
+        start = time.perf_counter()
+        try:
+            response = self.client.generate(prompt, model=model, options=options, timeout=timeout, **params)
+        except Exception as e:
+            self._record("generate", _outcome(e), start, prompt, params, "")
+            raise
+        self._record("generate", "ok", start, prompt, params, response)
+        return response
+
+    def stream(self, prompt: str, model: Optional[str] = None, options: Optional[Dict] = None,
+               timeout: Optional[float] = None, **params):
+        """Streaming variant; latency runs until the stream ends or the consumer closes it."""
+        metrics.take_cache_status()
+        start = time.perf_counter()
+        chunks, consumed, outcome = None, [], "ok"
+        try:
+            if hasattr(self.client, "stream"):
+                chunks = self.client.stream(prompt, model=model, options=options, timeout=timeout, **params)
+            else:
+                chunks = iter([self.client.generate(prompt, model=model, options=options, timeout=timeout, **params)])
+            for chunk in chunks:
+                consumed.append(chunk)
+                yield chunk
+        except GeneratorExit:
+            outcome = "stopped"
+            raise
+        except Exception as e:
+            outcome = _outcome(e)
+            raise
+        finally:
+            if chunks is not None and hasattr(chunks, "close"):
+                chunks.close()
+            self._record("stream", outcome, start, prompt, params, "".join(consumed))
+
+    def close(self):
+        close = getattr(self.client, "close", None)
+        if close is not None:
+            close()
@@ -0,0 +1,64 @@
+# llm/sampling.py
+
+"""
+Multi-sample scoring: n samples of one prompt, scheduled as a single batch.
+
+Ollama has no server-side `n` parameter, so the samples are issued back-to-back through the same client,
+which keeps the pooled keep-alive connection and the loaded model warm and lets the server reuse the prefill
+of the identical prompt (or, with `max_workers` > 1, run them in the server's parallel slots). Sample i is
+sent with sampling option `seed = seed + i`, so samples are distinct, reproducible, and cached independently
+by CachedClient.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+
+
+def sample_options(options: Optional[Dict], seed: int, index: int) -> Dict:
+    return {**(options or {}), "seed": seed + index}
+
+
+def sample(client, prompt: str, n: int, model: Optional[str] = None, options: Optional[Dict] = None,
+           seed: int = 0, max_workers: int = 1, timeout: Optional[float] = None,
+           indices: Optional[Sequence[int]] = None, **params) -> List[str]:
+    """
+    Generate `n` samples of `prompt`, or only the samples numbered `indices` (e.g. the ones missing after a
+    crash; sample i always uses seed + i). A failed sample becomes "[ERROR] <message>" like call_ollama.
+    """
+    indices = list(range(n)) if indices is None else list(indices)
+
+    def one(index: int) -> str:
+        try:
+            return client.generate(prompt, model=model, options=sample_options(options, seed, index),
+                                   timeout=timeout, **params)
+        except Exception as e:
+            return f"[ERROR] {str(e)}"
+
+    if max_workers <= 1 or len(indices) <= 1:
+        return [one(i) for i in indices]
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(indices))) as pool:
+        return list(pool.map(one, indices))
+
+
+def summarize(scores: List[Optional[float]]) -> Dict:
+    """
+    Mean and unbiased variance of the sample scores (variance 0.0 for a single sample). None marks a failed
+    or unparseable sample; it is left out, and "n" counts only the scored samples.
+    """
+    values = np.asarray([s for s in scores if s is not None], dtype=np.float64)
+    return {
+        "n": len(values),
+        "mean": float(values.mean()) if len(values) else None,
+        "variance": float(values.var(ddof=1)) if len(values) > 1 else 0.0,
+    }
+
+
+def sample_scores(client, prompt: str, n: int, parse: Callable[[str], Dict], **kwargs) -> Dict:
+    """
+    Sample `prompt` n times and parse each response with `parse(text) -> {"score", "justification", ...}`.
+    Returns {"samples": [parsed, ...], "n", "mean", "variance"}; keyword arguments go to sample().
+    """
+    samples = [parse(text) for text in sample(client, prompt, n, **kwargs)]
+    return {"samples": samples, **summarize([s["score"] for s in samples])}
@@ -0,0 +1,116 @@
+# llm/streaming.py
+
+"""
+Streaming consumption with early termination.
+Scoring prompts only need one number (and maybe a sentence of reasoning), so instead of waiting for the
+full completion we parse tokens as they arrive and close the stream, which cancels server-side generation,
+as soon as the parser is satisfied. Text inside <think>...</think> reasoning traces is ignored.
+"""
+
+import re
+from typing import Dict, Optional
+
+_NUMBER = re.compile(r"(?<![\w./])(\d+(?:\.\d+)?)")
+# Scale bounds echoed from the prompt ("on a scale of 0 to 1", "0-10", "out of 10") are not scores
+_RANGE_AFTER = re.compile(r"\s*(?:to|-|–|—)\s*\d")
+_RANGE_AFTER_PENDING = re.compile(r"\s*(?:t|to|-|–|—)?\s*")
+_RANGE_BEFORE = re.compile(r"(?:\d\s*(?:to|-|–|—)|\bout of|\bscale of)\s*$", re.IGNORECASE)
+_SENTENCE_END = re.compile(r"[.!?](?=\s)")
+
+
+def visible_text(text: str) -> str:
+    """Strip closed <think> blocks and anything after an unclosed <think> tag."""
+    text = re.sub(r"<think>.*?</think>", "", text, flags=re.DOTALL)
+    return text.split("<think>", 1)[0]
+
+
+class ScoreParser:
+    """
+    Incrementally extracts the first score within [low, high] from streamed text, optionally followed by
+    a one-sentence justification. List enumerators ("1. "), denominators ("/10", "out of 10") and scale
+    bounds echoed from the prompt ("a scale of 0 to 1", "0-10") are not scores.
+    """
+
+    def __init__(self, low: float = 0.0, high: float = 1.0, justification: bool = True, max_justification: int = 400):
+        self.low = low
+        self.high = high
+        self.want_justification = justification
+        self.max_justification = max_justification
+        self.text = ""
+        self.score = None
+        self.justification = None
+        self._after = None
+
+    def _find_score(self, visible: str, final: bool = False):
+        for match in _NUMBER.finditer(visible):
+            end = match.end()
+            rest = visible[end:end + 2]
+            # A number touching the end of the buffer may still be growing ("0" -> "0.75")
+            if not final and len(rest) < 2 and not (rest and rest[0] not in ".0123456789"):
+                return None
+            if _RANGE_BEFORE.search(visible, 0, match.start()) or _RANGE_AFTER.match(visible, end):
+                continue
+            # ... or may still turn out to open a range ("0" -> "0 to 1")
+            if not final and _RANGE_AFTER_PENDING.fullmatch(visible, end):
+                return None
+            if "." not in match.group(1) and rest.startswith(".") and (len(rest) < 2 or rest[1].isspace()):
+                line_start = visible.rfind("\n", 0, match.start()) + 1
+                if not visible[line_start:match.start()].strip(" *#-"):
+                    continue  # enumerator such as "1. Score: 8"
+            value = float(match.group(1))
+            if self.low <= value <= self.high:
+                return value, end
+        return None
+
+    def feed(self, chunk: str) -> bool:
+        """Consume a chunk of text; return True once nothing more is needed."""
+        self.text += chunk
+        visible = visible_text(self.text)
+        if self.score is None:
+            found = self._find_score(visible)
+            if found is None:
+                return False
+            self.score, self._after = found
+            if not self.want_justification:
+                return True
+        tail = visible[self._after:].lstrip(" .,:/*-–—)\n0123456789")
+        for end in _SENTENCE_END.finditer(tail):
+            if any(c.isalpha() for c in tail[:end.end()]):
+                self.justification = tail[:end.end()].strip()
+                return True
+        if len(tail) >= self.max_justification:
+            self.justification = tail.strip()
+            return True
+        return False
+
+    def finish(self) -> None:
+        """Settle the result once the stream has ended without the parser being satisfied."""
+        visible = visible_text(self.text) + " "
+        if self.score is None:
+            found = self._find_score(visible, final=True)
+            if found is not None:
+                self.score, self._after = found
+        if self.score is not None and self.justification is None and self.want_justification:
+            self.justification = visible[self._after:].strip(" .,:/*-–—)\n") or None
+
+
+def generate_until(client, prompt: str, parser: ScoreParser, model: Optional[str] = None,
+                   options: Optional[Dict] = None, timeout: Optional[float] = None, **params) -> str:
+    """
+    Stream `prompt` through `client` into `parser`, stopping generation as soon as the parser is done.
+    Clients without a stream() method fall back to a full generate(). Returns the text consumed.
+    """
+    stream = getattr(client, "stream", None)
+    if stream is None:
+        parser.feed(client.generate(prompt, model=model, options=options, timeout=timeout, **params))
+        parser.finish()
+        return parser.text.strip()
+    chunks = stream(prompt, model=model, options=options, timeout=timeout, **params)
+    try:
+        for chunk in chunks:
+            if parser.feed(chunk):
+                return parser.text.strip()
+    finally:
+        chunks.close()
+    parser.finish()
+    return parser.text.strip()
@@ -0,0 +1,99 @@
+# llm/templates.py
+
+"""
+Composable prompt templates.
+A PromptTemplate is an ordered list of named blocks (persona, topic, task, ...), each a str.format
+template parsed once at construction. Variants are declared as overlays that add, replace or remove
+blocks, so a topic or persona change produces one combined prompt for a single LLM call instead of
+wrapping one model output into another prompt.
+"""
+
+from string import Formatter
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+
+class PromptTemplate:
+    def __init__(self, blocks: Sequence[Tuple[str, str]], sep: str = "\n"):
+        self.blocks: List[Tuple[str, str]] = list(blocks)
+        self.sep = sep
+        # "values[0]" and "agent.name" both need the root name "values" / "agent"
+        self._block_fields = [
+            {field.split("[", 1)[0].split(".", 1)[0] for _, field, _, _ in Formatter().parse(text) if field}
+            for _, text in self.blocks
+        ]
+        self.fields = set().union(*self._block_fields)
+
+    def render(self, **values) -> str:
+        prefix, rest = self.render_split((), **values)
+        return self.sep.join(part for part in (prefix, rest) if part)
+
+    def render_split(self, private: Iterable[str], **values) -> Tuple[str, str]:
+        """
+        Render as (shared prefix, remainder). The prefix is the run of leading blocks that use none of the
+        `private` fields (e.g. the agent's name and values), so it is identical across agents.
+        """
+        missing = self.fields - values.keys()
+        if missing:
+            raise KeyError(f"prompt template is missing values for {sorted(missing)}")
+        private = set(private)
+        split = len(self.blocks)
+        for i, fields in enumerate(self._block_fields):
+            if fields & private:
+                split = i
+                break
+        parts = [text.format_map(values) for _, text in self.blocks]
+        prefix = self.sep.join(part for part in parts[:split] if part)
+        rest = self.sep.join(part for part in parts[split:] if part)
+        return prefix, rest
+
+    def overlay(self, blocks: Dict[str, Optional[str]], before: Optional[str] = None) -> "PromptTemplate":
+        """
+        Return a new template where existing blocks named in `blocks` are replaced (or removed when the
+        value is None) and new blocks are inserted before the block named `before` (default: at the end).
+        """
+        names = [name for name, _ in self.blocks]
+        merged = [(name, blocks.get(name, text)) for name, text in self.blocks]
+        added = [(name, text) for name, text in blocks.items() if name not in names and text is not None]
+        at = names.index(before) if before in names else len(merged)
+        merged[at:at] = added
+        return PromptTemplate([(name, text) for name, text in merged if text is not None], self.sep)
+
+    def reorder(self, order: Iterable[str]) -> "PromptTemplate":
+        """Return a new template with the named blocks first, in the given order, followed by the rest."""
+        order = [name for name in order if name in dict(self.blocks)]
+        rest = [(name, text) for name, text in self.blocks if name not in order]
+        lookup = dict(self.blocks)
+        return PromptTemplate([(name, lookup[name]) for name in order] + rest, self.sep)
+
+
+class PromptSet:
+    """
+    A named collection of PromptTemplates (e.g. one per deliberation phase) that can be overlaid together.
+    An optional `layout` fixes the block order of every template, also after overlays, e.g. shared
+    topic/statement/instruction blocks first and the per-agent persona last.
+    """
+
+    def __init__(self, templates: Dict[str, PromptTemplate], layout: Optional[Sequence[str]] = None):
+        self.layout = tuple(layout) if layout else None
+        self.templates = {
+            name: template.reorder(self.layout) if self.layout else template
+            for name, template in templates.items()
+        }
+
+    def __getitem__(self, name: str) -> PromptTemplate:
+        return self.templates[name]
+
+    def render(self, template: str, /, **values) -> str:
+        return self.templates[template].render(**values)
+
+    def render_split(self, template: str, private: Iterable[str], /, **values) -> Tuple[str, str]:
+        return self.templates[template].render_split(private, **values)
+
+    def overlay(self, blocks: Dict[str, Optional[str]], before: Optional[str] = None,
+                only: Optional[Iterable[str]] = None) -> "PromptSet":
+        """Apply the same block overlay to every template, or just to those named in `only`."""
+        only = set(only) if only is not None else set(self.templates)
+        return PromptSet({
+            name: template.overlay(blocks, before) if name in only else template
+            for name, template in self.templates.items()
+        }, self.layout)
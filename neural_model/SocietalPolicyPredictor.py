@@ -1,4 +1,4 @@
-# neural_model/transformer.py
+# neural_model/SocietalPolicyPredictor.py
 
 """
 Defines the SocialPolicyPredictor model — a simple feedforward neural network that
@@ -0,0 +1,90 @@
+# neural_model/benchmark_inference.py
+
+"""
+Benchmarks PolicyPredictor in each inference mode (eager, int8, torchscript):
+- single:  one row per call, called back to back (p50/p99 latency, rows/sec)
+- bulk:    BULK_ROWS rows per call (rows/sec)
+- batched: CLIENTS threads sending single rows through a MicroBatcher (per-request p50/p99, rows/sec)
+
+Uses the trained model and scaler when present, otherwise an untrained model of the same shape.
+Run from the repository root: python -m neural_model.benchmark_inference
+"""
+
+import os
+import threading
+import time
+
+import numpy as np
+
+from neural_model.inference import MODEL_PATH, MODES, SCALER_PATH, MicroBatcher, PolicyPredictor
+from neural_model.SocietalPolicyPredictor import SocialPolicyPredictor
+
+INPUT_DIM = 14
+OUTPUT_DIM = 5
+SINGLE_CALLS = 2000
+BULK_ROWS = 4096
+BULK_CALLS = 50
+CLIENTS = 16
+REQUESTS_PER_CLIENT = 200
+
+
+def make_predictor(mode):
+    if os.path.exists(MODEL_PATH) and os.path.exists(SCALER_PATH):
+        return PolicyPredictor.load(mode=mode)
+    return PolicyPredictor(SocialPolicyPredictor(INPUT_DIM, OUTPUT_DIM), np.zeros(INPUT_DIM), np.ones(INPUT_DIM), mode=mode)
+
+
+def percentiles(latencies):
+    return np.percentile(np.asarray(latencies) * 1000, [50, 99])
+
+
+def bench_single(predictor, rows):
+    latencies = []
+    for row in rows[:SINGLE_CALLS]:
+        start = time.perf_counter()
+        predictor.predict(row)
+        latencies.append(time.perf_counter() - start)
+    return percentiles(latencies), len(latencies) / sum(latencies)
+
+
+def bench_bulk(predictor, rows):
+    start = time.perf_counter()
+    for _ in range(BULK_CALLS):
+        predictor.predict(rows[:BULK_ROWS])
+    return BULK_ROWS * BULK_CALLS / (time.perf_counter() - start)
+
+
+def bench_batched(predictor, rows):
+    batcher = MicroBatcher(predictor)
+    latencies = [[] for _ in range(CLIENTS)]
+
+    def client(i):
+        for j in range(REQUESTS_PER_CLIENT):
+            start = time.perf_counter()
+            batcher.predict(rows[(i * REQUESTS_PER_CLIENT + j) % len(rows)])
+            latencies[i].append(time.perf_counter() - start)
+
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(CLIENTS)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    batcher.close()
+    flat = [latency for client_latencies in latencies for latency in client_latencies]
+    return percentiles(flat), len(flat) / elapsed, batcher.rows / max(1, batcher.batches)
+
+
+if __name__ == "__main__":
+    rows = np.random.default_rng(0).normal(size=(BULK_ROWS, INPUT_DIM)).astype(np.float32)
+    print(f"{'mode':>12} {'single p50/p99 ms':>18} {'single rows/s':>14} {'bulk rows/s':>12} "
+          f"{'batched p50/p99 ms':>19} {'batched rows/s':>15} {'avg batch':>10}")
+    for mode in MODES:
+        predictor = make_predictor(mode)
+        predictor.predict(rows[:64])  # warm-up
+        (s50, s99), single_rate = bench_single(predictor, rows)
+        bulk_rate = bench_bulk(predictor, rows)
+        (b50, b99), batched_rate, avg_batch = bench_batched(predictor, rows)
+        print(f"{mode:>12} {s50:>8.3f} / {s99:<7.3f} {single_rate:>14,.0f} {bulk_rate:>12,.0f} "
+              f"{b50:>9.3f} / {b99:<7.3f} {batched_rate:>15,.0f} {avg_batch:>10.1f}")
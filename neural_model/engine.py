@@ -0,0 +1,140 @@
+# neural_model/engine.py
+
+"""
+Training engine for SocialPolicyPredictor (and any regression nn.Module).
+
+Batches are slices of in-memory tensors: each epoch gathers the training set once in a fresh random
+order, and every batch is then a contiguous view, so there is no per-sample DataLoader/collate overhead.
+Also handles intra-op thread count, optional torch.compile, learning-rate scaling for large batches,
+validation on a held-out split with early stopping, and per-epoch checkpoints that a later run can resume.
+Throughput is reported as training samples per second.
+"""
+
+import math
+import os
+import time
+from typing import Callable, Dict, Iterator, Optional, Tuple
+
+import torch
+import torch.nn as nn
+import torch.optim as optim
+
+BASE_BATCH_SIZE = 64
+LR_SCALING = ("linear", "sqrt", None)
+
+
+def scaled_lr(lr: float, batch_size: int, base_batch_size: int = BASE_BATCH_SIZE, scaling: Optional[str] = "sqrt") -> float:
+    """Scale a learning rate tuned at `base_batch_size` to `batch_size` (linear or square-root rule)."""
+    if scaling not in LR_SCALING:
+        raise ValueError(f"unknown lr scaling {scaling!r}, expected one of {LR_SCALING}")
+    ratio = batch_size / base_batch_size
+    return lr * (ratio if scaling == "linear" else math.sqrt(ratio) if scaling == "sqrt" else 1.0)
+
+
+def iterate_batches(X: torch.Tensor, y: torch.Tensor, batch_size: int,
+                    generator: Optional[torch.Generator] = None) -> Iterator[Tuple[torch.Tensor, torch.Tensor]]:
+    """One epoch of shuffled batches: a single gather into permuted order, then contiguous slices."""
+    order = torch.randperm(len(X), generator=generator)
+    X, y = X[order], y[order]
+    for start in range(0, len(X), batch_size):
+        yield X[start:start + batch_size], y[start:start + batch_size]
+
+
+def evaluate(model: nn.Module, X: torch.Tensor, y: torch.Tensor, criterion: nn.Module, batch_size: int = 8192) -> float:
+    model.eval()
+    total = 0.0
+    with torch.no_grad():
+        for start in range(0, len(X), batch_size):
+            batch_X, batch_y = X[start:start + batch_size], y[start:start + batch_size]
+            total += criterion(model(batch_X), batch_y).item() * len(batch_X)
+    model.train()
+    return total / max(1, len(X))
+
+
+def _save_checkpoint(path: str, state: Dict) -> None:
+    if os.path.dirname(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.tmp"
+    torch.save(state, tmp)
+    os.replace(tmp, path)
+
+
+def fit(model: nn.Module, X_train: torch.Tensor, y_train: torch.Tensor,
+        X_val: Optional[torch.Tensor] = None, y_val: Optional[torch.Tensor] = None,
+        epochs: int = 20, batch_size: int = BASE_BATCH_SIZE, lr: float = 0.001,
+        lr_scaling: Optional[str] = "sqrt", threads: Optional[int] = None, compile: bool = False,
+        patience: Optional[int] = None, min_delta: float = 0.0,
+        checkpoint_path: Optional[str] = None, resume: bool = False,
+        seed: int = 42, log: Callable[[str], None] = print) -> Dict:
+    """
+    Train `model` with Adam on MSE and return the history
+    {"train_loss": [...], "val_loss": [...], "samples_per_sec": [...], "best_epoch": int, "stopped_early": bool}.
+
+    `lr` is the rate for BASE_BATCH_SIZE and is rescaled for larger batches per `lr_scaling`. With a
+    validation split, training stops after `patience` epochs without a `min_delta` improvement and the
+    best weights are restored. With `checkpoint_path`, model, optimizer, RNG and history are saved after
+    every epoch, and `resume=True` continues from an existing checkpoint.
+    """
+    if threads:
+        torch.set_num_threads(threads)
+    criterion = nn.MSELoss()
+    optimizer = optim.Adam(model.parameters(), lr=scaled_lr(lr, batch_size, scaling=lr_scaling))
+    generator = torch.Generator().manual_seed(seed)
+    history = {"train_loss": [], "val_loss": [], "samples_per_sec": [], "best_epoch": None, "stopped_early": False}
+    best_val, best_state, start_epoch, stale = math.inf, None, 0, 0
+
+    if resume and checkpoint_path and os.path.exists(checkpoint_path):
+        checkpoint = torch.load(checkpoint_path, weights_only=False)
+        model.load_state_dict(checkpoint["model"])
+        optimizer.load_state_dict(checkpoint["optimizer"])
+        generator.set_state(checkpoint["generator"])
+        history, best_val, best_state = checkpoint["history"], checkpoint["best_val"], checkpoint["best_state"]
+        start_epoch, stale = checkpoint["epoch"] + 1, checkpoint["stale"]
+        if history["stopped_early"]:
+            start_epoch = epochs
+        log(f"Resumed from {checkpoint_path} at epoch {start_epoch + 1}")
+
+    # Compile a wrapper for the forward/backward passes; checkpoints keep the plain module's state_dict
+    step_model = torch.compile(model) if compile else model
+    model.train()
+    run_samples, run_start = 0, time.perf_counter()
+    for epoch in range(start_epoch, epochs):
+        epoch_loss, epoch_start = 0.0, time.perf_counter()
+        for batch_X, batch_y in iterate_batches(X_train, y_train, batch_size, generator):
+            optimizer.zero_grad(set_to_none=True)
+            loss = criterion(step_model(batch_X), batch_y)
+            loss.backward()
+            optimizer.step()
+            epoch_loss += loss.item() * len(batch_X)
+        throughput = len(X_train) / (time.perf_counter() - epoch_start)
+        run_samples += len(X_train)
+        history["train_loss"].append(epoch_loss / len(X_train))
+        history["samples_per_sec"].append(throughput)
+
+        message = f"Epoch {epoch+1}/{epochs}, Loss: {history['train_loss'][-1]:.4f}"
+        if X_val is not None:
+            val_loss = evaluate(step_model, X_val, y_val, criterion)
+            history["val_loss"].append(val_loss)
+            message += f", Val Loss: {val_loss:.4f}"
+            if val_loss < best_val - min_delta:
+                best_val, stale, history["best_epoch"] = val_loss, 0, epoch
+                best_state = {k: v.detach().clone() for k, v in model.state_dict().items()}
+            else:
+                stale += 1
+        log(f"{message}, {throughput:,.0f} samples/s")
+
+        history["stopped_early"] = patience is not None and stale >= patience
+        if checkpoint_path:
+            _save_checkpoint(checkpoint_path, {
+                "model": model.state_dict(), "optimizer": optimizer.state_dict(), "generator": generator.get_state(),
+                "history": history, "best_val": best_val, "best_state": best_state, "epoch": epoch, "stale": stale,
+            })
+        if history["stopped_early"]:
+            log(f"Early stopping: no validation improvement for {patience} epochs")
+            break
+
+    if best_state is not None:
+        model.load_state_dict(best_state)
+    if run_samples:
+        log(f"Trained on {run_samples:,} samples at {run_samples / (time.perf_counter() - run_start):,.0f} samples/s")
+    return history
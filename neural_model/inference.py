@@ -0,0 +1,144 @@
+# neural_model/inference.py
+
+"""
+Inference for the trained SocialPolicyPredictor.
+
+PolicyPredictor loads `policy_model.pt` together with the feature scaler persisted by train.py
+(`policy_scaler.json`) once, and predicts metric vectors for raw (category-encoded, unscaled) feature rows,
+one row or many at a time. The model can run as-is ("eager"), with dynamic int8 quantization of its
+Linear layers ("int8"), or as a frozen TorchScript module ("torchscript").
+
+MicroBatcher serves many concurrent callers: requests wait in a queue until either `max_batch` rows have
+been collected or the oldest request has waited `max_latency` seconds, then run as one forward pass.
+"""
+
+import json
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import List, Optional, Sequence
+
+import numpy as np
+import torch
+import torch.nn as nn
+
+from neural_model.SocietalPolicyPredictor import SocialPolicyPredictor
+
+MODEL_PATH = "./neural_model/policy_model.pt"
+SCALER_PATH = "./neural_model/policy_scaler.json"
+MODES = ("eager", "int8", "torchscript")
+
+
+def save_scaler(scaler, features: Sequence[str], path: str = SCALER_PATH) -> None:
+    """Persist a fitted sklearn StandardScaler and its feature order next to the model weights."""
+    with open(path, "w") as f:
+        json.dump({"features": list(features), "mean": scaler.mean_.tolist(), "scale": scaler.scale_.tolist()}, f)
+
+
+def prepare_model(model: nn.Module, mode: str = "eager") -> nn.Module:
+    if mode not in MODES:
+        raise ValueError(f"unknown inference mode {mode!r}, expected one of {MODES}")
+    model = model.eval()
+    if mode == "int8":
+        from torch.ao.quantization import quantize_dynamic
+        return quantize_dynamic(model, {nn.Linear}, dtype=torch.qint8)
+    if mode == "torchscript":
+        return torch.jit.freeze(torch.jit.script(model))
+    return model
+
+
+class PolicyPredictor:
+    def __init__(self, model: nn.Module, mean: Sequence[float], scale: Sequence[float],
+                 features: Optional[Sequence[str]] = None, mode: str = "eager"):
+        self.mean = np.asarray(mean, dtype=np.float32)
+        self.scale = np.asarray(scale, dtype=np.float32)
+        self.features = list(features) if features is not None else None
+        self.mode = mode
+        self.model = prepare_model(model, mode)
+
+    @classmethod
+    def load(cls, model_path: str = MODEL_PATH, scaler_path: str = SCALER_PATH, mode: str = "eager") -> "PolicyPredictor":
+        state = torch.load(model_path, map_location="cpu")
+        # Layer sizes follow from the saved weights: first Linear's input, last Linear's output
+        weights = [value for key, value in state.items() if key.endswith("weight")]
+        model = SocialPolicyPredictor(weights[0].shape[1], weights[-1].shape[0])
+        model.load_state_dict(state)
+        with open(scaler_path) as f:
+            scaler = json.load(f)
+        return cls(model, scaler["mean"], scaler["scale"], scaler.get("features"), mode)
+
+    def predict(self, rows) -> np.ndarray:
+        """Predict for one feature row (shape (d,) -> (k,)) or many (shape (n, d) -> (n, k))."""
+        rows = np.asarray(rows, dtype=np.float32)
+        single = rows.ndim == 1
+        batch = torch.from_numpy((np.atleast_2d(rows) - self.mean) / self.scale)
+        with torch.inference_mode():
+            out = self.model(batch).numpy()
+        return out[0] if single else out
+
+
+class MicroBatcher:
+    """Coalesces concurrent predict() calls into micro-batches on a single worker thread."""
+
+    def __init__(self, predictor: PolicyPredictor, max_batch: int = 256, max_latency: float = 0.001):
+        self.predictor = predictor
+        self.max_batch = max_batch
+        self.max_latency = max_latency
+        self.batches = 0
+        self.rows = 0
+        self._queue: "queue.Queue" = queue.Queue()
+        self._worker = threading.Thread(target=self._run, name="policy-micro-batcher", daemon=True)
+        self._worker.start()
+
+    def submit(self, rows) -> Future:
+        """Queue one row or a block of rows; the Future resolves to the same shape predict() would return."""
+        rows = np.asarray(rows, dtype=np.float32)
+        future = Future()
+        self._queue.put((np.atleast_2d(rows), rows.ndim == 1, future))
+        return future
+
+    def predict(self, rows, timeout: Optional[float] = None) -> np.ndarray:
+        return self.submit(rows).result(timeout)
+
+    def _collect(self, first) -> List:
+        pending, size = [first], len(first[0])
+        deadline = time.perf_counter() + self.max_latency
+        while size < self.max_batch:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if item is None:
+                self._queue.put(None)  # let the main loop see the shutdown after this batch
+                break
+            pending.append(item)
+            size += len(item[0])
+        return pending
+
+    def _run(self) -> None:
+        while True:
+            first = self._queue.get()
+            if first is None:
+                return
+            pending = self._collect(first)
+            try:
+                outputs = self.predictor.predict(np.concatenate([rows for rows, _, _ in pending]))
+            except Exception as e:
+                for _, _, future in pending:
+                    future.set_exception(e)
+                continue
+            self.batches += 1
+            self.rows += len(outputs)
+            start = 0
+            for rows, single, future in pending:
+                result = outputs[start:start + len(rows)]
+                future.set_result(result[0] if single else result)
+                start += len(rows)
+
+    def close(self) -> None:
+        self._queue.put(None)
+        self._worker.join()
@@ -9,36 +9,197 @@ Defines the function `compute_metrics()` to compute extended social metrics for
 - Loss Recovery: captures economic compensation needs
 
 Returns a NumPy array with shape (n_samples, 5)
+
+Every metric only depends on the row itself and a few dataset-wide statistics (column maxima, mean age
+and the per-sex mean hours), which are collected in a mergeable MetricsState. This allows:
+- compute_metrics_streaming(): two passes over chunks (collect state, then transform), writing float32
+  rows into a preallocated or memory-mapped buffer, so peak memory scales with the chunk size
+- IncrementalMetrics: append new rows and only recompute the existing columns whose statistics changed
 """
 
 import numpy as np
 
-def compute_metrics(data):
+METRIC_NAMES = ["meritocracy", "fairness", "efficiency", "age_inclusion", "loss_recovery"]
+CHUNK_SIZE = 65536
+
+
+def _column(chunk, name):
+    return np.asarray(chunk[name], dtype=np.float64)
+
+
+class MetricsState:
+    """Running dataset statistics needed by the metrics; states of disjoint chunks can be merged."""
+
+    def __init__(self):
+        self.count = 0
+        self.max_education = -np.inf
+        self.max_hours = -np.inf
+        self.max_gain = -np.inf
+        self.max_loss = -np.inf
+        self.age_sum = 0.0
+        self.hours_sum = np.zeros(2)  # by sex code: 0 = female, 1 = male
+        self.sex_count = np.zeros(2, dtype=np.int64)
+
+    def update(self, chunk) -> "MetricsState":
+        hours = _column(chunk, "hours_per_week")
+        if not len(hours):
+            return self
+        sex = np.asarray(chunk["sex"])
+        self.count += len(hours)
+        self.max_education = max(self.max_education, _column(chunk, "education_num").max())
+        self.max_hours = max(self.max_hours, hours.max())
+        self.max_gain = max(self.max_gain, _column(chunk, "capital_gain").max())
+        self.max_loss = max(self.max_loss, _column(chunk, "capital_loss").max())
+        self.age_sum += _column(chunk, "age").sum()
+        for code in (0, 1):
+            mask = sex == code
+            self.hours_sum[code] += hours[mask].sum()
+            self.sex_count[code] += mask.sum()
+        return self
+
+    def merge(self, other: "MetricsState") -> "MetricsState":
+        merged = MetricsState()
+        merged.count = self.count + other.count
+        merged.max_education = max(self.max_education, other.max_education)
+        merged.max_hours = max(self.max_hours, other.max_hours)
+        merged.max_gain = max(self.max_gain, other.max_gain)
+        merged.max_loss = max(self.max_loss, other.max_loss)
+        merged.age_sum = self.age_sum + other.age_sum
+        merged.hours_sum = self.hours_sum + other.hours_sum
+        merged.sex_count = self.sex_count + other.sex_count
+        return merged
+
+    @classmethod
+    def from_chunks(cls, chunks) -> "MetricsState":
+        state = cls()
+        for chunk in chunks:
+            state.update(chunk)
+        return state
+
+    @property
+    def fairness(self) -> float:
+        with np.errstate(invalid="ignore", divide="ignore"):
+            female_avg, male_avg = self.hours_sum / self.sex_count
+        return 1 - abs(male_avg - female_avg) / self.max_hours
+
+    @property
+    def mean_age(self) -> float:
+        return self.age_sum / self.count
+
+    def dependencies(self):
+        """Statistics each metric column depends on, for detecting which columns a state change invalidates."""
+        return [
+            (self.max_education, self.max_hours, self.max_gain),
+            (self.fairness,),
+            (self.max_hours,),
+            (self.mean_age,),
+            (self.max_loss,),
+        ]
+
+
+def transform(chunk, state: MetricsState, out=None) -> np.ndarray:
+    """Metrics for the rows of one chunk given the dataset-wide state; written into `out` if given."""
+    education = _column(chunk, "education_num")
+    if out is None:
+        out = np.empty((len(education), len(METRIC_NAMES)), dtype=np.float32)
+    hours = _column(chunk, "hours_per_week")
+    age = _column(chunk, "age")
+
     # Meritocracy score: weighted sum
-    meritocracy = (
-        0.5 * data["education_num"] / data["education_num"].max() +
-        0.3 * data["hours_per_week"] / data["hours_per_week"].max() +
-        0.2 * data["capital_gain"] / (data["capital_gain"].max() + 1e-6)
+    out[:, 0] = (
+        0.5 * education / state.max_education +
+        0.3 * hours / state.max_hours +
+        0.2 * _column(chunk, "capital_gain") / (state.max_gain + 1e-6)
     )
-
+    # Fairness score: based on gender disparity
+    out[:, 1] = state.fairness
     # Efficiency score
-    efficiency = data["hours_per_week"] / data["hours_per_week"].max()
+    out[:, 2] = hours / state.max_hours
+    # Age inclusion: closer to mean age is better
+    out[:, 3] = 1 - np.abs(age - state.mean_age) / state.mean_age
+    # Loss recovery: higher capital loss = higher need
+    out[:, 4] = _column(chunk, "capital_loss") / (state.max_loss + 1e-6)
+    return out
 
-    # Fairness score: based on gender disparity
-    overall_avg = data["hours_per_week"].mean()
-    male_avg = data[data["sex"] == 1]["hours_per_week"].mean()
-    female_avg = data[data["sex"] == 0]["hours_per_week"].mean()
-    disparity = abs(male_avg - female_avg) / data["hours_per_week"].max()
-    fairness = 1 - disparity
-    fairness_scores = np.full(len(data), fairness)
 
-    # Age inclusion: closer to mean age is better
-    mean_age = data["age"].mean()
-    age_inclusion = 1 - np.abs(data["age"] - mean_age) / mean_age
+def compute_metrics(data):
+    """In-memory version: metrics for a whole DataFrame (or dict of columns) as float64, shape (n_samples, 5)."""
+    state = MetricsState().update(data)
+    return transform(data, state, out=np.empty((state.count, len(METRIC_NAMES)), dtype=np.float64))
 
-    # Loss recovery: higher capital loss = higher need
-    loss_recovery = data["capital_loss"] / (data["capital_loss"].max() + 1e-6)
 
-    # Stack metrics together: shape (n_samples, 5)
-    metrics = np.stack([meritocracy, fairness_scores, efficiency, age_inclusion, loss_recovery], axis=1)
-    return metrics
+def compute_metrics_streaming(chunks, out=None, state=None):
+    """
+    Metrics over an out-of-core dataset. `chunks` is a re-iterable of chunks (DataFrames or dicts of column
+    arrays) or a zero-argument callable returning a fresh iterator; it is read twice unless a precomputed
+    `state` is given. `out` is a preallocated (n_rows, 5) array or a path for a float32 .npy memmap.
+    """
+    make_chunks = chunks if callable(chunks) else lambda: iter(chunks)
+    if state is None:
+        if not callable(chunks) and iter(chunks) is chunks:
+            raise TypeError("chunks is a one-shot iterator; pass a list, a reader or a callable returning chunks")
+        state = MetricsState.from_chunks(make_chunks())
+    if out is None or isinstance(out, str):
+        shape = (state.count, len(METRIC_NAMES))
+        out = np.empty(shape, dtype=np.float32) if out is None else \
+            np.lib.format.open_memmap(out, mode="w+", dtype=np.float32, shape=shape)
+
+    start = 0
+    for chunk in make_chunks():
+        rows = len(chunk["age"])
+        transform(chunk, state, out=out[start:start + rows])
+        start += rows
+    if start != len(out):
+        raise ValueError(f"chunks produced {start} rows, output buffer holds {len(out)}")
+    return out
+
+
+class IncrementalMetrics:
+    """
+    Metrics for a dataset that grows over time. New rows are appended with append(); because the
+    dataset-wide statistics move, existing rows are recomputed only for the columns whose statistics
+    changed (fairness and age inclusion usually, the max-normalized columns only when a new maximum
+    arrives), from a compact float32 copy of the five input columns.
+    """
+
+    INPUTS = ["education_num", "hours_per_week", "capital_gain", "age", "capital_loss", "sex"]
+
+    def __init__(self, capacity: int = CHUNK_SIZE):
+        self.state = MetricsState()
+        self._inputs = np.empty((capacity, len(self.INPUTS)), dtype=np.float32)
+        self._metrics = np.empty((capacity, len(METRIC_NAMES)), dtype=np.float32)
+        self.rows = 0
+
+    @property
+    def metrics(self) -> np.ndarray:
+        return self._metrics[:self.rows]
+
+    def _grow(self, needed: int) -> None:
+        if needed <= len(self._inputs):
+            return
+        capacity = max(needed, 2 * len(self._inputs))
+        for name in ("_inputs", "_metrics"):
+            grown = np.empty((capacity, getattr(self, name).shape[1]), dtype=np.float32)
+            grown[:self.rows] = getattr(self, name)[:self.rows]
+            setattr(self, name, grown)
+
+    def _view(self, start: int, stop: int):
+        return {name: self._inputs[start:stop, i] for i, name in enumerate(self.INPUTS)}
+
+    def append(self, chunk) -> np.ndarray:
+        """Add rows and return the full, up-to-date metrics array."""
+        before = self.state.dependencies() if self.state.count else None
+        self.state.update(chunk)
+        rows = len(chunk["age"])
+        self._grow(self.rows + rows)
+        for i, name in enumerate(self.INPUTS):
+            self._inputs[self.rows:self.rows + rows, i] = np.asarray(chunk[name])
+
+        if before is not None:
+            stale = [i for i, (old, new) in enumerate(zip(before, self.state.dependencies())) if old != new]
+            for start in range(0, self.rows, CHUNK_SIZE) if stale else ():
+                stop = min(start + CHUNK_SIZE, self.rows)
+                self._metrics[start:stop, stale] = transform(self._view(start, stop), self.state)[:, stale]
+        transform(self._view(self.rows, self.rows + rows), self.state, out=self._metrics[self.rows:self.rows + rows])
+        self.rows += rows
+        return self.metrics
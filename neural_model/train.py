@@ -11,33 +11,40 @@ learns to map input features (like age, education, gender) to this policy vector
 
 The trained model is used later in the project to generate proposed social policies that are
 evaluated by simulated LLM agents.
+
+Training runs through neural_model/engine.py (in-memory batching, validation on the held-out split,
+early stopping, checkpoint/resume). Run from the repository root:
+
+    python -m neural_model.train --batch-size 1024 --threads 4 --patience 5 --resume
 """
 
-import pandas as pd
+import argparse
 import numpy as np
 from sklearn.preprocessing import StandardScaler
 from sklearn.model_selection import train_test_split
 import torch
-import torch.nn as nn
-import torch.optim as optim
-from torch.utils.data import DataLoader, TensorDataset
-from neural_model.transformer import SocialPolicyPredictor
+from neural_model.SocietalPolicyPredictor import SocialPolicyPredictor
 from neural_model.metrics import compute_metrics
+from neural_model.engine import BASE_BATCH_SIZE, fit
+from neural_model.inference import MODEL_PATH, SCALER_PATH, save_scaler
+from dataset.adult import load_adult
+
+CHECKPOINT_PATH = "./neural_model/checkpoints/train_state.pt"
 
-# Load UCI Adult Dataset
-url = "https://archive.ics.uci.edu/ml/machine-learning-databases/adult/adult.data"
-columns = [
-    "age", "workclass", "fnlwgt", "education", "education_num", "marital_status",
-    "occupation", "relationship", "race", "sex", "capital_gain", "capital_loss",
-    "hours_per_week", "native_country", "income"
-]
-data = pd.read_csv(url, header=None, names=columns, na_values=" ?", skipinitialspace=True)
-data.dropna(inplace=True)
-
-# Encode categorical variables
-data_encoded = data.copy()
-for col in columns:
-    data_encoded[col] = pd.Categorical(data_encoded[col]).codes
+parser = argparse.ArgumentParser(description="Train the SocialPolicyPredictor on the UCI Adult dataset.")
+parser.add_argument("--epochs", type=int, default=20)
+parser.add_argument("--batch-size", type=int, default=BASE_BATCH_SIZE)
+parser.add_argument("--lr", type=float, default=0.001, help=f"learning rate at batch size {BASE_BATCH_SIZE}")
+parser.add_argument("--lr-scaling", choices=["linear", "sqrt", "none"], default="sqrt")
+parser.add_argument("--threads", type=int, default=None, help="torch intra-op threads")
+parser.add_argument("--compile", action="store_true", help="train a torch.compile'd model")
+parser.add_argument("--patience", type=int, default=5, help="early-stopping patience in epochs")
+parser.add_argument("--checkpoint", default=CHECKPOINT_PATH)
+parser.add_argument("--resume", action="store_true", help="continue from --checkpoint if it exists")
+args = parser.parse_args()
+
+# Load UCI Adult Dataset (cleaned, every column category-encoded; cached after the first parse)
+data_encoded = load_adult().encoded_frame()
 
 # Compute societal metrics per row
 y = compute_metrics(data_encoded)  # shape: (n_samples, 3)
@@ -56,34 +63,23 @@ torch_y_train = torch.tensor(y_train, dtype=torch.float32)
 torch_X_test = torch.tensor(X_test, dtype=torch.float32)
 torch_y_test = torch.tensor(y_test, dtype=torch.float32)
 
-# DataLoader
-train_dataset = TensorDataset(torch_X_train, torch_y_train)
-train_loader = DataLoader(train_dataset, batch_size=64, shuffle=True)
-
 # Initialize model
 input_dim = X_train.shape[1]
 output_dim = y_train.shape[1]
 model = SocialPolicyPredictor(input_dim, output_dim)
 
-# Loss and optimizer
-criterion = nn.MSELoss()
-optimizer = optim.Adam(model.parameters(), lr=0.001)
-
-# Training loop
-epochs = 20
-model.train()
-for epoch in range(epochs):
-    epoch_loss = 0.0
-    for batch_X, batch_y in train_loader:
-        optimizer.zero_grad()
-        outputs = model(batch_X)
-        loss = criterion(outputs, batch_y)
-        loss.backward()
-        optimizer.step()
-        epoch_loss += loss.item() * batch_X.size(0)
-    avg_loss = epoch_loss / len(train_loader.dataset)
-    print(f"Epoch {epoch+1}/{epochs}, Loss: {avg_loss:.4f}")
-
-# Save the model
-torch.save(model.state_dict(), "./neural_model/policy_model.pt")
+# Training loop (validation on the held-out split, best weights restored on early stop)
+history = fit(
+    model, torch_X_train, torch_y_train, torch_X_test, torch_y_test,
+    epochs=args.epochs, batch_size=args.batch_size, lr=args.lr,
+    lr_scaling=None if args.lr_scaling == "none" else args.lr_scaling,
+    threads=args.threads, compile=args.compile, patience=args.patience,
+    checkpoint_path=args.checkpoint, resume=args.resume,
+)
+if history["val_loss"]:
+    print(f"Best validation loss {min(history['val_loss']):.4f} at epoch {history['best_epoch'] + 1}")
+
+# Save the model, and the scaler so inference can reproduce the feature scaling
+torch.save(model.state_dict(), MODEL_PATH)
+save_scaler(scaler, X.columns, SCALER_PATH)
 print("Policy model saved.")
@@ -0,0 +1,179 @@
+# storage/columnar.py
+
+"""
+Chunked columnar result store.
+A store is a directory holding one sub-directory per column with numbered NumPy chunks, plus a
+manifest.json listing the columns, their types and the row count of every chunk:
+
+    results/scores/
+        manifest.json
+        step/00000.npy
+        agent/00000.offsets.npy  agent/00000.bytes     (variable-length UTF-8 strings)
+        reward/00000.npy
+        ...
+
+ColumnarWriter takes whole steps at once (arrays for per-agent values, scalars broadcast to the step's
+length), buffers them and writes a chunk once the buffer passes `flush_bytes`. The manifest is rewritten
+atomically after every flush, so a crash loses at most the unflushed buffer. ColumnarReader memory-maps
+numeric chunks and only decodes string columns on access.
+"""
+
+import json
+import os
+import shutil
+from typing import Dict, Iterable, Iterator, List, Optional
+
+import numpy as np
+
+MANIFEST = "manifest.json"
+DEFAULT_FLUSH_BYTES = 16 * 1024 * 1024
+STR = "str"
+
+
+def _column_type(values: np.ndarray) -> str:
+    return STR if values.dtype.kind in "OUS" else values.dtype.str
+
+
+class ColumnarWriter:
+    def __init__(self, path: str, types: Optional[Dict[str, str]] = None, flush_bytes: int = DEFAULT_FLUSH_BYTES,
+                 overwrite: bool = False, metadata: Optional[Dict] = None):
+        """
+        `types` optionally fixes column types up front (NumPy dtype strings such as "int64", "float32",
+        or "str"); otherwise each column's type is taken from its first write. An existing store at
+        `path` is replaced when `overwrite` is set and is an error otherwise. `metadata` is any
+        JSON-serializable dict kept in the manifest.
+        """
+        self.path = path
+        self.flush_bytes = flush_bytes
+        self.metadata = dict(metadata or {})
+        self.types: Dict[str, str] = {name: (STR if t == STR else np.dtype(t).str) for name, t in (types or {}).items()}
+        self.chunks: List[int] = []
+        self.rows = 0
+        self._buffer: Dict[str, List[np.ndarray]] = {}
+        self._buffered_rows = 0
+        self._buffered_bytes = 0
+        if os.path.exists(os.path.join(path, MANIFEST)):
+            if not overwrite:
+                raise FileExistsError(f"{path} already holds a columnar store")
+            shutil.rmtree(path)
+        os.makedirs(path, exist_ok=True)
+
+    def write_step(self, **columns) -> None:
+        """Append one step. Array values must share a length; scalar values are repeated to that length."""
+        arrays = {name: np.asarray(value) for name, value in columns.items()}
+        lengths = {len(value) for value in arrays.values() if value.ndim > 0}
+        if len(lengths) > 1:
+            raise ValueError(f"columns have different lengths: {sorted(lengths)}")
+        length = lengths.pop() if lengths else 1
+        if self.types and set(arrays) != set(self.types):
+            raise ValueError(f"expected columns {sorted(self.types)}, got {sorted(arrays)}")
+
+        for name, values in arrays.items():
+            if values.ndim == 0:
+                values = np.repeat(values, length)
+            kind = self.types.setdefault(name, _column_type(values))
+            values = values.astype(str if kind == STR else kind, copy=False)
+            self._buffer.setdefault(name, []).append(values)
+            self._buffered_bytes += values.nbytes
+        self._buffered_rows += length
+        if self._buffered_bytes >= self.flush_bytes:
+            self.flush()
+
+    def flush(self) -> None:
+        """Write buffered rows as a new chunk of every column and update the manifest."""
+        if not self._buffered_rows:
+            return
+        index = len(self.chunks)
+        for name, parts in self._buffer.items():
+            column_dir = os.path.join(self.path, name)
+            os.makedirs(column_dir, exist_ok=True)
+            values = np.concatenate(parts)
+            if self.types[name] == STR:
+                encoded = [value.encode("utf-8") for value in values.tolist()]
+                offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+                np.cumsum([len(value) for value in encoded], out=offsets[1:])
+                np.save(os.path.join(column_dir, f"{index:05d}.offsets.npy"), offsets)
+                with open(os.path.join(column_dir, f"{index:05d}.bytes"), "wb") as f:
+                    f.write(b"".join(encoded))
+            else:
+                np.save(os.path.join(column_dir, f"{index:05d}.npy"), values)
+        self.chunks.append(self._buffered_rows)
+        self.rows += self._buffered_rows
+        self._buffer = {}
+        self._buffered_rows = 0
+        self._buffered_bytes = 0
+        self._write_manifest()
+
+    def _write_manifest(self) -> None:
+        manifest = {"columns": self.types, "chunks": self.chunks, "rows": self.rows, "metadata": self.metadata}
+        tmp = os.path.join(self.path, MANIFEST + ".tmp")
+        with open(tmp, "w") as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(tmp, os.path.join(self.path, MANIFEST))
+
+    def close(self) -> None:
+        self.flush()
+        if not self.chunks:
+            self._write_manifest()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class ColumnarReader:
+    def __init__(self, path: str):
+        self.path = path
+        with open(os.path.join(path, MANIFEST)) as f:
+            manifest = json.load(f)
+        self.types: Dict[str, str] = manifest["columns"]
+        self.chunks: List[int] = manifest["chunks"]
+        self.rows: int = manifest["rows"]
+        self.metadata: Dict = manifest.get("metadata", {})
+
+    @property
+    def columns(self) -> List[str]:
+        return list(self.types)
+
+    def __len__(self) -> int:
+        return self.rows
+
+    def _load(self, name: str, index: int) -> np.ndarray:
+        base = os.path.join(self.path, name, f"{index:05d}")
+        if self.types[name] != STR:
+            return np.load(base + ".npy", mmap_mode="r")
+        offsets = np.load(base + ".offsets.npy")
+        with open(base + ".bytes", "rb") as f:
+            data = f.read()
+        return np.array([data[start:end].decode("utf-8") for start, end in zip(offsets[:-1], offsets[1:])], dtype=object)
+
+    def iter_chunks(self, columns: Optional[Iterable[str]] = None) -> Iterator[Dict[str, np.ndarray]]:
+        """Yield {column: values} one chunk at a time; numeric values are read-only memory maps."""
+        columns = list(columns or self.columns)
+        for index in range(len(self.chunks)):
+            yield {name: self._load(name, index) for name in columns}
+
+    def column(self, name: str) -> np.ndarray:
+        """The full column. A single-chunk numeric column is returned as a memory map without copying."""
+        parts = [self._load(name, index) for index in range(len(self.chunks))]
+        if len(parts) == 1:
+            return parts[0]
+        if not parts:
+            return np.array([], dtype=object if self.types[name] == STR else self.types[name])
+        return np.concatenate(parts)
+
+    def to_pandas(self, columns: Optional[Iterable[str]] = None):
+        import pandas as pd
+        columns = list(columns or self.columns)
+        return pd.DataFrame({name: self.column(name) for name in columns}, columns=columns)
+
+    def to_csv(self, path: str, columns: Optional[Iterable[str]] = None, **to_csv_kwargs) -> str:
+        """Export chunk by chunk to CSV (extra keyword arguments go to DataFrame.to_csv)."""
+        import pandas as pd
+        columns = list(columns or self.columns)
+        pd.DataFrame(columns=columns).to_csv(path, index=False, **to_csv_kwargs)
+        for chunk in self.iter_chunks(columns):
+            pd.DataFrame(chunk, columns=columns).to_csv(path, mode="a", header=False, index=False, **to_csv_kwargs)
+        return path
@@ -0,0 +1,137 @@
+# storage/journal.py
+
+"""
+Append-only JSONL journal of completed LLM calls, for resuming long runs after a crash or timeout.
+
+Every completed call is one line {"run", "phase", "step", "agent", "value", "time"}, appended and fsync'd
+as soon as the call returns, so a crash loses at most the calls in flight. On restart with the same run id
+the journal is read back and calls whose (phase, step, agent) key is already present are replayed from it
+instead of being sent again; a truncated last line (crash mid-write) is ignored. If a key is written twice,
+the later value wins. Scripts build their final JSON artifacts from the journaled values, so a resumed run
+produces the same output as an uninterrupted one.
+
+    journal = open_run("simulated_society")        # resumes when RUN_ID names an existing run
+    score = journal.call("evaluation", step, agent.name, lambda: agent.evaluate_statement(statement))
+"""
+
+import json
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Hashable, Iterable, Iterator, Optional, Tuple
+
+JOURNAL_DIR = os.environ.get("RUN_JOURNAL_DIR", "journal")
+_MISSING = object()
+
+
+class RunJournal:
+    def __init__(self, path: str, run_id: str, fsync: bool = True):
+        self.path = path
+        self.run_id = run_id
+        self.fsync = fsync
+        self.replayed = 0
+        self.recorded = 0
+        self._values: Dict[Tuple, Any] = {}
+        self._lock = threading.Lock()
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        needs_newline = False
+        if os.path.exists(path):
+            with open(path, "rb") as f:
+                data = f.read()
+            needs_newline = bool(data) and not data.endswith(b"\n")
+            for line in data.decode("utf-8", errors="replace").splitlines():
+                try:
+                    event = json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # partial line from an interrupted write
+                if event.get("run") == run_id:
+                    self._values[self._key(event["phase"], event["step"], event["agent"])] = event["value"]
+        self._file = open(path, "a", encoding="utf-8")
+        if needs_newline:
+            self._file.write("\n")
+
+    @staticmethod
+    def _key(phase: str, step: Hashable, agent: Optional[str]) -> Tuple:
+        return phase, json.dumps(step), agent
+
+    def __len__(self):
+        return len(self._values)
+
+    def __contains__(self, key: Tuple) -> bool:
+        return self._key(*key) in self._values
+
+    def get(self, phase: str, step: Hashable = 0, agent: Optional[str] = None, default: Any = None) -> Any:
+        return self._values.get(self._key(phase, step, agent), default)
+
+    def completed(self, phase: str, steps: Iterable[Hashable], agent: Optional[str] = None) -> Dict[Hashable, Any]:
+        """{step: value} for the already-journaled steps among `steps`, counted as replays."""
+        found = {}
+        for step in steps:
+            value = self._values.get(self._key(phase, step, agent), _MISSING)
+            if value is not _MISSING:
+                found[step] = value
+        with self._lock:
+            self.replayed += len(found)
+        return found
+
+    def record(self, phase: str, step: Hashable, agent: Optional[str], value: Any) -> None:
+        """Append one completed call; `value` must be JSON-serializable."""
+        line = json.dumps({"run": self.run_id, "phase": phase, "step": step, "agent": agent,
+                           "value": value, "time": time.time()})
+        with self._lock:
+            self._file.write(line + "\n")
+            self._file.flush()
+            if self.fsync:
+                os.fsync(self._file.fileno())
+            self._values[self._key(phase, step, agent)] = value
+            self.recorded += 1
+
+    def call(self, phase: str, step: Hashable, agent: Optional[str], fn: Callable[[], Any],
+             record_if: Optional[Callable[[Any], bool]] = None, valid: Optional[Callable[[Any], bool]] = None) -> Any:
+        """
+        Return the journaled value for the key, or run `fn()` and journal its result. Results rejected
+        by `record_if` (e.g. error placeholders) are returned but not journaled, so a resume retries them.
+        A journaled value failing `valid` (e.g. recorded for different inputs) is recomputed and overwritten.
+        """
+        value = self._values.get(self._key(phase, step, agent), _MISSING)
+        if value is not _MISSING and (valid is None or valid(value)):
+            with self._lock:
+                self.replayed += 1
+            return value
+        value = fn()
+        if record_if is None or record_if(value):
+            self.record(phase, step, agent, value)
+        return value
+
+    def events(self) -> Iterator[Tuple[str, Any, Optional[str], Any]]:
+        """(phase, step, agent, value) for every journaled key of this run."""
+        for (phase, step, agent), value in list(self._values.items()):
+            yield phase, json.loads(step), agent, value
+
+    def stats(self) -> Dict:
+        return {"run": self.run_id, "path": self.path, "replayed": self.replayed, "recorded": self.recorded}
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def open_run(name: str, run_id: Optional[str] = None, directory: str = JOURNAL_DIR) -> RunJournal:
+    """
+    Open the journal for `run_id` (default: the RUN_ID environment variable), resuming it if it exists;
+    without one a new run id "<name>-<timestamp>-<pid>" is created and printed so the run can be resumed.
+    """
+    run_id = run_id or os.environ.get("RUN_ID") or f"{name}-{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}"
+    journal = RunJournal(os.path.join(directory, f"{run_id}.jsonl"), run_id)
+    if len(journal):
+        print(f"Resuming run {run_id}: {len(journal)} completed calls in {journal.path}")
+    else:
+        print(f"Journaling run {run_id} to {journal.path} (resume with RUN_ID={run_id})")
+    return journal
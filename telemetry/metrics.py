@@ -0,0 +1,216 @@
+# telemetry/metrics.py
+
+"""
+In-process counters, histograms and phase spans, exported as Prometheus text and a JSON summary.
+
+Telemetry is off unless SIM_TELEMETRY=1 (or enable() is called). While off, inc()/observe() return after
+one flag check, span() hands back a shared no-op context manager, and the LLM client is not wrapped at all
+(see llm/instrumented.py), so instrumented code runs at its normal speed. While on, the metrics are written
+at exit to SIM_TELEMETRY_DIR (default "output/telemetry"): metrics.prom in the Prometheus text format and
+metrics.json with counters and per-histogram count, sum, mean and bucket-estimated p50/p95 (an upper bucket
+bound, or "+Inf" past the last bucket).
+
+    with span("evaluation"):
+        scores = gather_scores(agents, statement)
+    inc("llm_parse_failures_total", site="evaluation")
+"""
+
+import atexit
+import json
+import os
+import threading
+import time
+from typing import Dict, Optional, Sequence, Tuple, Union
+
+TELEMETRY_DIR = os.environ.get("SIM_TELEMETRY_DIR", os.path.join("output", "telemetry"))
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+SIZE_BUCKETS = (64, 256, 1024, 4096, 16384, 65536, 262144)
+
+HELP = {
+    "llm_calls_total": "LLM calls by backend, kind (generate/stream), outcome and cache status",
+    "llm_call_duration_seconds": "LLM call latency",
+    "llm_prompt_chars": "Prompt size (prefix + prompt) in characters",
+    "llm_response_chars": "Response size in characters",
+    "llm_cache_lookups_total": "Response cache lookups by result",
+    "llm_parse_failures_total": "Responses whose score could not be parsed, by call site",
+    "llm_fallbacks_total": "Calls that returned a default value after an error, by call site",
+    "phase_duration_seconds": "Wall time of pipeline phases",
+}
+BUCKETS = {"llm_call_duration_seconds": LATENCY_BUCKETS, "phase_duration_seconds": LATENCY_BUCKETS,
+           "llm_prompt_chars": SIZE_BUCKETS, "llm_response_chars": SIZE_BUCKETS}
+
+_enabled = os.environ.get("SIM_TELEMETRY", "0") == "1"
+_lock = threading.Lock()
+_counters: Dict[str, Dict[Tuple, float]] = {}
+_histograms: Dict[str, Dict[Tuple, list]] = {}
+_local = threading.local()
+
+
+def enabled() -> bool:
+    return _enabled
+
+
+def enable(on: bool = True) -> None:
+    global _enabled
+    _enabled = on
+
+
+def reset() -> None:
+    with _lock:
+        _counters.clear()
+        _histograms.clear()
+
+
+def _labels(labels: Dict) -> Tuple:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def inc(name: str, value: float = 1.0, **labels) -> None:
+    if not _enabled:
+        return
+    key = _labels(labels)
+    with _lock:
+        series = _counters.setdefault(name, {})
+        series[key] = series.get(key, 0.0) + value
+
+
+def observe(name: str, value: float, **labels) -> None:
+    """Add one observation to a histogram; bucket bounds come from BUCKETS (latency buckets by default)."""
+    if not _enabled:
+        return
+    key = _labels(labels)
+    bounds = BUCKETS.get(name, LATENCY_BUCKETS)
+    with _lock:
+        series = _histograms.setdefault(name, {})
+        if key not in series:
+            series[key] = [[0] * (len(bounds) + 1), 0.0, 0]  # per-bucket counts (last is +Inf), sum, count
+        counts, _, _ = entry = series[key]
+        i = 0
+        while i < len(bounds) and value > bounds[i]:
+            i += 1
+        counts[i] += 1
+        entry[1] += value
+        entry[2] += 1
+
+
+# -- spans --------------------------------------------------------------------------------------------
+
+class _NoopSpan:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NOOP = _NoopSpan()
+
+
+class _Span:
+    __slots__ = ("phase", "labels", "start")
+
+    def __init__(self, phase: str, labels: Dict):
+        self.phase = phase
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        observe("phase_duration_seconds", time.perf_counter() - self.start, phase=self.phase,
+                status="error" if exc_type else "ok", **self.labels)
+        return False
+
+
+def span(phase: str, **labels):
+    """Context manager timing one pipeline phase into phase_duration_seconds{phase=...}."""
+    return _Span(phase, labels) if _enabled else _NOOP
+
+
+# -- per-call side channel ----------------------------------------------------------------------------
+
+def note_cache(status: str) -> None:
+    """Let a cache layer tag the call in progress on this thread ("hit", "miss", "refresh")."""
+    if _enabled:
+        _local.cache = status
+        inc("llm_cache_lookups_total", result=status)
+
+
+def take_cache_status() -> Optional[str]:
+    status = getattr(_local, "cache", None)
+    _local.cache = None
+    return status
+
+
+# -- export -------------------------------------------------------------------------------------------
+
+def _format_labels(labels: Sequence[Tuple[str, str]]) -> str:
+    if not labels:
+        return ""
+    escape = lambda v: v.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+    return "{" + ",".join(f'{k}="{escape(v)}"' for k, v in labels) + "}"
+
+
+def to_prometheus() -> str:
+    lines = []
+    with _lock:
+        for name, series in sorted(_counters.items()):
+            lines += [f"# HELP {name} {HELP.get(name, name)}", f"# TYPE {name} counter"]
+            lines += [f"{name}{_format_labels(key)} {value:g}" for key, value in sorted(series.items())]
+        for name, series in sorted(_histograms.items()):
+            bounds = BUCKETS.get(name, LATENCY_BUCKETS)
+            lines += [f"# HELP {name} {HELP.get(name, name)}", f"# TYPE {name} histogram"]
+            for key, (counts, total, count) in sorted(series.items()):
+                cumulative = 0
+                for bound, n in zip([f"{b:g}" for b in bounds] + ["+Inf"], counts):
+                    cumulative += n
+                    lines.append(f"{name}_bucket{_format_labels(key + (('le', bound),))} {cumulative}")
+                lines.append(f"{name}_sum{_format_labels(key)} {total:g}")
+                lines.append(f"{name}_count{_format_labels(key)} {count}")
+    return "\n".join(lines) + "\n"
+
+
+def _quantile(bounds: Sequence[float], counts: Sequence[int], q: float) -> Union[float, str]:
+    """Upper bound of the bucket holding the q-quantile ("+Inf", as in Prometheus, for the overflow bucket)."""
+    target = q * sum(counts)
+    cumulative = 0
+    for bound, n in zip(bounds, counts):
+        cumulative += n
+        if cumulative >= target:
+            return bound
+    return "+Inf"
+
+
+def summary() -> Dict:
+    with _lock:
+        counters = {name: [{"labels": dict(key), "value": value} for key, value in sorted(series.items())]
+                    for name, series in sorted(_counters.items())}
+        histograms = {}
+        for name, series in sorted(_histograms.items()):
+            bounds = BUCKETS.get(name, LATENCY_BUCKETS)
+            histograms[name] = [{
+                "labels": dict(key), "count": count, "sum": total, "mean": total / count if count else None,
+                "p50_le": _quantile(bounds, counts, 0.5), "p95_le": _quantile(bounds, counts, 0.95),
+            } for key, (counts, total, count) in sorted(series.items())]
+    return {"counters": counters, "histograms": histograms}
+
+
+def export(directory: str = TELEMETRY_DIR) -> Tuple[str, str]:
+    """Write metrics.prom and metrics.json to `directory`; returns both paths."""
+    os.makedirs(directory, exist_ok=True)
+    prom_path, json_path = os.path.join(directory, "metrics.prom"), os.path.join(directory, "metrics.json")
+    with open(prom_path, "w") as f:
+        f.write(to_prometheus())
+    with open(json_path, "w") as f:
+        json.dump(summary(), f, indent=2, allow_nan=False)
+    return prom_path, json_path
+
+
+def _export_at_exit() -> None:
+    if _enabled and (_counters or _histograms):
+        prom_path, json_path = export()
+        print(f"Telemetry written to {prom_path} and {json_path}")
+
+
+atexit.register(_export_at_exit)
@@ -0,0 +1,79 @@
+# tests/conftest.py
+
+import json
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+
+class StubOllamaHandler(BaseHTTPRequestHandler):
+    """
+    Minimal /api/generate: pops the next scripted action from `server.script`, else echoes the prompt.
+    Actions: {"status": 503}, {"sleep": seconds}, {"stream": [chunks], "delay": seconds}.
+    """
+
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def do_POST(self):
+        payload = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        with self.server.lock:
+            self.server.requests.append({"port": self.client_address[1], "payload": payload})
+            action = self.server.script.pop(0) if self.server.script else {}
+        time.sleep(action.get("sleep", 0))
+        try:
+            if "status" in action:
+                self._send_json({"error": "scripted failure"}, action["status"])
+            elif "stream" in action:
+                self._stream(action["stream"], action.get("delay", 0))
+            else:
+                tokens = list(range(len(payload.get("prompt", "").split())))
+                self._send_json({"response": f" echo: {payload.get('prompt', '')} ", "context": tokens + [99],
+                                 "eval_count": 1})
+        except (BrokenPipeError, ConnectionResetError):
+            with self.server.lock:
+                self.server.aborted += 1
+            self.close_connection = True
+
+    def _send_json(self, body, status=200):
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _stream(self, chunks, delay):
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        for i, chunk in enumerate(chunks):
+            line = json.dumps({"response": chunk, "done": i == len(chunks) - 1}).encode("utf-8") + b"\n"
+            self.wfile.write(b"%x\r\n%s\r\n" % (len(line), line))
+            self.wfile.flush()
+            time.sleep(delay)
+        self.wfile.write(b"0\r\n\r\n")
+
+
+@pytest.fixture
+def ollama_stub():
+    """A local Ollama-compatible stub server; yields it with `url`, `script`, `requests` and `aborted`."""
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubOllamaHandler)
+    server.daemon_threads = True
+    server.lock = threading.Lock()
+    server.script, server.requests, server.aborted = [], [], 0
+    server.url = f"http://127.0.0.1:{server.server_address[1]}"
+    thread = threading.Thread(target=server.serve_forever, kwargs={"poll_interval": 0.02}, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
@@ -0,0 +1,59 @@
+# tests/test_adult.py
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from dataset import adult
+
+ROWS = [
+    "39, State-gov, 77516, Bachelors, 13, Never-married, Adm-clerical, Not-in-family, White, Male, 2174, 0, 40, United-States, <=50K",
+    "50, Self-emp-not-inc, 83311, Bachelors, 13, Married-civ-spouse, Exec-managerial, Husband, White, Male, 0, 0, 13, United-States, <=50K",
+    "54, ?, 180211, Some-college, 10, Married-civ-spouse, ?, Husband, Asian-Pac-Islander, Male, 0, 0, 60, South, >50K",
+    "28, Private, 338409, Bachelors, 13, Married-civ-spouse, Prof-specialty, Wife, Black, Female, 0, 0, 40, Cuba, <=50K",
+    "37, Private, 284582, Masters, 14, Married-civ-spouse, Exec-managerial, Wife, White, Female, 0, 1902, 40, ?, <=50K",
+    "31, Private, 45781, Masters, 14, Never-married, Prof-specialty, Not-in-family, White, Female, 14084, 0, 50, United-States, >50K",
+]
+
+
+@pytest.fixture
+def raw(tmp_path):
+    path = tmp_path / "adult.data"
+    path.write_text("\n".join(ROWS) + "\n")
+    return str(path)
+
+
+def test_rows_with_missing_values_are_dropped(raw, tmp_path):
+    table = adult.load_adult(raw, str(tmp_path / "cache"))
+    assert len(table) == 4
+    frame = table.to_frame()
+    assert "?" not in set(frame["workclass"]) | set(frame["occupation"]) | set(frame["native_country"])
+    assert frame["age"].tolist() == [39, 50, 28, 31]
+    assert table.code("sex", "Female") == 0 and table["sex"].tolist() == [1, 1, 0, 0]
+
+
+def test_cached_table_matches_a_fresh_parse(raw, tmp_path):
+    table = adult.load_adult(raw, str(tmp_path / "cache"))
+    parsed = adult.parse_raw(raw)
+    frame = table.to_frame()
+    for column in adult.COLUMNS:
+        assert frame[column].astype(str).tolist() == parsed[column].astype(str).tolist()
+    encoded = table.encoded_frame()
+    for column in adult.COLUMNS:
+        np.testing.assert_array_equal(encoded[column], pd.Categorical(parsed[column]).codes)
+
+
+def test_second_load_reads_the_cache_without_parsing(raw, tmp_path, monkeypatch):
+    first = adult.load_adult(raw, str(tmp_path / "cache"))
+    monkeypatch.setattr(adult, "parse_raw", lambda path: pytest.fail("cache was not used"))
+    second = adult.load_adult(raw, str(tmp_path / "cache"))
+    assert second.source_hash == first.source_hash
+    np.testing.assert_array_equal(second["hours_per_week"], first["hours_per_week"])
+
+
+def test_changed_file_is_parsed_again(raw, tmp_path):
+    first = adult.load_adult(raw, str(tmp_path / "cache"))
+    with open(raw, "a") as f:
+        f.write(ROWS[0].replace("39,", "40,", 1) + "\n")
+    second = adult.load_adult(raw, str(tmp_path / "cache"))
+    assert second.source_hash != first.source_hash and len(second) == len(first) + 1
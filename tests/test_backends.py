@@ -0,0 +1,38 @@
+# tests/test_backends.py
+
+import shutil
+
+import pytest
+
+from llm.backends import RecordingClient, ReplayClient, SyntheticClient
+
+
+def record(path, prompts):
+    """Record `prompts` through a SyntheticClient; returns the client (left open, like a killed run)."""
+    client = RecordingClient(SyntheticClient(model="m"), str(path))
+    return client, [client.generate(p) for p in prompts]
+
+
+@pytest.mark.parametrize("name", ["log.jsonl", "log.jsonl.gz"])
+def test_replay_round_trip(tmp_path, name):
+    client, responses = record(tmp_path / name, ["a", "b", "a"])
+    client.close()
+    replay = ReplayClient(str(tmp_path / name), model="m")
+    assert len(replay) == 3
+    assert [replay.generate(p) for p in ["a", "b"]] == responses[:2]
+
+
+@pytest.mark.parametrize("name", ["log.jsonl", "log.jsonl.gz"])
+def test_replay_survives_killed_recording(tmp_path, name):
+    client, responses = record(tmp_path / name, ["first", "second"])
+    crashed = tmp_path / f"crashed-{name}"
+    shutil.copy(tmp_path / name, crashed)  # file as a kill would leave it: no close, no gzip trailer
+    client.close()
+    if not name.endswith(".gz"):
+        with open(crashed, "a") as f:
+            f.write('{"k": "abc", "m": "m", "r": "half')
+
+    with pytest.warns(UserWarning):
+        replay = ReplayClient(str(crashed), model="m")
+    assert len(replay) == 2
+    assert replay.generate("second") == responses[1]
@@ -0,0 +1,51 @@
+# tests/test_base_agent.py
+
+import pytest
+
+from agents.base_agent import Agent
+from llm.client import set_default_client
+from telemetry import metrics
+
+STATS = {"education": 12.0, "income": 300.0, "hours": 40.0, "age": 38.0, "loss": 50.0}
+POLICY = [0.2, 0.2, 0.2, 0.2, 0.2]
+
+
+class FixedLLM:
+    model = "stub"
+
+    def __init__(self, reply):
+        self.reply = reply
+
+    def generate(self, prompt, **kwargs):
+        if isinstance(self.reply, Exception):
+            raise self.reply
+        return self.reply
+
+
+@pytest.fixture
+def telemetry():
+    metrics.reset()
+    metrics.enable()
+    yield
+    metrics.enable(False)
+    metrics.reset()
+    set_default_client(None)
+
+
+def counter(name):
+    return sum(entry["value"] for entry in metrics.summary()["counters"].get(name, []) if entry["labels"]["site"] == "agent")
+
+
+@pytest.mark.parametrize("reply, score, failures", [
+    ("7 - it helps workers like us.", 7.0, 0),     # parsed by the streaming ScoreParser
+    ("8. Good for us.", 8.0, 0),                   # ScoreParser takes "8." for a list enumerator; recovered
+    ("No idea, it depends.", None, 1),             # nothing to recover: default returned
+    (RuntimeError("connection refused"), None, 1),
+])
+def test_parse_failure_and_fallback_counters(telemetry, reply, score, failures):
+    set_default_client(FixedLLM(reply))
+    result, text = Agent("a", "worker", STATS).llm_response(POLICY)
+    assert result == score
+    assert counter("llm_fallbacks_total") == failures
+    assert counter("llm_parse_failures_total") == (failures if isinstance(reply, str) else 0)
+    assert text.startswith("[ERROR]") == isinstance(reply, Exception)
@@ -0,0 +1,102 @@
+# tests/test_cache.py
+
+import pytest
+
+from llm.cache import CachedClient, ResponseCache, request_key
+
+
+class CountingLLM:
+    model = "stub"
+
+    def __init__(self):
+        self.calls = []
+
+    def generate(self, prompt, model=None, options=None, timeout=None, **params):
+        self.calls.append(prompt)
+        return f"reply {len(self.calls)} to {prompt}"
+
+    def stream(self, prompt, model=None, options=None, timeout=None, **params):
+        self.calls.append(prompt)
+        for word in ["a ", "b ", "c"]:
+            yield word
+
+    def close(self):
+        pass
+
+
+def cached(tmp_path, mode="read-through", **kwargs):
+    backend = CountingLLM()
+    return backend, CachedClient(backend, ResponseCache(str(tmp_path / "cache.sqlite"), **kwargs), mode=mode)
+
+
+def test_hit_skips_the_backend(tmp_path):
+    backend, client = cached(tmp_path)
+    first = client.generate("p", options={"temperature": 0})
+    assert client.generate("p", options={"temperature": 0}) == first
+    assert len(backend.calls) == 1
+    assert client.cache.stats()["hits"] == 1 and client.cache.stats()["misses"] == 1
+
+
+def test_key_covers_model_options_and_params(tmp_path):
+    backend, client = cached(tmp_path)
+    client.generate("p")
+    client.generate("p", options={"seed": 1})
+    client.generate("p", model="other")
+    client.generate("p", format="json")
+    assert len(backend.calls) == 4
+    # A shared prefix is folded into the prompt, so split and joined requests share an entry
+    assert request_key("m", "persona", params={"prefix": "policy"}) == request_key("m", "policy\npersona")
+
+
+def test_entries_survive_reopening(tmp_path):
+    _, client = cached(tmp_path)
+    reply = client.generate("p")
+    client.close()
+    backend, client = cached(tmp_path)
+    assert client.generate("p") == reply and backend.calls == []
+
+
+def test_refresh_regenerates_and_bypass_never_touches_the_cache(tmp_path):
+    backend, client = cached(tmp_path)
+    client.generate("p")
+    client.mode = "refresh"
+    refreshed = client.generate("p")
+    assert len(backend.calls) == 2
+    client.mode = "read-through"
+    assert client.generate("p") == refreshed and len(backend.calls) == 2
+
+    client.mode = "bypass"
+    client.generate("q")
+    client.generate("q")
+    assert len(backend.calls) == 4 and client.cache.stats()["entries"] == 1
+
+
+def test_unknown_mode_is_rejected(tmp_path):
+    with pytest.raises(ValueError, match="unknown cache mode"):
+        cached(tmp_path, mode="write-only")
+
+
+def test_expired_entries_are_misses(tmp_path):
+    backend, client = cached(tmp_path, max_age=-1)
+    client.generate("p")
+    client.generate("p")
+    assert len(backend.calls) == 2
+
+
+def test_eviction_drops_least_recently_used_entries(tmp_path):
+    _, client = cached(tmp_path, max_bytes=40)
+    cache = client.cache
+    for key in ("a", "b", "c"):
+        cache.put(key, "m", "x" * 15)
+    cache.get("a")  # a becomes more recent than b
+    assert cache.evict() == 1
+    assert cache.get("b") is None and cache.get("a") is not None and cache.get("c") is not None
+
+
+def test_stream_caches_what_the_consumer_read(tmp_path):
+    backend, client = cached(tmp_path)
+    chunks = client.stream("p")
+    assert next(chunks) == "a "
+    chunks.close()
+    assert "".join(client.stream("p")) == "a "
+    assert len(backend.calls) == 1
@@ -0,0 +1,118 @@
+# tests/test_client.py
+
+import time
+
+import pytest
+
+from llm.client import LLMError, OllamaClient
+
+
+def make_client(stub, **kwargs):
+    return OllamaClient(stub.url, model="stub", backoff=0.01, keep_alive=None, **kwargs)
+
+
+def test_generate_returns_stripped_response(ollama_stub):
+    client = make_client(ollama_stub)
+    assert client.generate("hello", options={"temperature": 0}) == "echo: hello"
+    payload = ollama_stub.requests[0]["payload"]
+    assert payload["model"] == "stub" and payload["stream"] is False
+    assert payload["options"] == {"temperature": 0}
+
+
+def test_keep_alive_connection_is_reused(ollama_stub):
+    client = make_client(ollama_stub)
+    for i in range(5):
+        client.generate(f"prompt {i}")
+    assert len({r["port"] for r in ollama_stub.requests}) == 1
+
+
+def test_retries_on_5xx(ollama_stub):
+    ollama_stub.script += [{"status": 503}, {"status": 500}]
+    client = make_client(ollama_stub, retries=2)
+    assert client.generate("hi") == "echo: hi"
+    assert len(ollama_stub.requests) == 3
+
+
+def test_gives_up_after_retries(ollama_stub):
+    ollama_stub.script += [{"status": 503}] * 3
+    with pytest.raises(LLMError, match="after 2 attempts"):
+        make_client(ollama_stub, retries=1).generate("hi")
+
+
+def test_retries_on_timeout(ollama_stub):
+    ollama_stub.script.append({"sleep": 0.5})
+    client = make_client(ollama_stub, retries=1, timeout=0.1)
+    assert client.generate("slow") == "echo: slow"
+    assert len(ollama_stub.requests) == 2
+
+
+def test_4xx_is_not_retried(ollama_stub):
+    ollama_stub.script.append({"status": 400})
+    with pytest.raises(LLMError, match="HTTP 400"):
+        make_client(ollama_stub, retries=3).generate("bad")
+    assert len(ollama_stub.requests) == 1
+
+
+def test_429_is_retried(ollama_stub):
+    ollama_stub.script.append({"status": 429})
+    assert make_client(ollama_stub).generate("busy") == "echo: busy"
+
+
+def test_stream_yields_chunks_and_reuses_connection(ollama_stub):
+    ollama_stub.script.append({"stream": ["0.", "75", " because"]})
+    client = make_client(ollama_stub)
+    assert "".join(client.stream("score")) == "0.75 because"
+    client.generate("after")
+    assert ollama_stub.requests[0]["payload"]["stream"] is True
+    assert len({r["port"] for r in ollama_stub.requests}) == 1
+
+
+def test_stream_early_close_aborts_generation(ollama_stub):
+    ollama_stub.script.append({"stream": ["tok "] * 200, "delay": 0.01})
+    client = make_client(ollama_stub)
+    chunks = client.stream("long")
+    assert next(chunks) == "tok "
+    chunks.close()
+
+    deadline = time.time() + 5
+    while ollama_stub.aborted == 0 and time.time() < deadline:
+        time.sleep(0.02)
+    assert ollama_stub.aborted == 1
+    # The aborted connection is dropped, not returned to the pool
+    client.generate("next")
+    assert ollama_stub.requests[-1]["port"] != ollama_stub.requests[0]["port"]
+
+
+def test_stream_retries_before_first_chunk(ollama_stub):
+    ollama_stub.script += [{"status": 503}, {"stream": ["ok"]}]
+    assert list(make_client(ollama_stub).stream("x")) == ["ok"]
+
+
+def test_round_robin_across_hosts(ollama_stub):
+    client = OllamaClient([ollama_stub.url, ollama_stub.url], model="stub", keep_alive=None)
+    client.generate("a")
+    client.generate("b")
+    assert len({r["port"] for r in ollama_stub.requests}) == 2
+
+
+def test_prefix_is_joined_by_default(ollama_stub):
+    make_client(ollama_stub).generate("persona", prefix="shared policy")
+    assert ollama_stub.requests[0]["payload"]["prompt"] == "shared policy\npersona"
+
+
+def test_prefix_context_holds_only_prefix_tokens(ollama_stub):
+    client = make_client(ollama_stub, reuse_context=True)
+    client.generate("persona one", prefix="shared policy text")
+    client.generate("persona two", prefix="shared policy text")
+    priming, first, second = (r["payload"] for r in ollama_stub.requests)
+    assert priming["raw"] is True and priming["prompt"] == "shared policy text"
+    # The stub appends one generated token (99) to the context; it must not be reused
+    assert first["context"] == second["context"] == [0, 1, 2]
+    assert first["prompt"] == "persona one" and "raw" not in first
+
+
+def test_prefix_priming_is_retried(ollama_stub):
+    ollama_stub.script.append({"status": 503})
+    client = make_client(ollama_stub, reuse_context=True, retries=1)
+    assert client.generate("persona", prefix="shared") == "echo: persona"
+    assert [r["payload"]["prompt"] for r in ollama_stub.requests] == ["shared", "shared", "persona"]
@@ -0,0 +1,70 @@
+# tests/test_columnar.py
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from storage.columnar import ColumnarReader, ColumnarWriter
+
+
+def write_steps(path, steps, **kwargs):
+    with ColumnarWriter(str(path), **kwargs) as writer:
+        for step in range(steps):
+            writer.write_step(step=step, agent=[f"agent_{i}" for i in range(3)], reward=np.arange(3) * 0.5 + step,
+                              winner="Ä" if step % 2 else "b")
+    return ColumnarReader(str(path))
+
+
+@pytest.mark.parametrize("flush_bytes", [1, 10 ** 9])
+def test_round_trip_across_chunks(tmp_path, flush_bytes):
+    reader = write_steps(tmp_path / "store", 4, flush_bytes=flush_bytes, metadata={"run": "t"})
+    assert len(reader.chunks) == (4 if flush_bytes == 1 else 1)
+    assert len(reader) == 12 and reader.columns == ["step", "agent", "reward", "winner"]
+    assert reader.metadata == {"run": "t"}
+    assert reader.column("step").tolist() == [s for s in range(4) for _ in range(3)]
+    assert reader.column("agent").tolist() == [f"agent_{i}" for i in range(3)] * 4
+    np.testing.assert_array_equal(reader.column("reward"), np.concatenate([np.arange(3) * 0.5 + s for s in range(4)]))
+    assert reader.column("winner").tolist() == [w for s in range(4) for w in ["Ä" if s % 2 else "b"] * 3]
+
+
+def test_declared_types_are_enforced(tmp_path):
+    with ColumnarWriter(str(tmp_path / "store"), types={"step": "int32", "score": "float32", "name": "str"}) as writer:
+        writer.write_step(step=1, score=[0.25, 0.5], name=["x", "y"])
+        with pytest.raises(ValueError, match="expected columns"):
+            writer.write_step(step=2, score=[0.1, 0.2])
+        with pytest.raises(ValueError, match="different lengths"):
+            writer.write_step(step=2, score=[0.1, 0.2], name=["x"])
+    reader = ColumnarReader(str(tmp_path / "store"))
+    assert reader.column("step").dtype == np.int32 and reader.column("score").dtype == np.float32
+    assert reader.column("name").tolist() == ["x", "y"]
+
+
+def test_existing_store_needs_overwrite(tmp_path):
+    write_steps(tmp_path / "store", 1)
+    with pytest.raises(FileExistsError):
+        ColumnarWriter(str(tmp_path / "store"))
+    reader = write_steps(tmp_path / "store", 2, overwrite=True)
+    assert len(reader) == 6
+
+
+def test_unflushed_rows_are_not_visible(tmp_path):
+    writer = ColumnarWriter(str(tmp_path / "store"))
+    writer.write_step(step=0, value=[1, 2])
+    writer.flush()
+    writer.write_step(step=1, value=[3, 4])  # left in the buffer, as after a crash
+    assert ColumnarReader(str(tmp_path / "store")).column("value").tolist() == [1, 2]
+
+
+def test_empty_store(tmp_path):
+    ColumnarWriter(str(tmp_path / "store"), types={"step": "int64"}).close()
+    reader = ColumnarReader(str(tmp_path / "store"))
+    assert len(reader) == 0 and reader.column("step").dtype == np.int64
+
+
+def test_pandas_and_csv_export(tmp_path):
+    reader = write_steps(tmp_path / "store", 3, flush_bytes=1)
+    frame = reader.to_pandas()
+    assert frame.shape == (9, 4) and frame["agent"].iloc[4] == "agent_1"
+    csv = pd.read_csv(reader.to_csv(str(tmp_path / "out.csv"), columns=["step", "reward"]))
+    assert list(csv.columns) == ["step", "reward"]
+    pd.testing.assert_frame_equal(csv, frame[["step", "reward"]].astype({"step": "int64"}), check_dtype=False)
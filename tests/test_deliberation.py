@@ -0,0 +1,107 @@
+# tests/test_deliberation.py
+
+import math
+import os
+import re
+import sys
+import threading
+
+import numpy as np
+import pytest
+
+from llm.client import set_default_client
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "experiments", "policy_cases"))
+
+
+class StubLLM:
+    """Answers by deliberation phase; revisions are numbered "Revision k." so the encoder can place them."""
+
+    model = "stub"
+
+    def __init__(self, score=0.5, revisions_change=True):
+        self.score = score
+        self.revisions_change = revisions_change
+        self.calls = 0
+        self.revisions = 0
+        self._lock = threading.Lock()
+
+    def generate(self, prompt, model=None, options=None, timeout=None, prefix=None, **params):
+        text = f"{prefix or ''}\n{prompt}"
+        with self._lock:
+            self.calls += 1
+            if "Revise the statement" in text:
+                self.revisions += 1
+                return f"Revision {self.revisions if self.revisions_change else 1}."
+        if "Rate the satisfaction" in text:
+            return str(self.score(text) if callable(self.score) else self.score)
+        return "Some text."
+
+
+class AngleEncoder:
+    """"Revision k" sits at angle 1/2**k on the unit circle, so consecutive revisions drift less and less."""
+
+    def encode(self, sentences, batch_size=None, convert_to_numpy=True):
+        angles = []
+        for sentence in sentences:
+            match = re.match(r"Revision (\d+)", sentence)
+            angles.append(1.0 / 2 ** int(match.group(1)) if match else math.pi / 2)
+        return np.array([[math.cos(a), math.sin(a)] for a in angles])
+
+
+@pytest.fixture
+def deliberation(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)  # mediator_pipeline creates output/ on import
+    import deliberation
+    yield deliberation
+    set_default_client(None)
+
+
+def run(deliberation, stub, agents=3, **kwargs):
+    set_default_client(stub)
+    embedder = deliberation.Embedder(cache_path=None, model=AngleEncoder())
+    agents = [deliberation.AIAgent(f"group_{i}", [0.2] * 5) for i in range(agents)]
+    return deliberation.deliberate(agents, embedder=embedder, max_workers=1, **kwargs)
+
+
+def test_round_cap(deliberation):
+    stub = StubLLM()
+    summary = run(deliberation, stub, max_rounds=3, drift_threshold=0.0)["summary"]
+    assert summary["stop_reason"] == "max_rounds" and summary["rounds"] == 3
+    assert summary["llm_calls"] == stub.calls == summary["fixed_round_llm_calls"]
+    assert summary["llm_calls_saved"] == 0
+
+
+def test_exits_once_drift_falls_below_threshold(deliberation):
+    stub = StubLLM()
+    log = run(deliberation, stub, max_rounds=10, drift_threshold=1e-3, score_threshold=0.05)
+    drifts = [r["drift"] for r in log["rounds"]]
+    assert log["summary"]["stop_reason"] == "converged"
+    assert drifts[-1] < 1e-3 and all(d >= 1e-3 for d in drifts[:-1])
+    assert log["summary"]["rounds"] == len(drifts) < 10
+    assert log["summary"]["llm_calls"] == stub.calls
+    assert log["summary"]["llm_calls_saved"] == log["summary"]["fixed_round_llm_calls"] - stub.calls > 0
+
+
+def test_score_changes_block_convergence(deliberation):
+    rounds = iter(range(100))
+    stub = StubLLM(score=lambda text: 0.1 + 0.3 * (next(rounds) // 3 % 2), revisions_change=False)
+    summary = run(deliberation, stub, max_rounds=4, drift_threshold=1e-3, score_threshold=0.05)["summary"]
+    assert summary["stop_reason"] == "max_rounds"
+
+
+def test_all_satisfied_skips_the_rounds(deliberation):
+    stub = StubLLM(score=0.9)
+    summary = run(deliberation, stub, max_rounds=5, satisfied=0.8)["summary"]
+    assert summary["stop_reason"] == "all_satisfied" and summary["rounds"] == 0
+    assert summary["llm_calls"] == stub.calls == 2 * 3 + 1
+
+
+def test_tree_mediator_calls_are_counted(deliberation):
+    stub = StubLLM()
+    mediator = deliberation.AIMediator(fan_in=2, max_workers=1)
+    summary = run(deliberation, stub, agents=5, mediator=mediator, max_rounds=2, drift_threshold=0.0)["summary"]
+    # 5 inputs at fan-in 2: 3 + 2 + 1 reduction nodes, plus the final revision call for critiques
+    assert mediator.calls_for(5) == 6 and mediator.calls_for(5, revision=True) == 7
+    assert summary["llm_calls"] == stub.calls == 5 + 6 + 5 + 2 * (5 + 7 + 5)
+    assert summary["fixed_round_llm_calls"] == stub.calls
@@ -0,0 +1,67 @@
+# tests/test_embeddings.py
+
+import hashlib
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "experiments", "policy_cases"))
+from embeddings import Embedder, mean_pairwise_similarity, semantic_diversity, split_sentences
+
+
+class CountingEncoder:
+    """Deterministic unnormalized vectors per sentence; records every sentence it is asked to encode."""
+
+    def __init__(self):
+        self.encoded = []
+
+    def encode(self, sentences, batch_size=None, convert_to_numpy=True):
+        self.encoded.extend(sentences)
+        seeds = [int(hashlib.sha256(s.encode()).hexdigest()[:8], 16) for s in sentences]
+        return np.stack([np.random.default_rng(seed).normal(size=8) * 3 for seed in seeds])
+
+
+def test_each_distinct_sentence_is_encoded_once(tmp_path):
+    encoder = CountingEncoder()
+    embedder = Embedder(cache_path=str(tmp_path / "emb.sqlite"), model=encoder)
+    vectors = embedder.encode(["a", "b", "a", "c"])
+    assert sorted(encoder.encoded) == ["a", "b", "c"]
+    np.testing.assert_allclose(np.linalg.norm(vectors, axis=1), 1, rtol=1e-6)
+    np.testing.assert_array_equal(vectors[0], vectors[2])
+    embedder.encode(["b", "d"])
+    assert sorted(encoder.encoded) == ["a", "b", "c", "d"]
+    assert embedder.stats()["hits"] == 1 and embedder.stats()["misses"] == 4
+
+
+def test_disk_cache_is_shared_across_instances(tmp_path):
+    path = str(tmp_path / "emb.sqlite")
+    first = Embedder(cache_path=path, model=CountingEncoder()).encode(["x", "y"])
+    encoder = CountingEncoder()
+    second = Embedder(cache_path=path, model=encoder).encode(["y", "x"])
+    assert encoder.encoded == []
+    np.testing.assert_array_equal(second, first[::-1])
+    # Different model names never share entries
+    other = CountingEncoder()
+    Embedder(model_name="other-model", cache_path=path, model=other).encode(["x"])
+    assert other.encoded == ["x"]
+
+
+def test_encode_documents_splits_one_batched_call(tmp_path):
+    encoder = CountingEncoder()
+    embedder = Embedder(cache_path=None, model=encoder)
+    documents = [split_sentences("One. Two."), [], split_sentences("Three")]
+    parts = embedder.encode_documents(documents)
+    assert [len(part) for part in parts] == [2, 0, 1]
+    np.testing.assert_array_equal(parts[2][0], embedder.encode(["Three"])[0])
+
+
+@pytest.mark.parametrize("block_size", [3, 4096])
+def test_blocked_similarity_matches_brute_force(block_size):
+    vectors = np.random.default_rng(0).normal(size=(10, 8)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    brute = np.mean([vectors[i] @ vectors[j] for i in range(10) for j in range(10) if i != j])
+    assert mean_pairwise_similarity(vectors, block_size) == pytest.approx(brute, rel=1e-5)
+    assert semantic_diversity(vectors, block_size) == pytest.approx(1 - brute, rel=1e-5)
+    assert mean_pairwise_similarity(vectors[:1]) == 0.0
@@ -0,0 +1,78 @@
+# tests/test_engine.py
+
+import pytest
+import torch
+import torch.nn as nn
+
+from neural_model.engine import fit, iterate_batches, scaled_lr
+
+
+def make_data(rows=512, seed=0):
+    generator = torch.Generator().manual_seed(seed)
+    X = torch.randn(rows, 6, generator=generator)
+    y = X[:, :5] * 0.5 + 0.1 * torch.randn(rows, 5, generator=generator)
+    return X[:400], y[:400], X[400:], y[400:]
+
+
+def make_model():
+    torch.manual_seed(0)
+    return nn.Sequential(nn.Linear(6, 16), nn.ReLU(), nn.Linear(16, 5))
+
+
+def quiet(**kwargs):
+    return {"log": lambda _: None, **kwargs}
+
+
+def test_scaled_lr():
+    assert scaled_lr(0.001, 64) == 0.001
+    assert scaled_lr(0.001, 256, scaling="linear") == pytest.approx(0.004)
+    assert scaled_lr(0.001, 256, scaling="sqrt") == pytest.approx(0.002)
+    assert scaled_lr(0.001, 256, scaling=None) == 0.001
+    with pytest.raises(ValueError):
+        scaled_lr(0.001, 256, scaling="cubic")
+
+
+def test_batches_cover_every_row_once_per_epoch():
+    X = torch.arange(10, dtype=torch.float32).unsqueeze(1)
+    batches = list(iterate_batches(X, X * 2, 4, torch.Generator().manual_seed(0)))
+    assert [len(batch_X) for batch_X, _ in batches] == [4, 4, 2]
+    rows = torch.cat([batch_X for batch_X, _ in batches]).squeeze(1)
+    assert sorted(rows.tolist()) == list(range(10))
+    assert all(torch.equal(batch_y, batch_X * 2) for batch_X, batch_y in batches)
+
+
+def test_training_reduces_loss():
+    X_train, y_train, X_val, y_val = make_data()
+    history = fit(make_model(), X_train, y_train, X_val, y_val, epochs=10, **quiet())
+    assert history["train_loss"][-1] < 0.7 * history["train_loss"][0]
+    assert len(history["samples_per_sec"]) == 10 and not history["stopped_early"]
+
+
+def test_early_stopping_restores_the_best_weights():
+    X_train, y_train, X_val, y_val = make_data()
+    model = make_model()
+    # A huge min_delta means no epoch after the first counts as an improvement
+    history = fit(model, X_train, y_train, X_val, y_val, epochs=20, patience=2, min_delta=10.0, **quiet())
+    assert history["stopped_early"] and len(history["val_loss"]) == 3 and history["best_epoch"] == 0
+
+    reference = make_model()
+    fit(reference, X_train, y_train, epochs=1, **quiet())
+    for restored, best in zip(model.parameters(), reference.parameters()):
+        torch.testing.assert_close(restored, best)
+
+
+def test_resumed_run_matches_an_uninterrupted_one(tmp_path):
+    X_train, y_train, X_val, y_val = make_data()
+    full_model = make_model()
+    full = fit(full_model, X_train, y_train, X_val, y_val, epochs=4, **quiet())
+
+    checkpoint = str(tmp_path / "ckpt" / "model.pt")
+    fit(make_model(), X_train, y_train, X_val, y_val, epochs=2, checkpoint_path=checkpoint, **quiet())
+    resumed_model = nn.Sequential(nn.Linear(6, 16), nn.ReLU(), nn.Linear(16, 5))  # different initial weights
+    resumed = fit(resumed_model, X_train, y_train, X_val, y_val, epochs=4, checkpoint_path=checkpoint, resume=True,
+                  **quiet())
+
+    assert resumed["train_loss"] == pytest.approx(full["train_loss"], rel=1e-6)
+    assert resumed["val_loss"] == pytest.approx(full["val_loss"], rel=1e-6)
+    for a, b in zip(resumed_model.parameters(), full_model.parameters()):
+        torch.testing.assert_close(a, b)
@@ -0,0 +1,81 @@
+# tests/test_inference.py
+
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+import torch
+
+from neural_model.SocietalPolicyPredictor import SocialPolicyPredictor
+from neural_model.inference import MicroBatcher, PolicyPredictor
+
+MEAN = np.linspace(10, 20, 14)
+SCALE = np.linspace(1, 3, 14)
+
+
+def make_predictor(mode="eager"):
+    torch.manual_seed(0)
+    return PolicyPredictor(SocialPolicyPredictor(14, 5), MEAN, SCALE, mode=mode)
+
+
+def rows(n, seed=0):
+    return np.random.default_rng(seed).normal(15, 4, size=(n, 14)).astype(np.float32)
+
+
+def test_predict_scales_inputs_and_handles_single_rows():
+    predictor = make_predictor()
+    X = rows(8)
+    with torch.no_grad():
+        expected = predictor.model(torch.from_numpy(((X - MEAN) / SCALE).astype(np.float32))).numpy()
+    np.testing.assert_allclose(predictor.predict(X), expected, rtol=1e-5, atol=1e-6)
+    single = predictor.predict(X[3])
+    assert single.shape == (5,)
+    np.testing.assert_allclose(single, expected[3], rtol=1e-5, atol=1e-6)
+
+
+@pytest.mark.parametrize("mode, atol", [("torchscript", 1e-5), ("int8", 0.05)])
+def test_modes_agree_with_eager(mode, atol):
+    X = rows(64)
+    np.testing.assert_allclose(make_predictor(mode).predict(X), make_predictor().predict(X), atol=atol)
+
+
+def test_unknown_mode_is_rejected():
+    with pytest.raises(ValueError, match="unknown inference mode"):
+        make_predictor("fp4")
+
+
+def test_load_restores_model_and_scaler(tmp_path):
+    predictor = make_predictor()
+    torch.save(predictor.model.state_dict(), tmp_path / "model.pt")
+    with open(tmp_path / "scaler.json", "w") as f:
+        json.dump({"features": [f"f{i}" for i in range(14)], "mean": MEAN.tolist(), "scale": SCALE.tolist()}, f)
+    loaded = PolicyPredictor.load(str(tmp_path / "model.pt"), str(tmp_path / "scaler.json"))
+    assert loaded.features[0] == "f0"
+    np.testing.assert_allclose(loaded.predict(rows(4)), predictor.predict(rows(4)), rtol=1e-6)
+
+
+def test_micro_batcher_returns_each_callers_rows_in_order():
+    predictor = make_predictor()
+    batcher = MicroBatcher(predictor, max_batch=64, max_latency=0.05)
+    requests = [rows(1 + i % 4, seed=i) for i in range(40)] + [rows(1, seed=99)[0]]
+    try:
+        with ThreadPoolExecutor(max_workers=16) as pool:
+            results = list(pool.map(lambda X: batcher.predict(X, timeout=10), requests))
+    finally:
+        batcher.close()
+    for X, result in zip(requests, results):
+        assert result.shape == predictor.predict(X).shape
+        np.testing.assert_allclose(result, predictor.predict(X), rtol=1e-5, atol=1e-6)
+    assert batcher.rows == sum(len(np.atleast_2d(X)) for X in requests)
+    assert batcher.batches < len(requests)  # concurrent requests were coalesced
+
+
+def test_micro_batcher_propagates_errors_and_keeps_serving():
+    batcher = MicroBatcher(make_predictor(), max_latency=0.0)
+    try:
+        with pytest.raises(ValueError):
+            batcher.predict(np.zeros((2, 3)), timeout=10)  # wrong feature count
+        assert batcher.predict(rows(2), timeout=10).shape == (2, 5)
+    finally:
+        batcher.close()
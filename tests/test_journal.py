@@ -0,0 +1,75 @@
+# tests/test_journal.py
+
+import json
+
+from storage.journal import RunJournal
+
+
+def test_resume_replays_recorded_calls(tmp_path):
+    path = str(tmp_path / "run.jsonl")
+    with RunJournal(path, "run") as journal:
+        journal.record("evaluation", 0, "a", 0.5)
+        journal.record("evaluation", [1, 2], "b", {"score": 0.25})
+
+    calls = []
+    with RunJournal(path, "run") as journal:
+        assert journal.call("evaluation", 0, "a", lambda: calls.append(1)) == 0.5
+        assert journal.get("evaluation", [1, 2], "b") == {"score": 0.25}
+        assert journal.stats()["replayed"] == 1
+    assert calls == []
+
+
+def test_other_runs_are_ignored(tmp_path):
+    path = str(tmp_path / "run.jsonl")
+    with RunJournal(path, "first") as journal:
+        journal.record("opinion", 0, "a", "text")
+    with RunJournal(path, "second") as journal:
+        assert len(journal) == 0
+
+
+def test_truncated_last_line_is_skipped(tmp_path):
+    path = tmp_path / "run.jsonl"
+    with RunJournal(str(path), "run") as journal:
+        journal.record("opinion", 0, "a", "complete")
+    with open(path, "a") as f:
+        f.write('{"run": "run", "phase": "opinion", "step": 0, "agent": "b", "val')  # crash mid-write
+
+    with RunJournal(str(path), "run") as journal:
+        assert journal.get("opinion", 0, "a") == "complete"
+        assert ("opinion", 0, "b") not in journal
+        journal.record("opinion", 0, "b", "retried")
+
+    lines = path.read_text().splitlines()
+    assert json.loads(lines[-1])["value"] == "retried"
+    with RunJournal(str(path), "run") as journal:
+        assert journal.get("opinion", 0, "b") == "retried"
+
+
+def test_rejected_results_are_retried(tmp_path):
+    path = str(tmp_path / "run.jsonl")
+    with RunJournal(path, "run") as journal:
+        assert journal.call("evaluation", 0, "a", lambda: None, lambda score: score is not None) is None
+        assert len(journal) == 0
+    with RunJournal(path, "run") as journal:
+        assert journal.call("evaluation", 0, "a", lambda: 0.75, lambda score: score is not None) == 0.75
+
+
+def test_invalid_replay_is_recomputed(tmp_path):
+    path = str(tmp_path / "run.jsonl")
+    with RunJournal(path, "run") as journal:
+        journal.record("score", 0, "a", {"policy": [1.0, 0.0], "score": 3})
+    with RunJournal(path, "run") as journal:
+        entry = journal.call("score", 0, "a", lambda: {"policy": [0.0, 1.0], "score": 7},
+                             valid=lambda entry: entry["policy"] == [0.0, 1.0])
+        assert entry["score"] == 7
+        assert journal.stats() == {"run": "run", "path": path, "replayed": 0, "recorded": 1}
+
+
+def test_completed_counts_replays(tmp_path):
+    path = str(tmp_path / "run.jsonl")
+    with RunJournal(path, "run") as journal:
+        for i in (0, 2):
+            journal.record("score", i, "a", i)
+    with RunJournal(path, "run") as journal:
+        assert journal.completed("score", range(4), "a") == {0: 0, 2: 2}
+        assert journal.replayed == 2
@@ -0,0 +1,159 @@
+# tests/test_mediator_pipeline.py
+
+import os
+import re
+import sys
+import threading
+import time
+
+import pytest
+
+from llm.client import set_default_client
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "experiments", "policy_cases"))
+
+
+class StubLLM:
+    """Scores each group by the number in its name; slower for earlier groups so calls finish out of order."""
+
+    model = "stub"
+
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.calls = 0
+        self.active = 0
+        self.peak = 0
+        self._lock = threading.Lock()
+
+    def generate(self, prompt, model=None, options=None, timeout=None, prefix=None, **params):
+        text = f"{prefix or ''}\n{prompt}"
+        number = int(re.search(r"group '\w+?_(\d+)'", text).group(1))
+        with self._lock:
+            self.calls += 1
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        time.sleep(self.delay / (1 + number))
+        with self._lock:
+            self.active -= 1
+        return f"0.{number}" if "Rate the satisfaction" in text else f"text from group {number}"
+
+
+@pytest.fixture
+def pipeline(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)  # mediator_pipeline creates output/ on import
+    import mediator_pipeline
+    yield mediator_pipeline
+    set_default_client(None)
+
+
+def make_agents(pipeline, n):
+    return [pipeline.AIAgent(f"group_{i}", [0.2] * 5) for i in range(n)]
+
+
+def test_fan_out_keeps_input_order_and_bounds_concurrency(pipeline):
+    stub = StubLLM(delay=0.05)
+    set_default_client(stub)
+    opinions = pipeline.gather_opinions(make_agents(pipeline, 6), max_workers=3)
+    assert opinions == [f"text from group {i}" for i in range(6)]
+    assert 1 < stub.peak <= 3
+
+
+def test_serial_fan_out_runs_one_call_at_a_time(pipeline):
+    stub = StubLLM(delay=0.01)
+    set_default_client(stub)
+    agents = make_agents(pipeline, 4)
+    assert pipeline.gather_critiques(agents, "statement", max_workers=1) == [f"text from group {i}" for i in range(4)]
+    assert stub.peak == 1
+
+
+def test_gather_scores_maps_agents_to_their_scores(pipeline):
+    set_default_client(StubLLM(delay=0.02))
+    scores = pipeline.gather_scores(make_agents(pipeline, 5), "statement", max_workers=5)
+    assert list(scores.items()) == [(f"group_{i}", float(f"0.{i}")) for i in range(5)]
+
+
+class PanelLLM:
+    model = "stub"
+
+    def __init__(self, reply):
+        self.reply = reply
+        self.prompts = []
+
+    def generate(self, prompt, model=None, options=None, timeout=None, **params):
+        self.prompts.append((prompt, params))
+        return self.reply
+
+
+def test_panel_scores_all_agents_in_one_call(pipeline):
+    stub = PanelLLM('<think>{"draft": 1}</think> {"scores": [{"agent": "group_1", "score": 0.4, "justification": " ok "},'
+                    ' {"agent": "group_0", "score": 1.7, "justification": "great"}]}')
+    set_default_client(stub)
+    panel = pipeline.AIPanel(make_agents(pipeline, 2))
+    result = panel.evaluate("UBI", fallback=lambda agent: pytest.fail("no fallback expected"))
+    assert list(result) == ["group_0", "group_1"]  # agent order, not reply order
+    assert result["group_0"] == {"score": 1.0, "justification": "great"}  # clamped to [0, 1]
+    assert result["group_1"]["justification"] == "ok"
+    assert len(stub.prompts) == 1 and stub.prompts[0][1]["format"] == "json"
+    assert "group_0" in stub.prompts[0][0] and "group_1" in stub.prompts[0][0]
+
+
+def test_panel_falls_back_only_for_missing_agents(pipeline):
+    set_default_client(PanelLLM('[{"agent": "group_2", "score": 0.3}, {"agent": "stranger", "score": 0.9},'
+                                ' {"agent": "group_0", "score": "n/a"}]'))
+    panel = pipeline.AIPanel(make_agents(pipeline, 3), max_workers=1)
+    fallback_agents = []
+    result = panel.evaluate("UBI", fallback=lambda agent: fallback_agents.append(agent.name) or {"score": 0.5, "justification": "fb"})
+    assert fallback_agents == ["group_0", "group_1"]
+    assert [entry["score"] for entry in result.values()] == [0.5, 0.5, 0.3]
+    assert panel.fallback_calls == 2
+
+
+class NumberingLLM:
+    """Returns "text N" for the N-th call and records every prompt."""
+
+    model = "stub"
+
+    def __init__(self):
+        self.prompts = []
+        self._lock = threading.Lock()
+
+    def generate(self, prompt, model=None, options=None, timeout=None, **params):
+        with self._lock:
+            self.prompts.append(prompt)
+            return f"text {len(self.prompts)}"
+
+
+def test_tree_synthesis_reduces_in_bounded_batches(pipeline):
+    stub = NumberingLLM()
+    set_default_client(stub)
+    mediator = pipeline.AIMediator(fan_in=3, max_workers=4)
+    opinions = [f"opinion {i}" for i in range(7)]
+    statement = mediator.synthesize_group_statement(opinions)
+
+    assert [(node["phase"], node["level"], node["inputs"]) for node in mediator.nodes if node["level"] == 1] == [("merge", 1, 3)]
+    leaves = [node for node in mediator.nodes if node["level"] == 0]
+    assert sorted(node["inputs"] for node in leaves) == [1, 3, 3] and {node["phase"] for node in leaves} == {"synthesis"}
+    for opinion in opinions:  # every opinion reaches exactly one leaf prompt
+        assert sum(re.search(rf"\b{opinion}\b", prompt) is not None for prompt in stub.prompts) == 1
+    assert statement == "text 4" and len(stub.prompts) == mediator.calls_for(7) == 4
+    usage = mediator.token_usage()
+    assert usage["synthesis"]["calls"] == 3 and usage["merge"]["calls"] == 1
+
+
+def test_tree_revision_summarizes_critiques_then_revises_once(pipeline):
+    set_default_client(NumberingLLM())
+    mediator = pipeline.AIMediator(fan_in=2, max_workers=1)
+    mediator.revise_statement("original", [f"critique {i}" for i in range(5)])
+    phases = [(node["phase"], node["level"]) for node in mediator.nodes]
+    assert phases == [("critique_summary", 0)] * 3 + [("critique_summary", 1)] * 2 + [("critique_summary", 2), ("revision", 0)]
+    assert len(phases) == mediator.calls_for(5, revision=True)
+
+
+def test_small_inputs_and_no_fan_in_use_one_call(pipeline):
+    set_default_client(NumberingLLM())
+    flat, bounded = pipeline.AIMediator(fan_in=0), pipeline.AIMediator(fan_in=4)
+    flat.synthesize_group_statement([f"opinion {i}" for i in range(9)])
+    bounded.synthesize_group_statement([f"opinion {i}" for i in range(4)])
+    assert len(flat.nodes) == len(bounded.nodes) == 1
+    with pytest.raises(ValueError):
+        pipeline.AIMediator(fan_in=1)
@@ -0,0 +1,57 @@
+# tests/test_metrics.py
+
+import json
+
+import pytest
+
+from telemetry import metrics
+
+
+@pytest.fixture
+def telemetry():
+    metrics.reset()
+    metrics.enable()
+    yield metrics
+    metrics.enable(False)
+    metrics.reset()
+
+
+def test_disabled_records_nothing():
+    metrics.reset()
+    metrics.enable(False)
+    with metrics.span("evaluation"):
+        metrics.inc("llm_parse_failures_total", site="agent")
+    assert metrics.summary() == {"counters": {}, "histograms": {}}
+
+
+def test_export_is_strict_json_with_overflow_bucket(telemetry, tmp_path):
+    telemetry.observe("llm_call_duration_seconds", 0.002, kind="generate")
+    telemetry.observe("llm_call_duration_seconds", 1000.0, kind="generate")  # past the last bucket
+    telemetry.inc("llm_calls_total", backend="stub", outcome="ok")
+    prom_path, json_path = telemetry.export(str(tmp_path))
+
+    with open(json_path) as f:
+        summary = json.load(f, parse_constant=lambda name: pytest.fail(f"non-standard JSON constant {name}"))
+    (histogram,) = summary["histograms"]["llm_call_duration_seconds"]
+    assert histogram["count"] == 2
+    assert histogram["p50_le"] == 0.005
+    assert histogram["p95_le"] == "+Inf"
+
+    prom = open(prom_path).read()
+    assert 'llm_call_duration_seconds_bucket{kind="generate",le="+Inf"} 2' in prom
+    assert 'llm_calls_total{backend="stub",outcome="ok"} 1' in prom
+
+
+def test_span_records_phase_and_errors(telemetry):
+    with telemetry.span("synthesis"):
+        pass
+    with pytest.raises(RuntimeError):
+        with telemetry.span("synthesis"):
+            raise RuntimeError("boom")
+    statuses = {entry["labels"]["status"] for entry in telemetry.summary()["histograms"]["phase_duration_seconds"]}
+    assert statuses == {"ok", "error"}
+
+
+def test_label_values_are_escaped(telemetry):
+    telemetry.inc("llm_fallbacks_total", site='say "hi"\n')
+    assert 'llm_fallbacks_total{site="say \\"hi\\"\\n"} 1' in telemetry.to_prometheus()
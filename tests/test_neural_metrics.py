@@ -0,0 +1,132 @@
+# tests/test_neural_metrics.py
+
+import numpy as np
+import pandas as pd
+import pytest
+import torch
+import torch.nn as nn
+from torch.utils.data import DataLoader, TensorDataset
+
+from neural_model.engine import evaluate, fit
+from neural_model.metrics import IncrementalMetrics, MetricsState, compute_metrics, compute_metrics_streaming, transform
+
+
+def adult_like(rows, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        "age": rng.integers(17, 90, rows),
+        "education_num": rng.integers(1, 17, rows),
+        "hours_per_week": rng.integers(1, 99, rows),
+        "capital_gain": rng.choice([0, 0, 0, 2174, 15024, 99999], rows),
+        "capital_loss": rng.choice([0, 0, 0, 1902, 4356], rows),
+        "sex": rng.integers(0, 2, rows),
+    })
+
+
+def reference_metrics(data):
+    """The original whole-DataFrame pandas implementation."""
+    hours = data["hours_per_week"]
+    meritocracy = (0.5 * data["education_num"] / data["education_num"].max() + 0.3 * hours / hours.max()
+                   + 0.2 * data["capital_gain"] / (data["capital_gain"].max() + 1e-6))
+    disparity = abs(hours[data["sex"] == 1].mean() - hours[data["sex"] == 0].mean()) / hours.max()
+    mean_age = data["age"].mean()
+    return np.stack([meritocracy, np.full(len(data), 1 - disparity), hours / hours.max(),
+                     1 - np.abs(data["age"] - mean_age) / mean_age,
+                     data["capital_loss"] / (data["capital_loss"].max() + 1e-6)], axis=1)
+
+
+def test_compute_metrics_matches_reference():
+    data = adult_like(5000)
+    np.testing.assert_allclose(compute_metrics(data), reference_metrics(data), rtol=0, atol=1e-12)
+
+
+def test_merged_shard_states_equal_state_of_concatenation():
+    data = adult_like(3000)
+    shards = [data.iloc[start:start + 700] for start in range(0, len(data), 700)]
+    merged = MetricsState()
+    for shard in shards:
+        merged = merged.merge(MetricsState().update(shard))
+    whole = MetricsState().update(data)
+    assert merged.count == whole.count
+    assert merged.dependencies() == pytest.approx(whole.dependencies(), rel=1e-12)
+    np.testing.assert_allclose(transform(data, merged), transform(data, whole), rtol=0, atol=0)
+    per_shard = np.concatenate([transform(shard, merged) for shard in shards])
+    np.testing.assert_allclose(per_shard, compute_metrics(data), atol=3e-7)
+
+
+def test_streaming_and_incremental_match_in_memory(tmp_path):
+    data = adult_like(4000, seed=1)
+    chunks = [data.iloc[start:start + 900] for start in range(0, len(data), 900)]
+    expected = compute_metrics(data)
+    np.testing.assert_allclose(compute_metrics_streaming(chunks), expected, atol=3e-7)
+    mapped = compute_metrics_streaming(lambda: iter(chunks), out=str(tmp_path / "metrics.npy"))
+    np.testing.assert_allclose(np.load(tmp_path / "metrics.npy"), expected, atol=3e-7)
+    assert mapped.shape == expected.shape
+
+    incremental = IncrementalMetrics(capacity=1000)
+    for chunk in chunks:
+        incremental.append(chunk)
+    np.testing.assert_allclose(incremental.metrics, expected, atol=3e-7)
+
+
+def test_streaming_rejects_one_shot_iterators():
+    with pytest.raises(TypeError):
+        compute_metrics_streaming(iter([adult_like(10)]))
+
+
+def make_model():
+    torch.manual_seed(0)
+    return nn.Sequential(nn.Linear(6, 16), nn.ReLU(), nn.Linear(16, 5))
+
+
+def per_batch_training(model, X, y, epochs, batch_size, seed):
+    """The original train.py loop: TensorDataset/DataLoader batches with one Adam step per batch."""
+
+    class SeededSampler:
+        # Same permutation stream as the engine's generator
+        def __init__(self):
+            self.generator = torch.Generator().manual_seed(seed)
+
+        def __iter__(self):
+            order = torch.randperm(len(X), generator=self.generator).tolist()
+            return iter([order[i:i + batch_size] for i in range(0, len(X), batch_size)])
+
+        def __len__(self):
+            return -(-len(X) // batch_size)
+
+    loader = DataLoader(TensorDataset(X, y), batch_sampler=SeededSampler())
+    criterion = nn.MSELoss()
+    optimizer = torch.optim.Adam(model.parameters(), lr=0.001)
+    losses = []
+    model.train()
+    for _ in range(epochs):
+        epoch_loss = 0.0
+        for batch_X, batch_y in loader:
+            optimizer.zero_grad()
+            loss = criterion(model(batch_X), batch_y)
+            loss.backward()
+            optimizer.step()
+            epoch_loss += loss.item() * batch_X.size(0)
+        losses.append(epoch_loss / len(X))
+    return losses
+
+
+def test_engine_matches_per_batch_training():
+    data = adult_like(1000, seed=2)
+    X = torch.tensor(((data - data.mean()) / data.std()).to_numpy(), dtype=torch.float32)
+    y = torch.tensor(compute_metrics(data), dtype=torch.float32)
+    X_train, y_train, X_val, y_val = X[:800], y[:800], X[800:], y[800:]
+
+    reference = make_model()
+    reference_losses = per_batch_training(reference, X_train, y_train, epochs=3, batch_size=64, seed=7)
+    engine_model = make_model()
+    history = fit(engine_model, X_train, y_train, X_val, y_val, epochs=3, batch_size=64, seed=7, log=lambda _: None)
+
+    np.testing.assert_allclose(history["train_loss"], reference_losses, rtol=1e-5)
+    for engine_param, reference_param in zip(engine_model.parameters(), reference.parameters()):
+        torch.testing.assert_close(engine_param, reference_param, rtol=1e-5, atol=1e-6)
+    reference.eval()
+    with torch.no_grad():
+        reference_val = nn.functional.mse_loss(reference(X_val), y_val).item()
+    assert history["val_loss"][-1] == pytest.approx(reference_val, rel=1e-5)
+    assert evaluate(engine_model, X_val, y_val, nn.MSELoss(), batch_size=64) == pytest.approx(reference_val, rel=1e-5)
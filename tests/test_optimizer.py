@@ -0,0 +1,68 @@
+# tests/test_optimizer.py
+
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "experiments", "hybrid_llm_feedback"))
+from optimizer import OPTIMIZERS, CrossEntropyOptimizer, SPSAOptimizer, softmax
+
+TARGET = np.array([0.4, 0.3, 0.15, 0.1, 0.05])
+
+
+def distance(logits):
+    return ((softmax(logits) - TARGET) ** 2).sum(axis=-1)
+
+
+def quadratic(logits):
+    """Coalition-score stand-in on the agents' 0-10 scale, peaking at TARGET."""
+    return 10 - 100 * distance(logits)
+
+
+def run(optimizer, steps):
+    for _ in range(steps):
+        logits = optimizer.ask()
+        optimizer.tell(logits, quadratic(logits))
+    return optimizer
+
+
+def test_softmax_maps_onto_the_simplex():
+    policies = softmax(np.random.default_rng(0).normal(size=(10, 5)) * 50)
+    assert np.all(policies >= 0) and np.allclose(policies.sum(axis=1), 1)
+
+
+@pytest.mark.parametrize("name, steps, kwargs", [("cem", 40, {}), ("spsa", 300, {"a": 0.02})])
+def test_optimizer_improves_a_seeded_quadratic(name, steps, kwargs):
+    optimizer = OPTIMIZERS[name](seed=0, **kwargs)
+    start = float(distance(optimizer.mean))
+    run(optimizer, steps)
+    assert optimizer.best_score > float(quadratic(np.log(np.full(5, 0.2))))
+    assert float(distance(optimizer.mean)) < 0.2 * start  # squared distance to the target shrank over 5x
+    assert optimizer.best_policy.sum() == pytest.approx(1.0)
+    assert optimizer.best_score == pytest.approx(float(quadratic(np.log(optimizer.best_policy))))
+
+
+def test_seeded_runs_are_reproducible():
+    first, second = run(CrossEntropyOptimizer(seed=3), 5), run(CrossEntropyOptimizer(seed=3), 5)
+    np.testing.assert_array_equal(first.mean, second.mean)
+    np.testing.assert_array_equal(first.std, second.std)
+
+
+def test_cem_population_starts_at_the_mean_and_std_has_a_floor():
+    optimizer = CrossEntropyOptimizer(population=6, init_policy=TARGET, min_std=0.1, seed=0)
+    logits = optimizer.ask()
+    assert logits.shape == (6, 5)
+    np.testing.assert_allclose(softmax(logits[0]), TARGET)
+    run(optimizer, 30)
+    assert np.all(optimizer.std >= 0.1)
+
+
+def test_spsa_partial_feedback_does_not_move_the_mean():
+    optimizer = SPSAOptimizer(seed=0)
+    mean = optimizer.mean.copy()
+    logits = optimizer.ask()
+    optimizer.tell(logits[:1], quadratic(logits[:1]))  # the other call failed
+    np.testing.assert_array_equal(optimizer.mean, mean)
+    assert optimizer.k == 1
@@ -0,0 +1,59 @@
+# tests/test_profiles.py
+
+import itertools
+
+import numpy as np
+import pytest
+
+from agents.profiles import DIMENSIONS, Band, build_profiles
+from dataset.adult import AdultTable
+
+
+def make_table(rows=2000, seed=0):
+    rng = np.random.default_rng(seed)
+    arrays = {
+        "sex": rng.integers(0, 2, rows).astype(np.int16),
+        "race": rng.integers(0, 3, rows).astype(np.int16),
+        "age": rng.integers(17, 91, rows),
+        "education_num": rng.integers(1, 17, rows),
+        "hours_per_week": rng.integers(1, 100, rows),
+        "capital_gain": rng.choice([0, 0, 5000, 99999], rows),
+        "capital_loss": rng.choice([0, 0, 1902], rows),
+        "fnlwgt": rng.integers(10000, 500000, rows),
+    }
+    return AdultTable(arrays, {"sex": ["Female", "Male"], "race": ["Asian", "Black", "White"]}, "test")
+
+
+def test_profiles_match_per_group_masks():
+    table = make_table()
+    agents = {agent.name: agent for agent in build_profiles(table, ["sex", "race", "age"])}
+    ages = DIMENSIONS["age"]
+    age_band = np.clip(np.searchsorted(ages.edges, table["age"], side="right") - 1, 0, len(ages.edges) - 2)
+    expected = 0
+    for sex, race, band in itertools.product(range(2), range(3), range(4)):
+        mask = (table["sex"] == sex) & (table["race"] == race) & (age_band == band)
+        if not mask.any():
+            continue
+        expected += 1
+        name = " / ".join([table.categories["sex"][sex], table.categories["race"][race], ages.labels[band]])
+        agent, weights = agents[name], table["fnlwgt"][mask]
+        assert agent.role == table.categories["sex"][sex]
+        assert agent.group_stats["count"] == mask.sum()
+        assert agent.group_stats["weight"] == pytest.approx(weights.sum())
+        assert agent.group_stats["education"] == pytest.approx(np.average(table["education_num"][mask], weights=weights))
+        assert agent.group_stats["income"] == pytest.approx(np.average(table["capital_gain"][mask] + 1, weights=weights))
+        assert agent.group_stats["loss"] == pytest.approx(np.average(table["capital_loss"][mask], weights=weights))
+    assert len(agents) == expected
+
+
+def test_bands_clip_out_of_range_values_and_min_count_filters():
+    table = make_table(rows=500, seed=1)
+    table.arrays["hours_per_week"][:10] = 120  # beyond the last edge: joins the last band
+    spec = {"hours": Band("hours_per_week", [1, 35, 100]), "sex": "sex"}
+    agents = build_profiles(table, spec, weight=None)
+    assert {agent.name.split(" / ")[0] for agent in agents} == {"1-35", "35-100"}
+    assert sum(agent.group_stats["count"] for agent in agents) == 500
+    assert all(agent.group_stats["weight"] == agent.group_stats["count"] for agent in agents)
+
+    largest = max(agent.group_stats["count"] for agent in agents)
+    assert [agent.group_stats["count"] for agent in build_profiles(table, spec, min_count=largest)] == [largest]
@@ -0,0 +1,115 @@
+# tests/test_simulation.py
+
+import hashlib
+import json
+import os
+import re
+import sys
+
+import pytest
+
+from llm.cache import CachedClient, ResponseCache
+from llm.client import set_default_client
+from storage.journal import RunJournal
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "experiments", "policy_cases"))
+
+POLICY = "Pay every adult a monthly stipend."
+
+
+class StubLLM:
+    """Deterministic stand-in for the LLM: the reply depends only on the prompt and the sampling seed."""
+
+    model = "stub"
+
+    def __init__(self):
+        self.requests = []
+
+    def generate(self, prompt, model=None, options=None, timeout=None, **params):
+        seed = (options or {}).get("seed")
+        self.requests.append((params.get("prefix"), prompt, seed))
+        digest = int(hashlib.sha256(f"{prompt}|{seed}".encode()).hexdigest(), 16)
+        if params.get("format") == "json":
+            names = re.findall(r"^- (\w+):", prompt, flags=re.MULTILINE)
+            return json.dumps({"scores": [{"agent": name, "score": (digest >> i) % 100 / 100, "justification": "ok"}
+                                          for i, name in enumerate(names)]})
+        return f"{digest % 100 / 100} because of the values"
+
+
+@pytest.fixture
+def simulation(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)  # mediator_pipeline creates output/ on import
+    import simulation
+    yield simulation
+    set_default_client(None)
+
+
+def make_agents(simulation):
+    return [simulation.AIAgent(name, [0.2] * 5) for name in ("low_income", "retired", "tech_worker")]
+
+
+def test_panel_steps_are_distinct_samples_behind_the_cache(simulation, tmp_path):
+    stub = StubLLM()
+    set_default_client(CachedClient(stub, ResponseCache(str(tmp_path / "cache.sqlite"))))
+    with RunJournal(str(tmp_path / "run.jsonl"), "run") as journal:
+        steps, summary = simulation.simulate_policy(journal, make_agents(simulation), "policy", POLICY, 4, "panel")
+
+    assert summary is None
+    assert [seed for _, _, seed in stub.requests] == [0, 1, 2, 3]
+    assert len({json.dumps(step, sort_keys=True) for step in steps}) == 4
+
+
+def test_agent_steps_use_one_seed_per_step(simulation, tmp_path):
+    stub = StubLLM()
+    set_default_client(stub)
+    with RunJournal(str(tmp_path / "run.jsonl"), "run") as journal:
+        steps, summary = simulation.simulate_policy(journal, make_agents(simulation), "policy", POLICY, 3)
+
+    assert sorted(seed for _, _, seed in stub.requests) == [0, 0, 0, 1, 1, 1, 2, 2, 2]
+    assert {prefix for prefix, _, _ in stub.requests} == {simulation.build_prompt_parts(make_agents(simulation)[0], POLICY)[0]}
+    assert set(summary) == {"low_income", "retired", "tech_worker"}
+    assert all(entry["score"] is not None for step in steps for entry in step.values())
+
+
+class Killed(BaseException):
+    """Raised by the dying client; a BaseException so no error handler turns it into a placeholder."""
+
+
+class DyingLLM(StubLLM):
+    def __init__(self, calls_before_death):
+        super().__init__()
+        self.calls_left = calls_before_death
+
+    def generate(self, prompt, **kwargs):
+        if self.calls_left == 0:
+            raise Killed()
+        self.calls_left -= 1
+        return super().generate(prompt, **kwargs)
+
+
+def run(simulation, journal, mode):
+    agents = make_agents(simulation)
+    return [simulation.simulate_policy(journal, agents, name, POLICY + name, 4, mode) for name in ("a", "b")]
+
+
+@pytest.mark.parametrize("mode, calls_before_death", [("agent", 7), ("agent", 17), ("panel", 3)])
+def test_resumed_run_matches_uninterrupted_run(simulation, tmp_path, mode, calls_before_death):
+    set_default_client(StubLLM())
+    with RunJournal(str(tmp_path / "full.jsonl"), "full") as journal:
+        expected = json.dumps(run(simulation, journal, mode))
+
+    path = str(tmp_path / "run.jsonl")
+    dying = DyingLLM(calls_before_death)
+    set_default_client(dying)
+    with pytest.raises(Killed), RunJournal(path, "run") as journal:
+        run(simulation, journal, mode)
+    completed = set(dying.requests)
+
+    resumed_llm = StubLLM()
+    set_default_client(resumed_llm)
+    with RunJournal(path, "run") as journal:
+        assert len(journal) == len(completed) > 0
+        assert json.dumps(run(simulation, journal, mode)) == expected
+    # Only the calls that never completed are sent again
+    assert not completed & set(resumed_llm.requests)
+    assert len(completed) + len(resumed_llm.requests) == (8 if mode == "panel" else 24)
@@ -0,0 +1,48 @@
+# tests/test_society.py
+
+import os
+import sys
+
+import numpy as np
+import torch
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "experiments", "marl_voting"))
+from agent_groups import get_agent_groups
+from marl_voting import generate_policy_candidates, tally_votes
+from society import Society, tally
+
+
+def test_society_matches_per_agent_loop():
+    torch.manual_seed(0)
+    agents = get_agent_groups()
+    society = Society.from_agents(agents)  # same default lr as the agents
+
+    for _ in range(15):
+        candidates = generate_policy_candidates(6)
+        stacked = torch.stack(candidates)
+
+        votes = [agent.vote(candidates) for agent in agents]
+        assert society.vote(stacked).tolist() == votes
+        winner = tally_votes(votes)
+        assert tally(society.vote(stacked), len(candidates)) == winner
+
+        rewards = [agent.evaluate(candidates[winner]) for agent in agents]
+        batched = society.evaluate(stacked[winner])
+        np.testing.assert_allclose(batched.numpy(), rewards, rtol=1e-5)
+
+        for agent, reward in zip(agents, rewards):
+            agent.learn_from_reward(reward, candidates[winner])
+        society.learn_from_reward(batched, stacked[winner])
+
+        looped = torch.stack([agent.policy_vector.detach() for agent in agents])
+        torch.testing.assert_close(society.policy_vectors.detach(), looped, rtol=1e-5, atol=1e-6)
+
+
+def test_preferences_are_cosine_similarities():
+    torch.manual_seed(1)
+    society = Society.sample(20, [agent.group_stats for agent in get_agent_groups()])
+    candidates = torch.rand(4, 5)
+    expected = torch.nn.functional.cosine_similarity(
+        society.policy_vectors.detach()[:, None, :], candidates[None, :, :], dim=2)
+    torch.testing.assert_close(society.preferences(candidates), expected)
+    assert len(society) == 20
@@ -0,0 +1,71 @@
+# tests/test_streaming.py
+
+import pytest
+
+from llm.streaming import ScoreParser, generate_until
+
+
+def parse(text, low=0.0, high=1.0, chunk=1, justification=False):
+    """Feed `text` in `chunk`-sized pieces like a stream; returns the parser."""
+    parser = ScoreParser(low, high, justification=justification)
+    for i in range(0, len(text), chunk):
+        if parser.feed(text[i:i + chunk]):
+            return parser
+    parser.finish()
+    return parser
+
+
+@pytest.mark.parametrize("chunk", [1, 3, 1000])
+@pytest.mark.parametrize("text, expected", [
+    ("0.65", 0.65),
+    ("Score: 1", 1.0),
+    ("On a scale of 0 to 1, I'd give 0.7 because it helps.", 0.7),
+    ("On a scale from 0-1: 0.8.", 0.8),
+    ("Rated on a 0–1 scale, 0.3 overall.", 0.3),
+    ("1. Score: 0.4 since it is fair.", 0.4),
+    ("0 - it is terrible.", 0.0),
+    ("<think>maybe 0.9?</think>0.2", 0.2),
+    ("I rate it 7 out of 10.", None),
+    ("No number at all.", None),
+])
+def test_score(text, expected, chunk):
+    assert parse(text, chunk=chunk).score == expected
+
+
+def test_out_of_is_not_a_score():
+    assert parse("I'd rate it 7 out of 10. Good.", 0, 10).score == 7.0
+
+
+def test_denominator_is_skipped():
+    assert parse("7/10 overall", 0, 10).score == 7.0
+
+
+def test_justification_is_first_sentence():
+    parser = parse("0.6. It helps most workers. Details follow.", justification=True)
+    assert parser.score == 0.6
+    assert parser.justification == "It helps most workers."
+
+
+class ChunkedClient:
+    model = "stub"
+
+    def __init__(self, chunks):
+        self.chunks = chunks
+        self.sent = 0
+        self.closed = False
+
+    def stream(self, prompt, model=None, options=None, timeout=None, **params):
+        try:
+            for chunk in self.chunks:
+                self.sent += 1
+                yield chunk
+        finally:
+            self.closed = True
+
+
+def test_generate_until_stops_after_score():
+    client = ChunkedClient(["Scale 0 to 1: ", "0.75", " ", "and", " much", " more"])
+    parser = ScoreParser(0, 1, justification=False)
+    generate_until(client, "prompt", parser)
+    assert parser.score == 0.75
+    assert client.closed and client.sent < len(client.chunks)
@@ -0,0 +1,66 @@
+# tests/test_surrogate.py
+
+import os
+import sys
+
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "experiments", "hybrid_llm_feedback"))
+from surrogate import POLICY_DIM, SurrogateModel, agent_features, fit_log
+
+STATS = {
+    "a": {"education": 9, "income": 0, "hours": 40, "age": 30, "loss": 0},
+    "b": {"education": 14, "income": 5000, "hours": 50, "age": 45, "loss": 200},
+    "c": {"education": 12, "income": 100, "hours": 20, "age": 65, "loss": 0},
+}
+
+
+def make_log(rows, seed=0):
+    rng = np.random.default_rng(seed)
+    policies = rng.dirichlet(np.ones(POLICY_DIM), size=rows)
+    log = {"Agent": rng.choice(list(STATS), size=rows), "Score": rng.uniform(0, 10, size=rows)}
+    log.update({f"policy_{j}": policies[:, j] for j in range(POLICY_DIM)})
+    return log
+
+
+def test_paired_features_match_cross_product_diagonal():
+    model = SurrogateModel()
+    rng = np.random.default_rng(1)
+    policies, stats = rng.random((6, POLICY_DIM)), rng.random((6, 5))
+    np.testing.assert_allclose(model.paired_features(policies, stats),
+                               model.features(policies, stats)[np.arange(6), np.arange(6)])
+
+
+def test_fit_log_matches_row_by_row_updates():
+    log = make_log(40)
+    fitted = fit_log(SurrogateModel(min_observations=1000), log, STATS)
+    reference = SurrogateModel(min_observations=1000)
+    for i in range(40):
+        policy = np.array([log[f"policy_{j}"][i] for j in range(POLICY_DIM)])
+        reference.update(reference.features(policy, agent_features(STATS[log["Agent"][i]]))[0], [log["Score"][i]])
+    assert fitted.n == reference.n == 40
+    np.testing.assert_allclose(fitted.xtx, reference.xtx)
+    np.testing.assert_allclose(fitted.xty, reference.xty)
+    np.testing.assert_allclose(fitted.yty, reference.yty)
+
+
+def test_fit_log_skips_failed_scores_and_unknown_agents():
+    log = make_log(30)
+    clean = {key: values.copy() for key, values in log.items()}
+    log["Score"][[3, 7]] = np.nan
+    log["Agent"][11] = "unknown"
+    keep = np.ones(30, dtype=bool)
+    keep[[3, 7, 11]] = False
+
+    fitted = fit_log(SurrogateModel(), log, STATS)
+    reference = fit_log(SurrogateModel(), {key: values[keep] for key, values in clean.items()}, STATS)
+    assert fitted.n == 27
+    np.testing.assert_allclose(fitted.xtx, reference.xtx)
+    mean, std = fitted.predict(fitted.features(np.full(POLICY_DIM, 0.2), agent_features(STATS["a"])))
+    assert np.isfinite(mean).all() and np.isfinite(std).all()
+
+
+def test_fit_log_with_no_usable_rows_leaves_model_untouched():
+    log = make_log(5)
+    log["Score"][:] = np.nan
+    assert fit_log(SurrogateModel(), log, STATS).n == 0
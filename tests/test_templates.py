@@ -0,0 +1,74 @@
+# tests/test_templates.py
+
+import os
+import sys
+
+import pytest
+
+from llm.client import set_default_client
+from llm.templates import PromptSet, PromptTemplate
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "experiments", "policy_cases"))
+
+TEMPLATE = PromptTemplate([
+    ("statement", "Statement: {statement}"),
+    ("task", "Critique it."),
+    ("persona", "You are {name}, valuing {values[0]}."),
+])
+
+
+def test_render_fills_every_block_in_order():
+    assert TEMPLATE.render(statement="UBI", name="a", values=[0.5]) == "Statement: UBI\nCritique it.\nYou are a, valuing 0.5."
+    assert TEMPLATE.fields == {"statement", "name", "values"}
+    with pytest.raises(KeyError, match="name"):
+        TEMPLATE.render(statement="UBI", values=[0.5])
+
+
+def test_split_prefix_is_shared_across_agents():
+    first = TEMPLATE.render_split(("name", "values"), statement="UBI", name="a", values=[0.1])
+    second = TEMPLATE.render_split(("name", "values"), statement="UBI", name="b", values=[0.9])
+    assert first[0] == second[0] == "Statement: UBI\nCritique it."
+    assert first[1] != second[1]
+
+
+def test_overlay_adds_replaces_and_removes_blocks():
+    overlaid = TEMPLATE.overlay({"topic": "Topic: {topic}", "task": "Praise it.", "statement": None}, before="task")
+    assert [name for name, _ in overlaid.blocks] == ["topic", "task", "persona"]
+    assert overlaid.render(topic="UBI", name="a", values=[1]) == "Topic: UBI\nPraise it.\nYou are a, valuing 1."
+    assert [name for name, _ in TEMPLATE.blocks] == ["statement", "task", "persona"]  # original untouched
+
+
+def test_prompt_set_layout_survives_overlays():
+    prompts = PromptSet({"critique": TEMPLATE, "opinion": PromptTemplate([("persona", "{name}"), ("task", "Opine.")])},
+                        layout=("topic", "statement", "task", "persona"))
+    assert [name for name, _ in prompts["opinion"].blocks] == ["task", "persona"]
+    overlaid = prompts.overlay({"topic": "About {topic}."}, only=["opinion"])
+    assert [name for name, _ in overlaid["opinion"].blocks] == ["topic", "task", "persona"]
+    assert overlaid["critique"].blocks == prompts["critique"].blocks
+
+
+class RecordingLLM:
+    model = "stub"
+
+    def __init__(self):
+        self.requests = []
+
+    def generate(self, prompt, model=None, options=None, timeout=None, prefix=None, **params):
+        self.requests.append((prefix, prompt))
+        return "An opinion."
+
+
+def test_topic_overlay_costs_one_call_per_opinion(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)  # mediator_pipeline creates output/ on import
+    from mediator_pipeline import DEFAULT_PROMPTS, AIAgent
+    stub = RecordingLLM()
+    set_default_client(stub)
+    try:
+        prompts = DEFAULT_PROMPTS.overlay({"topic": "The policy question is universal basic income."})
+        assert AIAgent("low_income", [0.2] * 5, prompts).generate_opinion() == "An opinion."
+    finally:
+        set_default_client(None)
+    assert len(stub.requests) == 1
+    prefix, prompt = stub.requests[0]
+    assert prefix.startswith("The policy question is universal basic income.")
+    assert "low_income" in prompt and "low_income" not in prefix
@@ -0,0 +1,113 @@
+# tests/test_voting.py
+
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "experiments", "marl_voting"))
+import voting
+
+
+def ranking(row):
+    """Candidates from most to least preferred, ties by lowest index."""
+    return sorted(range(len(row)), key=lambda c: (-row[c], c))
+
+
+def first_max(values):
+    return max(range(len(values)), key=lambda c: (values[c], -c))
+
+
+def brute_plurality(scores):
+    counts = [0] * scores.shape[1]
+    for row in scores:
+        counts[ranking(row)[0]] += 1
+    return counts
+
+
+def brute_borda(scores):
+    k = scores.shape[1]
+    points = [0] * k
+    for row in scores:
+        for position, c in enumerate(ranking(row)):
+            points[c] += k - 1 - position
+    return points
+
+
+def brute_approval(scores, threshold=None):
+    counts = [0] * scores.shape[1]
+    for row in scores:
+        cutoff = row.mean() if threshold is None else threshold
+        for c, value in enumerate(row):
+            counts[c] += int(value >= cutoff)
+    return counts
+
+
+def brute_instant_runoff(scores):
+    ballots = [ranking(row) for row in scores]
+    remaining = set(range(scores.shape[1]))
+    while True:
+        counts = {c: 0 for c in remaining}
+        for ballot in ballots:
+            counts[next(c for c in ballot if c in remaining)] += 1
+        leader = min(remaining, key=lambda c: (-counts[c], c))
+        if 2 * counts[leader] > len(ballots) or len(remaining) == 1:
+            return leader
+        remaining.remove(min(remaining, key=lambda c: (counts[c], -c)))
+
+
+def brute_copeland(scores):
+    k = scores.shape[1]
+    totals = [0] * k
+    for a in range(k):
+        for b in range(k):
+            above = sum(row[a] > row[b] for row in scores)
+            below = sum(row[b] > row[a] for row in scores)
+            totals[a] += int(above > below) - int(above < below)
+    return totals
+
+
+def profiles():
+    rng = np.random.default_rng(0)
+    for trial in range(40):
+        voters, candidates = rng.integers(1, 30), rng.integers(2, 7)
+        if trial % 2:
+            yield rng.integers(0, 3, size=(voters, candidates)).astype(np.float64)  # many ties
+        else:
+            yield rng.random((voters, candidates))
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, voting.CHUNK_SIZE])
+def test_rules_match_brute_force(chunk_size):
+    for scores in profiles():
+        assert voting.plurality_counts(scores, chunk_size).tolist() == brute_plurality(scores)
+        assert voting.borda_scores(scores, chunk_size).tolist() == brute_borda(scores)
+        assert voting.approval_counts(scores, chunk_size=chunk_size).tolist() == brute_approval(scores)
+        assert voting.approval_counts(scores, 0.5, chunk_size).tolist() == brute_approval(scores, 0.5)
+        assert voting.copeland_scores(scores, chunk_size).tolist() == brute_copeland(scores)
+        assert voting.instant_runoff(scores, chunk_size=chunk_size) == brute_instant_runoff(scores)
+        assert voting.plurality(scores, chunk_size) == first_max(brute_plurality(scores))
+        assert voting.borda(scores, chunk_size) == first_max(brute_borda(scores))
+        assert voting.copeland(scores, chunk_size) == first_max(brute_copeland(scores))
+
+
+def test_rank_ballots_break_ties_by_index():
+    scores = np.array([[1.0, 2.0, 2.0, 0.0], [0.0, 0.0, 0.0, 0.0]])
+    assert voting.rank_ballots(scores).tolist() == [[1, 2, 0, 3], [0, 1, 2, 3]]
+
+
+def test_condorcet_winner():
+    # Candidate 1 beats both others head-to-head
+    scores = np.array([[0.1, 0.9, 0.5], [0.9, 0.8, 0.1], [0.2, 0.7, 0.9]])
+    assert voting.condorcet_winner(scores) == 1
+    cycle = np.array([[3, 2, 1], [1, 3, 2], [2, 1, 3]], dtype=np.float64)
+    assert voting.condorcet_winner(cycle) is None
+
+
+def test_rules_accept_memmap(tmp_path):
+    scores = np.random.default_rng(1).random((50, 4))
+    mapped = np.lib.format.open_memmap(str(tmp_path / "scores.npy"), mode="w+", dtype=np.float64, shape=scores.shape)
+    mapped[:] = scores
+    for name, rule in voting.RULES.items():
+        assert rule(mapped) == rule(scores), name